@@ -0,0 +1,130 @@
+"""
+Time the snapshot-backed analytics against equivalent SQL.
+
+Seeds a database, then for a one-year and an all-history range times
+monthly and weekly trends, percentiles and top notes computed from the
+columnar snapshot and by SQL on the pooled readers. Also reports the cost
+of a full snapshot load and of an incremental refresh after a handful of
+writes.
+
+The SQL percentiles use window functions and nearest-rank selection, so
+their values can differ slightly from the snapshot's interpolated ones;
+the point is the timing.
+
+Usage:
+    python -m benchmarks.analytics [--rows 200000] [--repeat 10]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from src.database.codec import date_to_day
+
+TREND_MONTH_SQL = """
+    SELECT CAST(strftime('%Y%m', day * 86400, 'unixepoch') AS INTEGER) AS month,
+           SUM(amount_cents) AS total_cents, COUNT(*) AS count
+    FROM expenses WHERE day BETWEEN ? AND ? GROUP BY month ORDER BY month
+"""
+TREND_WEEK_SQL = """
+    SELECT (day + 3) / 7 AS week, SUM(amount_cents) AS total_cents, COUNT(*) AS count
+    FROM expenses WHERE day BETWEEN ? AND ? GROUP BY week ORDER BY week
+"""
+PERCENTILE_SQL = """
+    WITH ranked AS (
+        SELECT category, amount_cents,
+               ROW_NUMBER() OVER (PARTITION BY category ORDER BY amount_cents) AS rn,
+               COUNT(*) OVER (PARTITION BY category) AS n
+        FROM expenses WHERE day BETWEEN ? AND ?
+    )
+    SELECT category, n,
+           MAX(CASE WHEN rn = CAST(0.50 * (n - 1) AS INTEGER) + 1 THEN amount_cents END) AS p50,
+           MAX(CASE WHEN rn = CAST(0.90 * (n - 1) AS INTEGER) + 1 THEN amount_cents END) AS p90,
+           MAX(CASE WHEN rn = CAST(0.95 * (n - 1) AS INTEGER) + 1 THEN amount_cents END) AS p95,
+           MAX(CASE WHEN rn = CAST(0.99 * (n - 1) AS INTEGER) + 1 THEN amount_cents END) AS p99
+    FROM ranked GROUP BY category
+"""
+TOP_NOTES_SQL = """
+    SELECT lower(trim(note)) AS note, SUM(amount_cents) AS total_cents, COUNT(*) AS count
+    FROM expenses WHERE day BETWEEN ? AND ? AND note != ''
+    GROUP BY 1 ORDER BY total_cents DESC LIMIT 10
+"""
+
+
+async def timed(fn, repeat: int) -> float:
+    """Median milliseconds per call"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run(args):
+    from src.database.snapshot import snapshots
+    from src.database.sqlite_client import db
+    from src.tools.expense_tools import add_expense, delete_expense, update_expense
+
+    await db.ensure_schema()
+    await db.connect()
+    try:
+        started = time.perf_counter()
+        snapshot = await snapshots.get()
+        full_load = (time.perf_counter() - started) * 1000
+        print(f"full snapshot load: {full_load:.1f} ms for {len(snapshot)} rows")
+
+        async def refresh_after_writes():
+            added = await add_expense("2024-06-01", 12.5, "food", note="benchmark")
+            await update_expense(added["expense_id"], amount=13.5)
+            await delete_expense(added["expense_id"])
+            await snapshots.get()
+
+        refresh = await timed(refresh_after_writes, args.repeat)
+        print(f"incremental refresh after 3 writes (writes included): {refresh:.1f} ms")
+
+        ranges = {
+            "one year": ("2024-01-01", "2024-12-31"),
+            "all history": ("2000-01-01", "2099-12-31"),
+        }
+        print(f"\n{'query':<18} {'range':<12} {'snapshot ms':>12} {'sql ms':>10} {'speedup':>8}")
+        for label, (start, end) in ranges.items():
+            days = (date_to_day(start), date_to_day(end))
+
+            async def snapshot_call(method, *method_args):
+                return getattr(await snapshots.get(), method)(*days, *method_args)
+
+            cases = [
+                ("monthly trend", lambda: snapshot_call("trends", "month"), TREND_MONTH_SQL),
+                ("weekly trend", lambda: snapshot_call("trends", "week"), TREND_WEEK_SQL),
+                ("percentiles", lambda: snapshot_call("percentiles", [50, 90, 95, 99]), PERCENTILE_SQL),
+                ("top notes", lambda: snapshot_call("top_notes", 10), TOP_NOTES_SQL),
+            ]
+            for name, vectorized, sql in cases:
+                snapshot_ms = await timed(vectorized, args.repeat)
+                sql_ms = await timed(lambda: db.fetch_all(sql, days), args.repeat)
+                print(f"{name:<18} {label:<12} {snapshot_ms:>12.2f} {sql_ms:>10.2f} "
+                      f"{sql_ms / snapshot_ms:>7.1f}x")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Cost of budget checks answered from the rollup counters.
+
+Seeds a database, then compares ``check_budget`` for one category-month
+with the same spending computed by a SUM over ``expenses``, and times
+``add_expense`` without and with a budget on the category (the add
+response then carries the budget state).
+
+Usage:
+    python -m benchmarks.budgets [--rows 1000000] [--repeat 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from src.database.codec import date_to_day
+
+MONTH = "2024-06"
+SUM_SQL = """
+    SELECT COALESCE(SUM(amount_cents), 0) AS spent_cents FROM expenses
+    WHERE day BETWEEN ? AND ? AND category = ?
+"""
+
+
+async def median_ms(call, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run(args):
+    from src.database.sqlite_client import db
+    from src.tools.budget_tools import check_budget, remove_budget, set_budget
+    from src.tools.expense_tools import add_expense
+
+    await db.ensure_schema()
+    await db.connect()
+    try:
+        await set_budget("food", 500)
+        days = (date_to_day(f"{MONTH}-01"), date_to_day(f"{MONTH}-30"))
+        counters = await median_ms(lambda: check_budget(MONTH, "food"), args.repeat)
+        summed = await median_ms(lambda: db.fetch_one(SUM_SQL, (*days, "food")), args.repeat)
+        print(f"{'spent this month':<28} {'ms':>8}")
+        print(f"{'check_budget (counters)':<28} {counters:>8.3f}")
+        print(f"{'SUM over expenses':<28} {summed:>8.3f}")
+
+        async def add():
+            await add_expense(f"{MONTH}-15", 12.5, "food", note="benchmark")
+
+        with_budget = await median_ms(add, args.repeat)
+        await remove_budget("food")
+        without_budget = await median_ms(add, args.repeat)
+        print(f"\n{'add_expense':<28} {'ms':>8}")
+        print(f"{'no budget':<28} {without_budget:>8.3f}")
+        print(f"{'with budget':<28} {with_budget:>8.3f}")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
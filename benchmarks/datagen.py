@@ -0,0 +1,152 @@
+"""
+Deterministic synthetic expense generator.
+
+Rows follow the categories in ``src/config/categories.json`` with skewed
+category weights, log-normal amounts per category, more spending on
+weekends and a slowly growing volume over the covered period. The same
+``seed`` always produces the same rows, so databases built on different
+commits hold identical data.
+
+Usage:
+    python -m benchmarks.datagen --rows 1000000 --db /tmp/expenses-1m.db [--seed 42]
+"""
+import argparse
+import math
+import random
+import sqlite3
+import sys
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.config.category_catalog import category_catalog
+from src.database.codec import EPOCH_ORDINAL
+from src.database.migrations import run_migrations
+from src.tools.expense_tools import INSERT_SQL
+
+FIRST_DAY = date(2016, 1, 1)
+DAYS = 3650
+NOTE_RATE = 0.2
+
+# Relative frequency and median amount (in currency units) per category;
+# anything in the catalog that is not listed gets the fallback profile
+PROFILES: Dict[str, Tuple[float, float]] = {
+    "food": (30.0, 18.0),
+    "transport": (14.0, 12.0),
+    "shopping": (9.0, 45.0),
+    "utilities": (6.0, 60.0),
+    "entertainment": (6.0, 25.0),
+    "subscriptions": (5.0, 12.0),
+    "health": (4.0, 40.0),
+    "personal_care": (4.0, 20.0),
+    "housing": (3.0, 400.0),
+    "travel": (2.0, 180.0),
+    "education": (2.0, 60.0),
+    "business": (2.0, 80.0),
+}
+FALLBACK_PROFILE = (1.5, 35.0)
+AMOUNT_SIGMA = 0.9
+
+
+class ExpenseGenerator:
+    """Produces rows in the ``INSERT_SQL`` parameter layout"""
+
+    def __init__(self, seed: int = 42, first_day: date = FIRST_DAY, days: int = DAYS,
+                 categories: Optional[Dict[str, List[str]]] = None):
+        self.rng = random.Random(seed)
+        catalog = categories or {k: sorted(v) for k, v in category_catalog.categories().items()}
+        self.categories = sorted(catalog)
+        self.subcategories = [[""] + sorted(catalog[c]) for c in self.categories]
+        profiles = [PROFILES.get(c, FALLBACK_PROFILE) for c in self.categories]
+        self.category_weights = _cumulative([weight for weight, _ in profiles])
+        self.log_medians = [math.log(median) for _, median in profiles]
+
+        # Weekends are busier and later days busier than early ones
+        self.first_day = first_day.toordinal() - EPOCH_ORDINAL
+        day_weights = []
+        for offset in range(days):
+            weekday = (first_day.toordinal() + offset) % 7  # 0 = Sunday
+            weekend = 1.6 if weekday in (0, 6) else 1.0
+            day_weights.append(weekend * (1.0 + offset / days))
+        self.day_weights = _cumulative(day_weights)
+        self.days = days
+
+    def row(self) -> tuple:
+        rng = self.rng
+        index = _pick(self.category_weights, rng.random())
+        amount = math.exp(rng.gauss(self.log_medians[index], AMOUNT_SIGMA))
+        note = f"note {rng.getrandbits(24):06x}" if rng.random() < NOTE_RATE else ""
+        return (
+            f"{rng.getrandbits(128):032x}",
+            self.first_day + _pick(self.day_weights, rng.random()),
+            max(1, int(round(amount * 100))),
+            self.categories[index],
+            rng.choice(self.subcategories[index]),
+            note,
+        )
+
+    def rows(self, count: int) -> Iterator[tuple]:
+        for _ in range(count):
+            yield self.row()
+
+
+def _cumulative(weights: List[float]) -> List[float]:
+    total = sum(weights)
+    running, out = 0.0, []
+    for weight in weights:
+        running += weight
+        out.append(running / total)
+    out[-1] = 1.0
+    return out
+
+
+def _pick(cumulative: List[float], value: float) -> int:
+    # Binary search over the cumulative weights
+    lo, hi = 0, len(cumulative) - 1
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if cumulative[mid] < value:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def build_database(path: str, rows: int, seed: int = 42, batch: int = 50000) -> int:
+    """Create (or top up) a database at ``path`` with ``rows`` generated rows.
+
+    Existing rows are kept and only the missing ones are generated, so a
+    seeded file can be reused across runs. Returns the final row count.
+    """
+    run_migrations(path)
+    conn = sqlite3.connect(path)
+    try:
+        existing = conn.execute("SELECT COUNT(*) FROM expenses").fetchone()[0]
+        generator = ExpenseGenerator(seed + existing)
+        for offset in range(existing, rows, batch):
+            conn.executemany(INSERT_SQL, generator.rows(min(batch, rows - offset)))
+            conn.commit()
+        if rows > existing:
+            conn.execute("ANALYZE")
+            conn.commit()
+        return max(rows, existing)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--db", required=True, help="Database file to create or top up")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total = build_database(args.db, args.rows, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"{args.db}: {total} rows ({elapsed:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
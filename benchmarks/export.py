@@ -0,0 +1,118 @@
+"""
+Measure the streaming export against encoding on the event loop.
+
+Exports the whole generated range as CSV (plain and gzipped) two ways:
+
+- thread: ``src.tools.export_tools.stream_export``, reading and encoding
+  in a worker thread
+- loop: ``db.iter_rows`` with the CSV writer and gzip running on the
+  event loop, the way the NDJSON stream route works
+
+For each it reports throughput, peak Python memory allocated during the
+export (tracemalloc, all threads, measured in a second run) and the
+worst event loop stall seen by a 1 ms ticker running alongside, which is
+what concurrent tool calls would wait for.
+
+Usage:
+    python -m benchmarks.export [--rows 1000000]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+
+async def loop_export(start_date: str, end_date: str, compress: bool):
+    from src.database.sqlite_client import db
+    from src.tools.export_tools import EXPORT_FIELDS
+    from src.tools.expense_tools import build_list_query
+
+    query, params = build_list_query(start_date, end_date)
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_FIELDS)
+    async for row in db.iter_rows(query, params):
+        writer.writerow(row.values())
+        if buffer.tell() > 64 * 1024:
+            data = buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            yield gzip.compress(data) if gzip else data
+    data = buffer.getvalue().encode("utf-8")
+    yield (gzip.compress(data) + gzip.flush()) if gzip else data
+
+
+async def measure(chunks, trace: bool) -> tuple:
+    stalls = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append(time.perf_counter() - started - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    done.set()
+    await tick
+    return elapsed, size, peak, max(stalls, default=0.0)
+
+
+async def run(args):
+    from src.database.sqlite_client import db
+    from src.tools.export_tools import stream_export
+
+    await db.ensure_schema()
+    await db.connect()
+    start_date, end_date = "2000-01-01", "2099-12-31"
+    print(f"{'mode':<7} {'gzip':<5} {'seconds':>8} {'rows/s':>10} {'MB out':>8} {'peak MB':>8} {'max stall ms':>13}")
+    try:
+        for compress in (False, True):
+            for mode in ("thread", "loop"):
+                async def chunks():
+                    if mode == "thread":
+                        return await stream_export(start_date, end_date, compress=compress)
+                    return loop_export(start_date, end_date, compress)
+
+                # tracemalloc slows allocation down, so time a separate run
+                elapsed, size, _, stall = await measure(await chunks(), trace=False)
+                _, _, peak, _ = await measure(await chunks(), trace=True)
+                print(f"{mode:<7} {str(compress):<5} {elapsed:>8.2f} {args.rows / elapsed:>10.0f} "
+                      f"{size / 1e6:>8.1f} {peak / 1e6:>8.1f} {stall * 1000:>13.1f}")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure conditional GETs and response compression on the read routes.
+
+For GET /expenses (one large page) and GET /expenses/summary, reports:
+
+- bytes on the wire with no compression, gzip and brotli
+- median latency of a full 200 response (result cache off) and of a
+  304 revalidation with If-None-Match
+
+Requests go through the ASGI app in process, so latencies exclude the
+network and show the server-side cost only.
+
+Usage:
+    python -m benchmarks.http_caching [--rows 100000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+
+async def median_ms(client, url: str, params: dict, headers: dict, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await client.get(url, params=params, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run(args):
+    import httpx
+
+    from src.database.sqlite_client import db
+    from src.http_server import app
+    from src.utils.compression import ENCODINGS
+    from src.utils.result_cache import result_cache
+
+    result_cache.enabled = False
+    await db.ensure_schema()
+    await db.connect()
+    cases = [
+        ("list 1000", "/expenses", {"start_date": "2016-01-01", "end_date": "2025-12-31", "limit": 1000}),
+        ("summary", "/expenses/summary", {"start_date": "2016-01-01", "end_date": "2025-12-31",
+                                          "by_subcategory": "true"}),
+    ]
+    encodings = ("identity",) + ENCODINGS
+    print(f"{'case':<10} " + " ".join(f"{name + ' B':>10}" for name in encodings)
+          + f" {'200 ms':>8} {'304 ms':>8}")
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for label, url, params in cases:
+                sizes = []
+                for encoding in encodings:
+                    async with client.stream("GET", url, params=params,
+                                             headers={"accept-encoding": encoding}) as response:
+                        sizes.append(sum([len(chunk) async for chunk in response.aiter_raw()]))
+                        etag = response.headers["etag"]
+                full = await median_ms(client, url, params, {"accept-encoding": "identity"}, args.repeat)
+                revalidate = await median_ms(client, url, params, {"if-none-match": etag}, args.repeat)
+                print(f"{label:<10} " + " ".join(f"{size:>10}" for size in sizes)
+                      + f" {full:>8.2f} {revalidate:>8.2f}")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
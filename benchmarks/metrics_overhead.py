@@ -0,0 +1,113 @@
+"""
+Measure what the metrics instrumentation costs per tool call.
+
+Runs the same MCP tool calls (through an in-memory FastMCP client, so
+the tool middleware is active) in alternating rounds with metrics on and
+off and compares median latency. Also times the recording primitives on
+their own. The result cache is turned off so every call reaches SQLite.
+
+Usage:
+    python -m benchmarks.metrics_overhead [--rows 20000] [--calls 200] [--rounds 6]
+                                          [--max-overhead 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+
+
+async def measure(client, calls, rounds: int):
+    from src.utils.metrics import metrics
+
+    timings = {True: [], False: []}
+    for round_number in range(rounds * 2):
+        # Alternate so drift (page cache, WAL growth) hits both sides equally
+        enabled = round_number % 2 == 0
+        metrics.enabled = enabled
+        for name, args in calls:
+            started = time.perf_counter()
+            await client.call_tool(name, args)
+            timings[enabled].append(time.perf_counter() - started)
+    metrics.enabled = True
+    return timings
+
+
+def primitive_costs() -> dict:
+    from src.utils.metrics import Histogram, record_query
+
+    histogram = Histogram("bench_seconds", "benchmark", ("a", "b"))
+    sql = "SELECT id FROM expenses WHERE day BETWEEN ? AND ?"
+    number = 200000
+    observe = timeit.timeit(lambda: histogram.observe(0.002, "x", "y"), number=number) / number
+    started = time.perf_counter()
+    record = timeit.timeit(lambda: record_query("fetch", sql, started, 10), number=number) / number
+    return {"histogram_observe_us": observe * 1e6, "record_query_us": record * 1e6}
+
+
+async def run(args):
+    from fastmcp import Client
+    from benchmarks.tools import Workload
+    from src.server import mcp
+    from src.database.sqlite_client import db
+    from src.tools.expense_tools import register_expense_tools
+    from src.utils.result_cache import result_cache
+
+    register_expense_tools(mcp)
+    result_cache.enabled = False
+
+    workload = Workload(args.seed, [])
+    calls = []
+    for _ in range(args.calls):
+        calls.append(("list_expenses", workload.list_expenses()))
+        calls.append(("summarize_expenses", workload.summarize_expenses()))
+        calls.append(("add_expense", workload.add_expense()))
+
+    async with Client(mcp) as client:
+        # Warm up the pool, page cache and statement cache
+        for name, call_args in calls[:30]:
+            await client.call_tool(name, call_args)
+        timings = await measure(client, calls, args.rounds)
+    await db.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--calls", type=int, default=200, help="Calls of each tool per round")
+    parser.add_argument("--rounds", type=int, default=6, help="Rounds per side (on/off)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-overhead", type=float, help="Fail if median overhead exceeds this percentage")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    timings = asyncio.run(run(args))
+
+    on = statistics.median(timings[True])
+    off = statistics.median(timings[False])
+    overhead = (on - off) / off * 100
+    costs = primitive_costs()
+
+    print(f"{len(timings[True])} calls per side, {args.rows} rows")
+    print(f"median latency, metrics off: {off * 1000:.3f} ms")
+    print(f"median latency, metrics on:  {on * 1000:.3f} ms")
+    print(f"overhead: {(on - off) * 1e6:+.1f} us per call ({overhead:+.2f}%)")
+    print(f"histogram observe: {costs['histogram_observe_us']:.3f} us, "
+          f"record_query: {costs['record_query_us']:.3f} us")
+
+    if args.max_overhead is not None and overhead > args.max_overhead:
+        print(f"FAIL: overhead above {args.max_overhead}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
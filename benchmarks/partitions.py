@@ -0,0 +1,117 @@
+"""
+Measure read latency on a ten-year dataset before and after archiving.
+
+Builds the generated dataset (2016-2025), times the read tools on the
+current month and on the whole range, then archives every year but the
+last two (``compact_partitions`` with today = 2025-12-31) and times the
+same calls again. Also reports how long compaction took, the main and
+archive file sizes, and the plan of the partitioned list query.
+
+Current-month list pages are index seeks either way; what shrinks is
+the main table's indexes and full-text index, which every write and
+every term lookup walks.
+
+Usage:
+    python -m benchmarks.partitions [--rows 1000000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date
+
+
+def used_mb(conn: sqlite3.Connection, schema: str) -> float:
+    """Size of the pages in use; freed pages stay in the file until a VACUUM"""
+    page_size = conn.execute(f"PRAGMA {schema}.page_size").fetchone()[0]
+    pages = conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+    free = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+    return (pages - free) * page_size / 1e6
+
+
+async def median_ms(call, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run(args):
+    from src.database.partitions import archive_path
+    from src.database.sqlite_client import db
+    from src.tools.expense_tools import (
+        add_expense,
+        build_list_query,
+        list_expenses_page,
+        search_expenses_page,
+        summarize_expenses_data,
+    )
+    from src.utils.result_cache import result_cache
+
+    result_cache.enabled = False
+    await db.ensure_schema()
+    await db.connect()
+    month = ("2025-12-01", "2025-12-31")
+    everything = ("2016-01-01", "2025-12-31")
+    cases = [
+        ("list month", lambda: list_expenses_page(*month, limit=100)),
+        ("list month food", lambda: list_expenses_page(*month, category="food", limit=100)),
+        ("search month", lambda: search_expenses_page("note", *month, limit=100)),
+        ("summary month", lambda: summarize_expenses_data(*month)),
+        ("list all", lambda: list_expenses_page(*everything, limit=100)),
+        ("search all", lambda: search_expenses_page("note", limit=100)),
+        ("add expense", lambda: add_expense(date="2025-12-15", amount=1.0, category="food")),
+    ]
+    try:
+        timings = {}
+        for label, call in cases:
+            timings[label] = [await median_ms(call, args.repeat)]
+
+        started = time.perf_counter()
+        result = await db.compact_partitions(2, date(2025, 12, 31))
+        compact_seconds = time.perf_counter() - started
+
+        for label, call in cases:
+            timings[label].append(await median_ms(call, args.repeat))
+
+        print(f"{'case':<17} {'before ms':>10} {'after ms':>10}")
+        for label, (before, after) in timings.items():
+            print(f"{label:<17} {before:>10.2f} {after:>10.2f}")
+
+        archived_rows = sum(a["rows"] for a in result["archived"])
+        print(f"\ncompaction: {len(result['archived'])} years, {archived_rows} rows in {compact_seconds:.1f} s, "
+              f"vacuumed={result['vacuumed']}")
+        query, params = build_list_query(*everything, limit=100, include_key=True, partitions=await db.partitions())
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path(db.db_path),))
+        print(f"in use: main {used_mb(conn, 'main'):.1f} MB, archive {used_mb(conn, 'archive'):.1f} MB")
+        print("\nplan (list all):")
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params):
+            print(f"  {row[3]}")
+        conn.close()
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Cost of materializing recurring expenses on the read path.
+
+Seeds a database, then times ``list_expenses`` with no rules, with rules
+whose occurrences are all materialized (the common case: one indexed
+lookup of the earliest due day), and the first read after adding rules
+that start years back, which writes their whole backlog.
+
+Usage:
+    python -m benchmarks.recurring [--rows 1000000] [--rules 50] [--repeat 200]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+START, END = "2024-06-01", "2024-06-30"
+
+
+async def median_ms(call, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+async def run(args):
+    from src.database.sqlite_client import db
+    from src.tools.expense_tools import list_expenses
+    from src.tools.recurring_tools import add_recurring_expense
+
+    await db.ensure_schema()
+    await db.connect()
+    try:
+        async def page():
+            await list_expenses(START, END, limit=50)
+
+        no_rules = await median_ms(page, args.repeat)
+        for i in range(args.rules):
+            await add_recurring_expense("2020-01-01", 10 + i, "subscriptions", frequency="weekly", note=f"rule {i}")
+        started = time.perf_counter()
+        await page()
+        backlog = (time.perf_counter() - started) * 1000
+        up_to_date = await median_ms(page, args.repeat)
+
+        print(f"{'list_expenses':<34} {'ms':>9}")
+        print(f"{'no rules':<34} {no_rules:>9.3f}")
+        print(f"{f'{args.rules} rules, all materialized':<34} {up_to_date:>9.3f}")
+        print(f"{'first read, backlog since 2020':<34} {backlog:>9.3f}")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--rules", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
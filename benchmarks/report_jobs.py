@@ -0,0 +1,103 @@
+"""
+Latency of small reads while a heavy report runs inline or as a job.
+
+Seeds a database, then runs an all-history ``expense_percentiles`` from a
+cold snapshot (the most expensive analytics call) while a probe lists one
+page of expenses every few milliseconds. The report runs once inline, as
+the tool does, and once through ``submit_report`` / ``get_report`` in a
+worker process. For each, prints the report's wall time and the probe's
+median and worst latency while it ran.
+
+Usage:
+    python -m benchmarks.report_jobs [--rows 1000000] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+ARGS = {"start_date": "2000-01-01", "end_date": "2099-12-31"}
+PROBE_INTERVAL = 0.005
+
+
+async def probe(stop: asyncio.Event, samples: List[float]):
+    from src.tools.expense_tools import list_expenses
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        await list_expenses("2024-01-01", "2024-01-31", limit=20)
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(PROBE_INTERVAL)
+
+
+async def measure(label: str, report, repeat: int):
+    walls: List[float] = []
+    samples: List[float] = []
+    for _ in range(repeat):
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe(stop, samples))
+        started = time.perf_counter()
+        await report()
+        walls.append((time.perf_counter() - started) * 1000)
+        stop.set()
+        await prober
+    samples.sort()
+    print(f"{label:<10} {sorted(walls)[len(walls) // 2]:>10.0f} {samples[len(samples) // 2]:>12.2f} "
+          f"{samples[-1]:>10.1f} {len(samples):>8}")
+
+
+async def run(args):
+    from src.database.snapshot import snapshots
+    from src.database.sqlite_client import db
+    from src.tools.analytics_tools import expense_percentiles
+    from src.tools.report_tools import get_report, submit_report
+    from src.utils.jobs import jobs
+
+    await db.ensure_schema()
+    await db.connect()
+    try:
+        async def inline():
+            snapshots.clear()
+            await expense_percentiles(**ARGS)
+
+        rounds = iter(range(args.repeat))
+
+        async def job():
+            # Identical reports are reused; a different end date makes each round recompute
+            end_date = f"2099-12-{next(rounds) + 1:02d}"
+            submitted = await submit_report("expense_percentiles", {**ARGS, "end_date": end_date})
+            while True:
+                result = await get_report(submitted["job_id"], wait_seconds=30)
+                if result["state"] not in ("queued", "running"):
+                    break
+
+        # Start the worker processes before timing
+        await submit_report("summarize_expenses", ARGS)
+
+        print(f"{'report':<10} {'wall ms':>10} {'probe p50':>12} {'probe max':>10} {'probes':>8}")
+        await measure("inline", inline, args.repeat)
+        await measure("job", job, args.repeat)
+    finally:
+        await jobs.close()
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
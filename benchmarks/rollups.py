@@ -0,0 +1,115 @@
+"""
+Check the summary rollups against the raw table and time both query paths.
+
+Seeds a database, applies random updates (including date and category
+moves) and deletes, verifies that the rollups still match the raw-table
+aggregation, then times summaries for a month, a year and all history.
+
+Usage:
+    python -m benchmarks.rollups [--rows 200000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+from src.database.codec import date_to_day
+from src.database.rollups import (
+    build_raw_summary_query,
+    build_rollup_summary_query,
+    check_rollup_consistency,
+)
+from src.database.sqlite_client import SQLiteClient
+
+CATEGORIES = ["food", "transport", "housing", "utilities", "health", "shopping"]
+SUBCATEGORIES = ["", "groceries", "fuel", "rent", "other"]
+FIRST_DAY = date(2015, 1, 1)
+DAYS = 3650
+
+
+def random_row(rng: random.Random) -> tuple:
+    day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+    return (
+        date_to_day(day.isoformat()),
+        rng.randrange(100, 50000),
+        rng.choice(CATEGORIES),
+        rng.choice(SUBCATEGORIES),
+        "",
+    )
+
+
+async def seed(client: SQLiteClient, rows: int, rng: random.Random):
+    insert = "INSERT INTO expenses (day, amount_cents, category, subcategory, note) VALUES (?, ?, ?, ?, ?)"
+    batch = 10000
+    for offset in range(0, rows, batch):
+        await client.executemany(insert, [random_row(rng) for _ in range(min(batch, rows - offset))])
+
+
+async def churn(client: SQLiteClient, operations: int, rng: random.Random):
+    ids = [r["id"] for r in await client.fetch_all("SELECT id FROM expenses LIMIT ?", (operations * 2,))]
+    rng.shuffle(ids)
+    for expense_id in ids[:operations]:
+        new_day, amount_cents, category, subcategory, _ = random_row(rng)
+        await client.execute(
+            "UPDATE expenses SET day = ?, amount_cents = ?, category = ?, subcategory = ? WHERE id = ?",
+            (new_day, amount_cents, category, subcategory, expense_id)
+        )
+    for expense_id in ids[operations:operations * 2]:
+        await client.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+
+
+async def time_query(client: SQLiteClient, query: str, params: tuple, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await client.fetch_all(query, params)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        client = SQLiteClient(os.path.join(tmp, "bench.db"))
+        client.init_schema()
+        try:
+            await seed(client, args.rows, rng)
+            await churn(client, 500, rng)
+
+            mismatches = await check_rollup_consistency(client)
+            print(f"consistency: {'OK' if not mismatches else f'{len(mismatches)} mismatches'}")
+
+            last_day = FIRST_DAY + timedelta(days=DAYS - 1)
+            ranges = {
+                "month": (last_day.replace(day=1).isoformat(), last_day.isoformat()),
+                "year": (last_day.replace(month=1, day=1).isoformat(), last_day.isoformat()),
+                "all (ragged edges)": ((FIRST_DAY + timedelta(days=10)).isoformat(), (last_day - timedelta(days=10)).isoformat()),
+            }
+            print(f"{'range':<20} {'raw ms':>10} {'rollup ms':>10}")
+            for label, (start, end) in ranges.items():
+                raw_query = build_raw_summary_query(date_to_day(start), date_to_day(end))
+                raw = await client.fetch_all(*raw_query)
+                rolled = await client.fetch_all(*build_rollup_summary_query(start, end))
+                if sorted(map(tuple, map(dict.values, raw))) != sorted(map(tuple, map(dict.values, rolled))):
+                    mismatches.append({"range": label})
+                raw_ms = await time_query(client, *raw_query, args.repeat)
+                rollup_ms = await time_query(client, *build_rollup_summary_query(start, end), args.repeat)
+                print(f"{label:<20} {raw_ms:>10.2f} {rollup_ms:>10.2f}")
+        finally:
+            await client.close()
+
+    if mismatches:
+        print(f"FAILED: {mismatches[:10]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,106 @@
+"""
+Compare full-text search against LIKE '%term%' scans.
+
+Builds (or reuses) a generated database, gives the rows that carry a note
+a merchant-style note ("<merchant> <item>") drawn from a skewed
+vocabulary, and then times each query two ways: the first page of ranked
+FTS5 results, and the first page of a LIKE scan over note and
+subcategory. It also times counting every match both ways.
+
+Usage:
+    python -m benchmarks.search [--rows 1000000] [--db /tmp/expenses-1m.db] [--repeat 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+MERCHANT_PARTS = (
+    ["blue", "green", "golden", "corner", "city", "river", "north", "sun", "urban", "royal",
+     "little", "happy", "metro", "prime", "fresh", "silver", "maple", "ocean", "union", "park"],
+    ["bottle", "market", "bakery", "garage", "pharmacy", "bistro", "books", "fitness", "grocer",
+     "cinema", "kitchen", "outfitters", "hardware", "taxi", "coffee", "deli", "salon", "supply"],
+)
+ITEMS = ["lunch", "dinner", "weekly shop", "refill", "subscription", "ride", "tickets", "gift",
+         "repair", "snacks", "monthly fee", "takeaway", "parts", "membership", "order"]
+
+QUERIES = [
+    ("common word", "coffee", "coffee"),
+    ("rare merchant", "royal bistro", '"royal bistro"'),
+    ("prefix", "phar", "phar*"),
+    ("two words", "%market%dinner", "market dinner"),
+]
+PAGE = 100
+
+
+def merchant_notes(conn: sqlite3.Connection, seed: int):
+    """Replace generated notes with merchant-style ones (skewed, deterministic)"""
+    rng = random.Random(seed)
+    merchants = [f"{a} {b}" for a in MERCHANT_PARTS[0] for b in MERCHANT_PARTS[1]]
+    weights = [1 / (rank + 1) for rank in range(len(merchants))]
+    pks = [row[0] for row in conn.execute("SELECT pk FROM expenses WHERE note != '' ORDER BY pk")]
+    chosen = rng.choices(merchants, weights, k=len(pks))
+    conn.executemany(
+        "UPDATE expenses SET note = ? WHERE pk = ?",
+        ((f"{merchant} {rng.choice(ITEMS)}", pk) for merchant, pk in zip(chosen, pks))
+    )
+    conn.commit()
+
+
+def timed(conn: sqlite3.Connection, sql: str, params: tuple, repeat: int) -> float:
+    """Median milliseconds to fetch every row"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--db", help="Database file to create or reuse (default: a temporary file)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from benchmarks.datagen import build_database
+    from src.database.search import build_match_query, build_search_query
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "expenses.db")
+    started = time.perf_counter()
+    build_database(path, args.rows, args.seed)
+    conn = sqlite3.connect(path)
+    if conn.execute("SELECT COUNT(*) FROM expenses WHERE note LIKE 'note %'").fetchone()[0]:
+        merchant_notes(conn, args.seed)
+    print(f"database ready in {time.perf_counter() - started:.1f}s: {args.rows} rows")
+
+    print(f"\n{'query':<14} {'matches':>8} {'fts page':>9} {'like page':>10} "
+          f"{'fts all':>8} {'like all':>9}   (ms)")
+    for label, like_term, fts_text in QUERIES:
+        pattern = like_term if "%" in like_term else f"%{like_term}%"
+        like_where = "(note LIKE ? OR subcategory LIKE ?)"
+        like_page = f"SELECT id, note FROM expenses WHERE {like_where} ORDER BY day DESC LIMIT {PAGE}"
+        like_count = f"SELECT COUNT(*) FROM expenses WHERE {like_where}"
+        fts_page, fts_params = build_search_query(fts_text, limit=PAGE)
+        fts_count = "SELECT COUNT(*) FROM expenses_fts WHERE expenses_fts MATCH ?"
+        match = build_match_query(fts_text)
+
+        matches = conn.execute(fts_count, (match,)).fetchone()[0]
+        times = (
+            timed(conn, fts_page, fts_params, args.repeat),
+            timed(conn, like_page, (pattern, pattern), args.repeat),
+            timed(conn, fts_count, (match,), args.repeat),
+            timed(conn, like_count, (pattern, pattern), args.repeat),
+        )
+        print(f"{label:<14} {matches:>8} " + " ".join(f"{t:>9.1f}" for t in times))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
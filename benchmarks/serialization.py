@@ -0,0 +1,96 @@
+"""
+Measure the columnar response format and the fast JSON encoder.
+
+For list_expenses pages and a by-subcategory summary, compares the
+default "rows" shape with "columns":
+
+- build: CPU time for the tool call (query, rows, response dict), with
+  the result cache off
+- encode: CPU time to encode the result with the stdlib encoder that
+  JSONResponse uses and with ``src.utils.serialization.dumps`` (orjson
+  when installed)
+- bytes: encoded payload size
+
+Usage:
+    python -m benchmarks.serialization [--rows 100000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+
+def stdlib_dumps(value) -> bytes:
+    # What starlette's JSONResponse does
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat * 1000
+
+
+async def cpu_ms_async(fn, repeat: int) -> float:
+    started = time.process_time()
+    for _ in range(repeat):
+        await fn()
+    return (time.process_time() - started) / repeat * 1000
+
+
+async def run(args):
+    from src.database.sqlite_client import db
+    from src.tools.expense_tools import list_expenses, summarize_expenses
+    from src.utils.result_cache import result_cache
+    from src.utils.serialization import JSON_ENCODER, dumps
+
+    result_cache.enabled = False
+    await db.ensure_schema()
+    await db.connect()
+    cases = [
+        ("list 100", lambda fmt: list_expenses("2016-01-01", "2025-12-31", limit=100, format=fmt)),
+        ("list 1000", lambda fmt: list_expenses("2016-01-01", "2025-12-31", limit=1000, format=fmt)),
+        ("summary", lambda fmt: summarize_expenses("2016-01-01", "2025-12-31", by_subcategory=True, format=fmt)),
+    ]
+    print(f"fast encoder: {JSON_ENCODER}")
+    print(f"{'case':<10} {'shape':<8} {'build ms':>9} {'json ms':>8} {'fast ms':>8} {'bytes':>8}")
+    try:
+        for label, call in cases:
+            baseline = None
+            for fmt in ("rows", "columns"):
+                build = await cpu_ms_async(lambda: call(fmt), args.repeat)
+                result = await call(fmt)
+                encode_json = cpu_ms(lambda: stdlib_dumps(result), args.repeat)
+                encode_fast = cpu_ms(lambda: dumps(result), args.repeat)
+                size = len(dumps(result))
+                print(f"{label:<10} {fmt:<8} {build:>9.3f} {encode_json:>8.3f} {encode_fast:>8.3f} {size:>8}")
+                if baseline is None:
+                    baseline = (build + encode_json, size)
+                else:
+                    total = build + encode_fast
+                    print(f"{'':<10} columns + {JSON_ENCODER}: {(1 - total / baseline[0]) * 100:.0f}% less CPU, "
+                          f"{(1 - size / baseline[1]) * 100:.0f}% fewer bytes than rows + json")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    from benchmarks.datagen import build_database
+
+    build_database(os.environ["DATABASE_PATH"], args.rows, args.seed)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Write throughput as the same writers are spread over more organizations.
+
+A fixed number of concurrent writers insert expenses. With one tenant
+they all share one database and its single writer connection; with N
+tenants each organization has its own shard, so writes to different
+organizations commit in parallel.
+
+Usage:
+    python -m benchmarks.sharding [--writes 4000] [--writers 16] [--tenants 1,2,4,8]
+
+Run with DB_SYNCHRONOUS=FULL to see the effect of per-shard fsyncs, and
+with DB_WRITE_BATCHING=false to measure the shards without group commit.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from src.database.codec import new_expense_id
+from src.database.sqlite_client import ShardedClient
+from src.tools.expense_tools import INSERT_SQL
+from src.utils.tenancy import org_scope
+
+
+async def run_writes(client: ShardedClient, tenants: int, writes: int, writers: int) -> float:
+    """Issue ``writes`` inserts from ``writers`` workers spread over ``tenants`` organizations"""
+    per_worker = writes // writers
+    orgs = [f"org-{t}" for t in range(tenants)]
+
+    # Open every shard up front so migrations are not timed
+    for org in orgs:
+        with org_scope(org):
+            await client.fetch_one("SELECT 1")
+
+    async def worker(worker_id: int):
+        with org_scope(orgs[worker_id % tenants]):
+            for i in range(per_worker):
+                await client.execute(
+                    INSERT_SQL,
+                    (new_expense_id(), 19737, 1000 + i % 100, "food", "groceries", f"worker {worker_id}")
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(writers)))
+    elapsed = time.perf_counter() - started
+    return (per_worker * writers) / elapsed
+
+
+async def bench(tenants: int, writes: int, writers: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        client = ShardedClient(
+            os.path.join(tmp, "default.db"), os.path.join(tmp, "shards"), max_open=max(tenants, 1)
+        )
+        try:
+            rate = await run_writes(client, tenants, writes, writers)
+        finally:
+            await client.close()
+    print(f"{tenants:>8} {rate:>14.0f}")
+    return rate
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=4000)
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--tenants", default="1,2,4,8", help="Comma-separated tenant counts")
+    args = parser.parse_args()
+
+    tenant_counts = [int(t) for t in args.tenants.split(",")]
+    print(f"{args.writes} inserts from {args.writers} concurrent writers")
+    print(f"{'tenants':>8} {'writes/sec':>14}")
+    rates = [await bench(t, args.writes, args.writers) for t in tenant_counts]
+    print(f"scaling {tenant_counts[0]} -> {tenant_counts[-1]} tenants: {rates[-1] / rates[0]:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
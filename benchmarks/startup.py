@@ -0,0 +1,122 @@
+"""
+Time-to-first-tool-response for the two server entry points.
+
+Each sample starts a fresh interpreter that imports the entry point,
+runs its lifespan startup and answers one list_expenses call:
+``main.py`` through an in-memory FastMCP client and
+``src/http_server.py`` through ``/call_tool`` on an in-process ASGI
+client. Times are measured from just before the process is spawned, so
+interpreter startup is included.
+
+"cold" starts against an empty directory (migrations run); "warm"
+restarts against the database and schema stamp left by the previous
+start, which is the scale-from-zero case on a reused instance.
+
+Usage:
+    python -m benchmarks.startup [--repeat 5] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LIST_ARGS = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+
+MAIN_CHILD = f"""
+import asyncio, json, os, time
+t0 = float(os.environ["STARTUP_T0"])
+import main
+imported = time.time()
+from fastmcp import Client
+
+async def first_call():
+    async with Client(main.mcp) as client:
+        await client.call_tool("list_expenses", {LIST_ARGS!r})
+
+asyncio.run(first_call())
+print(json.dumps({{"import_s": imported - t0, "first_response_s": time.time() - t0}}))
+"""
+
+HTTP_CHILD = f"""
+import asyncio, json, os, time
+t0 = float(os.environ["STARTUP_T0"])
+from src.http_server import app
+imported = time.time()
+import httpx
+
+async def first_call():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.post("/call_tool", json={{"name": "list_expenses", "arguments": {LIST_ARGS!r}}})
+            assert response.json()["success"], response.text
+
+asyncio.run(first_call())
+print(json.dumps({{"import_s": imported - t0, "first_response_s": time.time() - t0}}))
+"""
+
+ENTRY_POINTS = {"main.py": MAIN_CHILD, "http_server": HTTP_CHILD}
+
+
+def sample(code: str, workdir: str) -> dict:
+    env = dict(os.environ)
+    # main.py keeps its database in the temp directory; the package reads DATABASE_PATH
+    env["TMPDIR"] = workdir
+    env["DATABASE_PATH"] = os.path.join(workdir, "expenses.db")
+    env["PYTHONPATH"] = ROOT
+    env["STARTUP_T0"] = repr(time.time())
+    completed = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip() or completed.stdout.strip())
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples: list) -> dict:
+    first = [s["first_response_s"] * 1000 for s in samples]
+    imports = [s["import_s"] * 1000 for s in samples]
+    return {
+        "samples": len(samples),
+        "first_response_ms_median": round(statistics.median(first), 1),
+        "first_response_ms_min": round(min(first), 1),
+        "import_ms_median": round(statistics.median(imports), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args()
+
+    report = {}
+    for name, code in ENTRY_POINTS.items():
+        cold, warm = [], []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as workdir:
+                cold.append(sample(code, workdir))
+                warm.append(sample(code, workdir))
+        report[name] = {"cold": summarize(cold), "warm": summarize(warm)}
+
+    print(f"{'entry point':<14} {'start':<5} {'first response ms':>18} {'min ms':>8} {'import ms':>10}")
+    for name, results in report.items():
+        for kind, stats in results.items():
+            print(f"{name:<14} {kind:<5} {stats['first_response_ms_median']:>18.1f} "
+                  f"{stats['first_response_ms_min']:>8.1f} {stats['import_ms_median']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Compare the original storage layout with the compact integer layout.
+
+Builds a database in the version 1 layout (REAL amounts, TEXT dates,
+TEXT primary key), copies it, migrates the copy to the latest schema and
+reports file size, page count, range-scan latency and whether SUM is
+exact in each layout.
+
+Usage:
+    python -m benchmarks.storage_layout [--rows 2000000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from src.database.codec import date_to_day
+from src.database.migrations import V1_SQL, run_migrations
+
+CATEGORIES = ["food", "transport", "housing", "utilities", "health", "shopping"]
+FIRST_DAY = date(2015, 1, 1)
+DAYS = 3650
+
+
+def build_legacy(path: str, rows: int, seed: int) -> Decimal:
+    """Create a version 1 database and return the exact total of all amounts"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(V1_SQL)
+    conn.execute("PRAGMA user_version = 1")
+    exact_total = Decimal(0)
+    batch = 50000
+    for offset in range(0, rows, batch):
+        chunk = []
+        for _ in range(min(batch, rows - offset)):
+            cents = rng.randrange(1, 50000)
+            exact_total += Decimal(cents) / 100
+            chunk.append((
+                (FIRST_DAY + timedelta(days=rng.randrange(DAYS))).isoformat(),
+                cents / 100,
+                rng.choice(CATEGORIES),
+            ))
+        conn.executemany("INSERT INTO expenses (date, amount, category) VALUES (?, ?, ?)", chunk)
+        conn.commit()
+    conn.close()
+    return exact_total
+
+
+def measure(path: str, compact: bool, repeat: int) -> dict:
+    conn = sqlite3.connect(path)
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+
+    start, end = "2023-10-01", "2023-12-31"
+    if compact:
+        range_sql = "SELECT SUM(amount_cents), COUNT(*) FROM expenses WHERE day BETWEEN ? AND ?"
+        range_params = (date_to_day(start), date_to_day(end))
+        rows_sql = "SELECT id, day, amount_cents, category FROM expenses WHERE day BETWEEN ? AND ? ORDER BY day"
+        total_sql = "SELECT SUM(amount_cents) FROM expenses"
+    else:
+        range_sql = "SELECT SUM(amount), COUNT(*) FROM expenses WHERE date BETWEEN ? AND ?"
+        range_params = (start, end)
+        rows_sql = "SELECT id, date, amount, category FROM expenses WHERE date BETWEEN ? AND ? ORDER BY date"
+        total_sql = "SELECT SUM(amount) FROM expenses"
+
+    def timed(sql, params=()):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = conn.execute(sql, params).fetchall()
+        return (time.perf_counter() - started) / repeat * 1000, result
+
+    range_ms, _ = timed(range_sql, range_params)
+    rows_ms, _ = timed(rows_sql, range_params)
+    full_ms, total = timed(total_sql)
+    conn.close()
+
+    total = total[0][0]
+    return {
+        "size_mb": os.path.getsize(path) / 1e6,
+        "pages": page_count,
+        "page_size": page_size,
+        "range_sum_ms": range_ms,
+        "range_rows_ms": rows_ms,
+        "full_sum_ms": full_ms,
+        "total": Decimal(total) / 100 if compact else Decimal(repr(total)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        compact_path = os.path.join(tmp, "compact.db")
+
+        print(f"building {args.rows} rows in the original layout...")
+        exact_total = build_legacy(legacy_path, args.rows, args.seed)
+        shutil.copy(legacy_path, compact_path)
+
+        started = time.perf_counter()
+        run_migrations(compact_path)
+        migrate_s = time.perf_counter() - started
+        # Reclaim the pages of the dropped legacy table before measuring size
+        conn = sqlite3.connect(compact_path)
+        conn.execute("VACUUM")
+        conn.close()
+        print(f"migration took {migrate_s:.1f}s")
+
+        results = {
+            "original": measure(legacy_path, False, args.repeat),
+            "compact": measure(compact_path, True, args.repeat),
+        }
+
+    print(f"{'layout':<10} {'size MB':>9} {'pages':>9} {'3mo sum ms':>11} {'3mo rows ms':>12} {'full sum ms':>12}  exact sum")
+    for name, r in results.items():
+        exact = "yes" if r["total"] == exact_total else f"no ({r['total']} vs {exact_total})"
+        print(
+            f"{name:<10} {r['size_mb']:>9.1f} {r['pages']:>9} {r['range_sum_ms']:>11.2f} "
+            f"{r['range_rows_ms']:>12.2f} {r['full_sum_ms']:>12.2f}  {exact}"
+        )
+    print("(the compact database also holds the summary rollup tables)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Latency and throughput of every expense tool.
+
+Micro-benchmarks call the registered MCP tool functions directly;
+macro-benchmarks go through the FastAPI ``/call_tool`` route using an
+in-process ASGI client, so they include request parsing and JSON
+encoding but no network. Tools the route does not serve are skipped in
+macro mode. Each benchmark reports throughput and p50/p95/p99 latency,
+and the whole run is written as JSON so that runs on different commits
+can be compared with ``--compare``.
+
+The data set comes from ``benchmarks.datagen``. Pass ``--source`` to
+benchmark a pre-built file (for the 1M and 10M row cases); it is copied
+first so the writes made here never change it. The result cache is off
+unless ``--cache`` is given, so read latencies reflect the queries.
+
+Usage:
+    python -m benchmarks.tools [--rows 10000] [--iterations 500] [--concurrency 1]
+                               [--source FILE] [--mode micro|macro|both]
+                               [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+TOOLS = ["add_expense", "list_expenses", "summarize_expenses", "update_expense", "delete_expense"]
+
+Call = Tuple[str, Dict[str, Any]]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize_latencies(latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "ops": len(ordered),
+        "seconds": round(elapsed, 4),
+        "throughput_ops_s": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4) if ordered else 0.0,
+    }
+
+
+class Workload:
+    """Deterministic tool arguments drawn from the generated data"""
+
+    def __init__(self, seed: int, expense_ids: List[str]):
+        from benchmarks.datagen import DAYS, FIRST_DAY, ExpenseGenerator
+        from src.database.codec import day_to_date
+
+        self.day_to_date = day_to_date
+        self.rng = random.Random(seed)
+        self.generator = ExpenseGenerator(seed + 1)
+        self.first_day = FIRST_DAY
+        self.days = DAYS
+        self.ids = expense_ids
+        self.rng.shuffle(self.ids)
+
+    def _day(self, offset: int) -> str:
+        return (self.first_day + timedelta(days=offset)).isoformat()
+
+    def add_expense(self) -> Dict[str, Any]:
+        _, day, amount_cents, category, subcategory, note = self.generator.row()
+        return {
+            "date": self.day_to_date(day),
+            "amount": amount_cents / 100,
+            "category": category,
+            "subcategory": subcategory,
+            "note": note,
+        }
+
+    def list_expenses(self) -> Dict[str, Any]:
+        start = self.rng.randrange(self.days - 31)
+        args = {"start_date": self._day(start), "end_date": self._day(start + 30), "limit": 100}
+        if self.rng.random() < 0.3:
+            args["category"] = self.rng.choice(self.generator.categories)
+        return args
+
+    def summarize_expenses(self) -> Dict[str, Any]:
+        span = self.rng.choice([30, 90, 365])
+        start = self.rng.randrange(self.days - span)
+        return {
+            "start_date": self._day(start),
+            "end_date": self._day(start + span),
+            "by_subcategory": self.rng.random() < 0.5,
+        }
+
+    def update_expense(self) -> Dict[str, Any]:
+        args = {"expense_id": self.ids.pop(), "amount": round(self.rng.uniform(1, 500), 2)}
+        if self.rng.random() < 0.2:
+            args["date"] = self._day(self.rng.randrange(self.days))
+        return args
+
+    def delete_expense(self) -> Dict[str, Any]:
+        return {"expense_id": self.ids.pop()}
+
+    def calls(self, tool: str, count: int) -> List[Call]:
+        make = getattr(self, tool)
+        return [(tool, make()) for _ in range(count)]
+
+
+async def run_calls(
+    calls: List[Call],
+    invoke: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+    concurrency: int
+) -> Dict[str, Any]:
+    """Run calls with ``concurrency`` workers and collect per-call latencies"""
+    queue = list(reversed(calls))
+    latencies: List[float] = []
+    failures = 0
+
+    async def worker():
+        nonlocal failures
+        while queue:
+            name, args = queue.pop()
+            started = time.perf_counter()
+            ok = await invoke(name, args)
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize_latencies(latencies, time.perf_counter() - started)
+    result["failures"] = failures
+    return result
+
+
+def _ok(result: Any) -> bool:
+    return not (isinstance(result, dict) and result.get("status") == "error")
+
+
+async def micro_benchmarks(workload: Workload, iterations: int, concurrency: int) -> Dict[str, Any]:
+    from fastmcp import FastMCP
+    from src.tools.expense_tools import register_expense_tools
+
+    mcp = FastMCP("ExpenseTrackerBenchmark")
+    register_expense_tools(mcp)
+    functions = {name: (await mcp.get_tool(name)).fn for name in TOOLS}
+
+    async def invoke(name: str, args: Dict[str, Any]) -> bool:
+        return _ok(await functions[name](**args))
+
+    results = {}
+    for tool in TOOLS:
+        # One untimed call warms the connection pool and page cache
+        await invoke(*workload.calls(tool, 1)[0])
+        results[tool] = await run_calls(workload.calls(tool, iterations), invoke, concurrency)
+    return results
+
+
+async def macro_benchmarks(workload: Workload, iterations: int, concurrency: int) -> Dict[str, Any]:
+    import httpx
+    from src.http_server import app
+
+    results: Dict[str, Any] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            async def post(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+                response = await client.post("/call_tool", json={"name": name, "arguments": args})
+                return response.json()
+
+            async def invoke(name: str, args: Dict[str, Any]) -> bool:
+                body = await post(name, args)
+                return body.get("success", False) and _ok(body.get("result"))
+
+            for tool in TOOLS:
+                probe = await post(*workload.calls(tool, 1)[0])
+                if not probe.get("success") and "not found" in str(probe.get("error", "")):
+                    results[tool] = {"skipped": "not served by /call_tool"}
+                    continue
+                results[tool] = await run_calls(workload.calls(tool, iterations), invoke, concurrency)
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None):
+    print(f"rows={report['rows']} iterations={report['iterations']} "
+          f"concurrency={report['concurrency']} commit={report['commit']}")
+    header = f"{'benchmark':<28} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    if baseline:
+        header += f" {'p50 vs base':>12}"
+    print(header)
+    for mode in ("micro", "macro"):
+        for tool, stats in report["results"].get(mode, {}).items():
+            name = f"{mode}/{tool}"
+            if "skipped" in stats:
+                print(f"{name:<28} skipped ({stats['skipped']})")
+                continue
+            line = (f"{name:<28} {stats['throughput_ops_s']:>10.1f} {stats['p50_ms']:>9.3f} "
+                    f"{stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+            base = (baseline or {}).get("results", {}).get(mode, {}).get(tool, {})
+            if base.get("p50_ms"):
+                line += f" {stats['p50_ms'] / base['p50_ms']:>11.2f}x"
+            print(line)
+
+
+async def run(args, db_path: str) -> Dict[str, Any]:
+    from src.database.sqlite_client import db
+    from src.utils.result_cache import result_cache
+
+    result_cache.enabled = args.cache
+    await db.connect()
+    try:
+        # Separate id pools for micro and macro so deletes never collide
+        needed = (args.iterations + 1) * 2
+        rows = await db.fetch_all("SELECT id FROM expenses ORDER BY pk LIMIT ?", (needed * 2,))
+        ids = [row["id"] for row in rows]
+        micro_ids, macro_ids = ids[:len(ids) // 2], ids[len(ids) // 2:]
+        if len(macro_ids) < needed:
+            raise SystemExit(f"Need at least {needed * 2} rows for {args.iterations} iterations")
+    finally:
+        await db.close()
+
+    results: Dict[str, Any] = {}
+    if args.mode in ("micro", "both"):
+        await db.connect()
+        try:
+            results["micro"] = await micro_benchmarks(Workload(args.seed, micro_ids), args.iterations, args.concurrency)
+        finally:
+            await db.close()
+    if args.mode in ("macro", "both"):
+        results["macro"] = await macro_benchmarks(Workload(args.seed, macro_ids), args.iterations, args.concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", choices=["micro", "macro", "both"], default="both")
+    parser.add_argument("--source", help="Pre-built database to copy instead of generating one")
+    parser.add_argument("--cache", action="store_true", help="Leave the read-tool result cache on")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Earlier JSON report to compare p50 latency against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "expenses.db")
+    # The tools use the global client, which reads DATABASE_PATH when
+    # src.config.settings is first imported; set it before importing src
+    os.environ["DATABASE_PATH"] = db_path
+
+    from benchmarks.datagen import build_database
+
+    started = time.perf_counter()
+    if args.source:
+        shutil.copyfile(args.source, db_path)
+    rows = build_database(db_path, args.rows, args.seed)
+    print(f"Prepared {rows} rows in {time.perf_counter() - started:.1f}s")
+
+    try:
+        results = asyncio.run(run(args, db_path))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_revision(),
+        "python": platform.python_version(),
+        "rows": rows,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "cache": args.cache,
+        "results": results,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
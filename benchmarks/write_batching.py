@@ -0,0 +1,63 @@
+"""
+Compare write throughput with and without group commit.
+
+Usage:
+    python -m benchmarks.write_batching [--writes 2000] [--concurrency 50]
+
+The gap is widest with DB_SYNCHRONOUS=FULL, where every commit fsyncs.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from src.database.sqlite_client import SQLiteClient
+
+INSERT_SQL = """INSERT INTO expenses (day, amount_cents, category, subcategory, note)
+                VALUES (?, ?, ?, ?, ?)"""
+
+
+async def run_writes(client: SQLiteClient, writes: int, concurrency: int) -> float:
+    """Issue ``writes`` inserts from ``concurrency`` workers and return writes/sec"""
+    per_worker = writes // concurrency
+
+    async def worker(worker_id: int):
+        for i in range(per_worker):
+            await client.execute(
+                INSERT_SQL,
+                (19737, 1000 + i % 100, "food", "groceries", f"worker {worker_id}")
+            )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return (per_worker * concurrency) / elapsed
+
+
+async def bench(label: str, write_batching: bool, writes: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        client = SQLiteClient(os.path.join(tmp, "bench.db"), write_batching=write_batching)
+        client.init_schema()
+        try:
+            rate = await run_writes(client, writes, concurrency)
+        finally:
+            await client.close()
+    print(f"{label:<22} {rate:>10.0f} writes/sec")
+    return rate
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.writes} inserts from {args.concurrency} concurrent writers")
+    unbatched = await bench("commit per write", False, args.writes, args.concurrency)
+    batched = await bench("group commit", True, args.writes, args.concurrency)
+    print(f"speedup: {batched / unbatched:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -22,13 +22,15 @@ const MCP_TOOLS = [
     type: 'function',
     function: {
       name: 'list_expenses',
-      description: 'List expenses within a date range, optionally filtered by category',
+      description: 'List expenses within a date range, optionally filtered by category. Results are paginated; pass next_cursor back as cursor for the next page',
       parameters: {
         type: 'object',
         properties: {
           start_date: { type: 'string', description: 'Start date in YYYY-MM-DD format' },
           end_date: { type: 'string', description: 'End date in YYYY-MM-DD format' },
-          category: { type: 'string', description: 'Optional category filter' }
+          category: { type: 'string', description: 'Optional category filter' },
+          limit: { type: 'number', description: 'Optional page size (default 100, max 1000)' },
+          cursor: { type: 'string', description: 'Optional next_cursor from a previous page' }
         },
         required: ['start_date', 'end_date']
       }
@@ -95,6 +97,30 @@ export class MCPClient {
     }
   }
 
+  /**
+   * Call several MCP tools in one HTTP request.
+   * Reads run concurrently on the server; with atomic set, writes are
+   * committed all-or-nothing. Results come back in request order.
+   */
+  async callTools(
+    calls: { name: string; arguments: Record<string, any> }[],
+    atomic = false
+  ): Promise<{ success: boolean; rolled_back: boolean; results: any[] }> {
+    const response = await fetch(`${this.serverUrl}/call_tools`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ calls, atomic })
+    });
+
+    if (!response.ok) {
+      throw new Error(`MCP batch tool call failed: ${response.statusText}`);
+    }
+
+    return response.json();
+  }
+
   /**
    * Get OpenAI-compatible tool definitions
    */
@@ -1,8 +1,16 @@
+from contextlib import asynccontextmanager
 from datetime import date
 from fastmcp import FastMCP
 import os
-import aiosqlite  # Changed: sqlite3 → aiosqlite
 import tempfile
+from src.config.category_catalog import CategoryCatalog
+from src.config.settings import settings
+from src.database.codec import amount_to_cents, date_to_day, new_expense_id
+from src.database.rollups import build_rollup_summary_query
+from src.database.sqlite_client import SQLiteClient
+from src.utils.metrics import metrics
+from src.utils.middleware import ToolMetricsMiddleware
+from src.utils.pagination import clamp_limit, decode_cursor, encode_cursor
 # Use temporary directory which should be writable
 TEMP_DIR = tempfile.gettempdir()
 DB_PATH = os.path.join(TEMP_DIR, "expenses.db")
@@ -10,68 +18,79 @@ CATEGORIES_PATH = os.path.join(os.path.dirname(__file__), "categories.json")
 
 print(f"Database path: {DB_PATH}")
 
-mcp = FastMCP("ExpenseTracker")
+# Parsed once; re-read only when categories.json changes on disk
+catalog = CategoryCatalog(CATEGORIES_PATH)
 
-def init_db():  # Keep as sync for initialization
+# Long-lived connection pool shared by all tools
+db = SQLiteClient(DB_PATH)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Check the schema and open the connection pool on startup; close it on shutdown"""
     try:
-        # Use synchronous sqlite3 just for initialization
-        import sqlite3
-        with sqlite3.connect(DB_PATH) as c:
-            c.execute("PRAGMA journal_mode=WAL")
-            c.execute("""
-                CREATE TABLE IF NOT EXISTS expenses(
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    subcategory TEXT DEFAULT '',
-                    note TEXT DEFAULT ''
-                )
-            """)
-            # Test write access
-            c.execute("INSERT OR IGNORE INTO expenses(date, amount, category) VALUES ('2000-01-01', 0, 'test')")
-            c.execute("DELETE FROM expenses WHERE category = 'test'")
-            print("Database initialized successfully with write access")
+        # Same versioned migrations as the package server; upgrades the
+        # legacy INTEGER-id layout of this file in place. Runs here rather
+        # than at import so cold starts and imports stay fast, and is
+        # skipped entirely when the schema stamp is current.
+        version = await db.ensure_schema(check_write=True)
+        print(f"Database ready (schema v{version})")
     except Exception as e:
         print(f"Database initialization error: {e}")
         raise
+    await db.connect()
+    try:
+        yield
+    finally:
+        await db.close()
 
-# Initialize database synchronously at module load
-init_db()
+
+mcp = FastMCP("ExpenseTracker", lifespan=lifespan)
+mcp.add_middleware(ToolMetricsMiddleware())
 
 @mcp.tool()
 async def add_expense(date, amount, category, subcategory="", note=""):  # Changed: added async
     '''Add a new expense entry to the database.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
-            cur = await c.execute(  # Changed: added await
-                "INSERT INTO expenses(date, amount, category, subcategory, note) VALUES (?,?,?,?,?)",
-                (date, amount, category, subcategory, note)
-            )
-            expense_id = cur.lastrowid
-            await c.commit()  # Changed: added await
-            return {"status": "success", "id": expense_id, "message": "Expense added successfully"}
+        amount_cents = amount_to_cents(float(amount))
+        if amount_cents <= 0:
+            return {"status": "error", "message": "Amount must be greater than 0"}
+        if settings.category_validation:
+            category, subcategory = catalog.normalize(category, subcategory)
+        expense_id = new_expense_id()
+        await db.execute(
+            "INSERT INTO expenses(id, day, amount_cents, category, subcategory, note) VALUES (?,?,?,?,?,?)",
+            (expense_id, date_to_day(date), amount_cents, category, subcategory or "", note or "")
+        )
+        return {"status": "success", "id": expense_id, "message": "Expense added successfully"}
     except Exception as e:  # Changed: simplified exception handling
         if "readonly" in str(e).lower():
             return {"status": "error", "message": "Database is in read-only mode. Check file permissions."}
-        return {"status": "error", "message": f"Database error: {str(e)}"}
+        return {"status": "error", "message": str(e)}
     
 @mcp.tool()
-async def list_expenses(start_date, end_date):  # Changed: added async
-    '''List expense entries within an inclusive date range.'''
+async def list_expenses(start_date, end_date, limit=None, cursor=None):  # Changed: added async
+    '''List expense entries within an inclusive date range, newest first.
+
+    Results are paginated; pass the returned next_cursor back as cursor
+    to fetch the following page.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
-            cur = await c.execute(  # Changed: added await
-                """
-                SELECT id, date, amount, category, subcategory, note
-                FROM expenses
-                WHERE date BETWEEN ? AND ?
-                ORDER BY date DESC, id DESC
-                """,
-                (start_date, end_date)
-            )
-            cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, r)) for r in await cur.fetchall()]  # Changed: added await
+        # Deferred: pulls in the package tool modules, which this entry point otherwise skips
+        from src.tools.expense_tools import build_list_query
+
+        limit = clamp_limit(limit, settings.list_default_limit, settings.list_max_limit)
+        after = decode_cursor(cursor, 3) if cursor else None
+        query, params = build_list_query(start_date, end_date, after=after, limit=limit + 1, include_key=True)
+
+        rows = await db.fetch_all(query, params)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([date_to_day(last["date"]), last["created_at"], last["pk"]])
+        for row in rows:
+            del row["pk"]
+        return {"expenses": rows, "count": len(rows), "limit": limit, "next_cursor": next_cursor}
     except Exception as e:
         return {"status": "error", "message": f"Error listing expenses: {str(e)}"}
 
@@ -79,90 +98,81 @@ async def list_expenses(start_date, end_date):  # Changed: added async
 async def summarize(start_date, end_date, category=None):  # Changed: added async
     '''Summarize expenses by category within an inclusive date range.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
-            query = """
-                SELECT category, SUM(amount) AS total_amount, COUNT(*) as count
-                FROM expenses
-                WHERE date BETWEEN ? AND ?
-            """
-            params = [start_date, end_date]
-
-            if category:
-                query += " AND category = ?"
-                params.append(category)
-
-            query += " GROUP BY category ORDER BY total_amount DESC"
-
-            cur = await c.execute(query, params)  # Changed: added await
-            cols = [d[0] for d in cur.description]
-            return [dict(zip(cols, r)) for r in await cur.fetchall()]  # Changed: added await
+        query, params = build_rollup_summary_query(start_date, end_date, category)
+        return await db.fetch_all(query, params)
     except Exception as e:
         return {"status": "error", "message": f"Error summarizing expenses: {str(e)}"}
 
 @mcp.resource("expense:///categories", mime_type="application/json")  # Changed: expense:// → expense:///
 def categories():
     try:
-        # Provide default categories if file doesn't exist
-        default_categories = {
-            "categories": [
-                "Food & Dining",
-                "Transportation",
-                "Shopping",
-                "Entertainment",
-                "Bills & Utilities",
-                "Healthcare",
-                "Travel",
-                "Education",
-                "Business",
-                "Other"
-            ]
-        }
-        
-        try:
-            with open(CATEGORIES_PATH, "r", encoding="utf-8") as f:
-                return f.read()
-        except FileNotFoundError:
-            import json
-            return json.dumps(default_categories, indent=2)
+        return catalog.text
     except Exception as e:
         return f'{{"error": "Could not load categories: {str(e)}"}}'
 
+@mcp.resource("expense:///metrics", mime_type="text/plain")
+def metrics_resource():
+    return metrics.render()
+
 # mcp tool to edit an expense
 @mcp.tool()
 async def edit_expense(expense_id, start_date=None,end_date=None, amount=None, category=None, subcategory=None, note=None):  # Changed: added async
     '''Edit an existing expense entry in the database.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
-            fields = []
-            params = []
-
-            if start_date is not None:
-                fields.append("date = ?")
-                params.append(start_date)
-            if end_date is not None:
-                fields.append("date = ?")
-                params.append(end_date)
-            if amount is not None:
-                fields.append("amount = ?")
-                params.append(amount)
+        if amount is not None and amount_to_cents(float(amount)) <= 0:
+            return {"status": "error", "message": "Amount must be greater than 0"}
+        if settings.category_validation and (category is not None or subcategory is not None):
+            row = await db.fetch_one("SELECT category, subcategory FROM expenses WHERE id = ?", (str(expense_id),))
+            if row is None:
+                return {"status": "error", "message": f"Expense {expense_id} not found"}
+            # A new category must still fit the stored subcategory
+            keep_subcategory = subcategory is None
+            try:
+                new_category, new_subcategory = catalog.normalize(
+                    category if category is not None else row["category"],
+                    row["subcategory"] if keep_subcategory else subcategory
+                )
+            except ValueError as e:
+                message = f"Error updating expense: {str(e)}"
+                if keep_subcategory and row["subcategory"]:
+                    message += (f" (the expense's subcategory '{row['subcategory']}' must fit the new "
+                                "category; pass subcategory, or \"\" to clear it)")
+                return {"status": "error", "message": message}
             if category is not None:
-                fields.append("category = ?")
-                params.append(category)
-            if subcategory is not None:
-                fields.append("subcategory = ?")
-                params.append(subcategory)
-            if note is not None:
-                fields.append("note = ?")
-                params.append(note)
-
-            if not fields:
-                return {"status": "error", "message": "No fields to update"}
-
-            params.append(expense_id)
-            query = f"UPDATE expenses SET {', '.join(fields)} WHERE id = ?"
-            await c.execute(query, params)  # Changed: added await
-            await c.commit()  # Changed: added await
-            return {"status": "success", "message": "Expense updated successfully"}
+                category = new_category
+            if not keep_subcategory or new_subcategory != row["subcategory"]:
+                subcategory = new_subcategory
+
+        fields = []
+        params = []
+
+        if start_date is not None:
+            fields.append("day = ?")
+            params.append(date_to_day(start_date))
+        if end_date is not None:
+            fields.append("day = ?")
+            params.append(date_to_day(end_date))
+        if amount is not None:
+            fields.append("amount_cents = ?")
+            params.append(amount_to_cents(float(amount)))
+        if category is not None:
+            fields.append("category = ?")
+            params.append(category)
+        if subcategory is not None:
+            fields.append("subcategory = ?")
+            params.append(subcategory)
+        if note is not None:
+            fields.append("note = ?")
+            params.append(note)
+
+        if not fields:
+            return {"status": "error", "message": "No fields to update"}
+
+        fields.append("updated_at = datetime('now')")
+        params.append(str(expense_id))
+        query = f"UPDATE expenses SET {', '.join(fields)} WHERE id = ?"
+        await db.execute(query, tuple(params))
+        return {"status": "success", "message": "Expense updated successfully"}
     except Exception as e:
         return {"status": "error", "message": f"Error updating expense: {str(e)}"}
 
@@ -171,10 +181,8 @@ async def edit_expense(expense_id, start_date=None,end_date=None, amount=None, c
 async def delete_expense(expense_id):  # Changed: added async
     '''Delete an expense entry from the database.'''
     try:
-        async with aiosqlite.connect(DB_PATH) as c:  # Changed: added async
-            await c.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))  # Changed: added await
-            await c.commit()  # Changed: added await
-            return {"status": "success", "message": "Expense deleted successfully"}
+        await db.execute("DELETE FROM expenses WHERE id = ?", (str(expense_id),))
+        return {"status": "success", "message": "Expense deleted successfully"}
     except Exception as e:
         return {"status": "error", "message": f"Error deleting expense: {str(e)}"}
 
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from src.config.settings import settings
+
+
+DEFAULT_CATEGORIES_PATH = os.path.join(os.path.dirname(__file__), "categories.json")
+
+# Served when the categories file is missing
+DEFAULT_CATEGORIES = {
+    "food": ["groceries", "dining_out", "coffee_tea", "snacks", "other"],
+    "transport": ["fuel", "public_transport", "cab", "parking", "other"],
+    "housing": ["rent", "maintenance", "repairs", "other"],
+    "utilities": ["electricity", "water", "internet", "mobile", "other"],
+    "health": ["medicines", "doctor", "fitness", "other"],
+    "education": ["books", "courses", "other"],
+    "entertainment": ["movies", "streaming", "games", "other"],
+    "shopping": ["clothing", "electronics", "home_decor", "other"],
+    "business": ["software", "hosting", "marketing", "other"],
+    "misc": ["uncategorized", "other"]
+}
+
+
+class CategoryCatalog:
+    """Category/subcategory catalog loaded from a JSON file.
+
+    The file is parsed once and re-read only when its mtime changes
+    (checked at most every ``reload_interval`` seconds). The resource body
+    is kept pre-serialized together with its ETag, and lookups go through
+    hashed sets.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None):
+        self.path = path or settings.categories_path or DEFAULT_CATEGORIES_PATH
+        self.reload_interval = settings.category_reload_interval_seconds if reload_interval is None else reload_interval
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._subcategories: Dict[str, FrozenSet[str]] = {}
+        self._body = b""
+        self._text = ""
+        self._etag = ""
+        self._loaded = False
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            mtime = None
+
+        if self._loaded and mtime == self._mtime:
+            return
+
+        if mtime is None:
+            data = DEFAULT_CATEGORIES
+            body = json.dumps(DEFAULT_CATEGORIES, indent=2).encode("utf-8")
+        else:
+            with open(self.path, "rb") as f:
+                body = f.read()
+            try:
+                data = json.loads(body)
+            except json.JSONDecodeError:
+                if self._loaded:
+                    # Keep serving the last good version while the file is being edited
+                    return
+                raise
+
+        self._subcategories = {
+            category.strip().lower(): frozenset(s.strip().lower() for s in subcategories)
+            for category, subcategories in data.items()
+        }
+        self._body = body
+        self._text = body.decode("utf-8")
+        self._etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self._mtime = mtime
+        self._loaded = True
+
+    def _refresh(self):
+        now = time.monotonic()
+        if not self._loaded or now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            self._load()
+
+    @property
+    def body(self) -> bytes:
+        """Serialized catalog, exactly as stored on disk"""
+        self._refresh()
+        return self._body
+
+    @property
+    def text(self) -> str:
+        self._refresh()
+        return self._text
+
+    @property
+    def etag(self) -> str:
+        self._refresh()
+        return self._etag
+
+    def categories(self) -> Dict[str, FrozenSet[str]]:
+        self._refresh()
+        return self._subcategories
+
+    def normalize(self, category: str, subcategory: Optional[str] = "") -> Tuple[str, str]:
+        """Return the canonical (category, subcategory) pair.
+
+        Matching ignores case and surrounding whitespace. An empty
+        subcategory is always accepted. Raises ValueError if either value
+        is not in the catalog.
+        """
+        subcategories = self.categories()
+        category_key = (category or "").strip().lower()
+        subcategory_key = (subcategory or "").strip().lower()
+
+        allowed = subcategories.get(category_key)
+        if allowed is None:
+            raise ValueError(
+                f"Unknown category '{category}'. Valid categories: {', '.join(sorted(subcategories))}"
+            )
+        if subcategory_key and subcategory_key not in allowed:
+            raise ValueError(
+                f"Unknown subcategory '{subcategory}' for category '{category_key}'. "
+                f"Valid subcategories: {', '.join(sorted(allowed))}"
+            )
+        return category_key, subcategory_key
+
+
+# Global category catalog instance
+category_catalog = CategoryCatalog()
@@ -9,6 +9,78 @@ class Settings(BaseSettings):
     # SQLite Database Configuration
     database_path: str = "expenses.db"
 
+    # SQLite Connection Pool
+    db_reader_pool_size: int = 4  # Read-only connections shared by read queries
+    db_journal_mode: str = "WAL"
+    db_synchronous: str = "NORMAL"
+    db_mmap_size: int = 268435456  # 256 MiB
+    db_cache_size: int = -65536  # Negative means KiB, i.e. 64 MiB per connection
+    db_busy_timeout_ms: int = 5000
+
+    # Group commit for writes
+    db_write_batching: bool = True
+    db_write_batch_max_size: int = 64
+    db_write_batch_max_delay_ms: float = 2.0
+
+    # Bulk import
+    import_chunk_size: int = 1000  # Rows validated and committed per transaction
+    import_max_errors: int = 100  # Per-row errors reported back to the caller
+
+    # Listing
+    list_default_limit: int = 100
+    list_max_limit: int = 1000
+    stream_fetch_size: int = 500  # Rows fetched per round trip when streaming
+
+    # Export
+    export_directory: Optional[str] = None  # Defaults to an "exports" directory next to database_path
+
+    # Change log and analytics snapshots
+    change_log_max_rows: int = 200000  # Change log rows kept per database
+
+    # Change feed (SSE and MCP resource notifications)
+    change_feed_poll_seconds: float = 2.0  # Also picks up writes made by other processes
+    change_feed_batch_size: int = 500  # Changes read from the log per round trip
+    change_feed_queue_size: int = 64  # Batches buffered per subscriber before it re-reads the log
+    change_feed_heartbeat_seconds: float = 15.0  # SSE keep-alive comment interval
+
+    # Background report jobs (submit_report / get_report)
+    job_workers: int = 2  # Worker processes; caps how many reports run at once
+    job_max_pending: int = 8  # Queued or running reports per organization
+    job_result_ttl_seconds: float = 600.0  # Finished reports are kept (and reused) this long
+    job_max_wait_seconds: float = 30.0  # Longest get_report wait_seconds
+
+    # Hot/cold partitioning
+    partition_hot_years: int = 2  # Calendar years kept in the main table (current one included); 0 disables archiving
+    partition_compact_interval_seconds: float = 86400.0  # Background compaction period; 0 disables the job
+
+    # Per-organization shards
+    shard_directory: Optional[str] = None  # Defaults to a "shards" directory next to database_path
+    shard_max_open: int = 32  # Organization databases kept open at once
+    shard_idle_seconds: float = 300.0  # Close a shard after this long without calls
+    admin_token: Optional[str] = None  # X-Admin-Token value for cross-organization and maintenance calls; unset disables them
+
+    # Read-tool result cache
+    result_cache_enabled: bool = True
+    result_cache_max_bytes: int = 33554432  # 32 MiB of serialized results
+    result_cache_ttl_seconds: float = 300.0
+
+    # Category Catalog
+    categories_path: Optional[str] = None  # Defaults to src/config/categories.json
+    category_reload_interval_seconds: float = 1.0  # How often the file's mtime is checked
+    category_validation: bool = True  # Reject categories/subcategories not in the catalog
+
+    # HTTP batch calls
+    call_tools_max_calls: int = 100  # Largest batch accepted by POST /call_tools
+
+    # HTTP response compression
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024  # Smaller complete responses are sent uncompressed
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4  # Used when the brotli package is installed
+
+    # Metrics
+    metrics_enabled: bool = True  # Record tool/query latency for /metrics
+
     # Server Configuration
     mcp_server_host: str = "0.0.0.0"
     mcp_server_port: int = 3001
@@ -0,0 +1,90 @@
+"""
+Monthly budgets per category, checked against the rollup counters.
+
+``expense_budgets`` (migration 8) holds one standing monthly limit per
+category. How much has been spent is never summed from ``expenses``: the
+rollup triggers already keep ``expense_monthly_totals`` current inside
+the same transaction as every insert, update and delete (and compaction
+leaves it untouched), so spending for a (month, category) is a primary
+key lookup over that category's few subcategory rows, whatever the
+number of expenses.
+"""
+import calendar
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from src.database.codec import cents_to_amount
+
+# Spending of one budgeted category in one month; the outer WHERE picks the budget(s)
+BUDGET_STATUS_SQL = """
+    SELECT b.category, b.limit_cents, b.alert_ratio,
+           COALESCE((
+               SELECT SUM(m.total_cents) FROM expense_monthly_totals m
+               WHERE m.month = ? AND m.category = b.category
+           ), 0) AS spent_cents
+    FROM expense_budgets b
+"""
+
+UPSERT_BUDGET_SQL = """
+    INSERT INTO expense_budgets (category, limit_cents, alert_ratio) VALUES (?, ?, ?)
+    ON CONFLICT (category) DO UPDATE SET
+        limit_cents = excluded.limit_cents,
+        alert_ratio = excluded.alert_ratio,
+        updated_at = datetime('now')
+"""
+
+DELETE_BUDGET_SQL = "DELETE FROM expense_budgets WHERE category = ?"
+
+SPENT_SQL = "SELECT COALESCE(SUM(total_cents), 0) AS spent_cents FROM expense_monthly_totals WHERE month = ? AND category = ?"
+
+
+def parse_month(month: Optional[str]) -> int:
+    """Month key (YYYYMM) for a YYYY-MM string, or the current month.
+
+    Raises ValueError for anything else.
+    """
+    if not month:
+        today = date.today()
+        return today.year * 100 + today.month
+    try:
+        parsed = date.fromisoformat(f"{month}-01")
+    except (TypeError, ValueError):
+        raise ValueError(f"Month must be in YYYY-MM format, got {month!r}")
+    return parsed.year * 100 + parsed.month
+
+
+def month_end(month: int) -> str:
+    """Last day (YYYY-MM-DD) of a month key"""
+    year, month = divmod(month, 100)
+    return date(year, month, calendar.monthrange(year, month)[1]).isoformat()
+
+
+def budget_status(row: Dict[str, Any], month: int) -> Dict[str, Any]:
+    """Public shape of a BUDGET_STATUS_SQL row"""
+    limit, spent = row["limit_cents"], row["spent_cents"]
+    if spent > limit:
+        state = "over"
+    elif spent >= limit * row["alert_ratio"]:
+        state = "warning"
+    else:
+        state = "ok"
+    return {
+        "category": row["category"],
+        "month": f"{month // 100:04d}-{month % 100:02d}",
+        "limit": cents_to_amount(limit),
+        "spent": cents_to_amount(spent),
+        "remaining": cents_to_amount(limit - spent),
+        "percent_used": round(spent / limit * 100, 1),
+        "alert_ratio": row["alert_ratio"],
+        "state": state,
+        "over_budget": spent > limit,
+    }
+
+
+async def fetch_budget_status(client, month: int, category: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Status of every budget (or the one for ``category``) in ``month``"""
+    if category is None:
+        rows = await client.fetch_all(BUDGET_STATUS_SQL + " ORDER BY b.category", (month,))
+    else:
+        rows = await client.fetch_all(BUDGET_STATUS_SQL + " WHERE b.category = ?", (month, category))
+    return [budget_status(row, month) for row in rows]
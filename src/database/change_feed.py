@@ -0,0 +1,316 @@
+"""
+Change feed: row-level deltas from the change log, pushed to subscribers.
+
+Every write to ``expenses`` adds a row to ``expense_changes`` (migration
+5) with a monotonically increasing ``seq``. ``read_changes`` turns the
+entries after a given seq into deltas carrying the row's current state,
+so a client that remembers the last seq it saw can resume from there
+after reconnecting.
+
+``ChangeBroadcaster`` keeps one pump task per organization with
+subscribers. The pump wakes when the database client reports a write
+(and every ``poll_seconds``, to pick up writes from other processes),
+reads the new entries once and hands the batch to every subscriber's
+queue. A subscriber first catches up from the log on its own, then
+follows the pump; one that falls ``queue_size`` batches behind drops its
+queue and catches up from the log again, so a slow client never holds
+back the others or grows memory.
+
+``ChangeLogPruner`` keeps the log to about ``change_log_max_rows``
+entries per organization from the write path. A subscriber resuming from
+a seq older than the oldest kept entry gets a ``reset`` batch instead of
+deltas and should reload before continuing from its ``last_seq``.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from src.config.settings import settings
+from src.database.codec import EXPENSE_COLUMNS_SQL
+from src.database.partitions import expense_tables
+from src.database.sqlite_client import db
+from src.utils.metrics import metrics
+from src.utils.tenancy import current_org, org_scope
+
+FEED_SQL = """
+    SELECT seq, pk, expense_id, op, changed_at
+    FROM expense_changes
+    WHERE seq > ?
+    ORDER BY seq
+    LIMIT ?
+"""
+
+OLDEST_SEQ_SQL = "SELECT MIN(seq) AS seq FROM expense_changes"
+
+LOG_BOUNDS_SQL = "SELECT MIN(seq) AS oldest, MAX(seq) AS newest FROM expense_changes"
+
+PRUNE_SQL = "DELETE FROM expense_changes WHERE seq <= ?"
+
+# Writes between checks of an organization's change log length
+PRUNE_CHECK_WRITES = 100
+
+# SQLite's default limit on host parameters is 32766; stay well below it
+PK_CHUNK = 900
+
+# Queued in place of a batch when a subscriber falls too far behind
+_OVERFLOW = object()
+
+
+async def read_changes(after: int, limit: int) -> Dict[str, Any]:
+    """Deltas for the current organization's changes after seq ``after``.
+
+    Inserts and updates carry the expense as it is now (so several changes
+    to one row in a batch all show its latest state), or None if it has
+    since been deleted; deletes carry only the id.
+    """
+    if after > 0:
+        oldest = (await db.fetch_one(OLDEST_SEQ_SQL))["seq"]
+        if oldest is not None and oldest > after + 1:
+            return {"reset": True, "changes": [], "last_seq": await db.change_seq()}
+
+    entries = await db.fetch_all(FEED_SQL, (after, limit))
+    pks = sorted({entry["pk"] for entry in entries if entry["op"] != "delete"})
+    rows: Dict[int, Dict[str, Any]] = {}
+    if pks:
+        # Rows changed before they were archived are found in the archive
+        for table in expense_tables(await db.partitions()):
+            for i in range(0, len(pks), PK_CHUNK):
+                chunk = pks[i:i + PK_CHUNK]
+                for row in await db.fetch_all(
+                    f"SELECT pk, {EXPENSE_COLUMNS_SQL} FROM {table} WHERE pk IN ({', '.join('?' * len(chunk))})",
+                    tuple(chunk)
+                ):
+                    rows[row.pop("pk")] = row
+
+    changes = []
+    for entry in entries:
+        expense = None
+        if entry["op"] != "delete":
+            expense = rows.get(entry["pk"])
+            # The pk may have been reused by a newer expense since
+            if expense is not None and expense["id"] != entry["expense_id"]:
+                expense = None
+        changes.append({
+            "seq": entry["seq"],
+            "op": entry["op"],
+            "id": entry["expense_id"],
+            "changed_at": entry["changed_at"],
+            "expense": expense,
+        })
+    return {
+        "reset": False,
+        "changes": changes,
+        "last_seq": changes[-1]["seq"] if changes else after,
+    }
+
+
+class _Subscription:
+    __slots__ = ("queue",)
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+
+    def deliver(self, batch: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            # Too far behind: drop the backlog, the subscriber re-reads the log
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_OVERFLOW)
+
+
+class _Channel:
+    """Subscribers and the pump of one organization"""
+
+    def __init__(self):
+        self.subscribers: Set[_Subscription] = set()
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class ChangeBroadcaster:
+    """Fans each organization's new changes out to its subscribers"""
+
+    def __init__(self, poll_seconds: float, batch_size: int, queue_size: int):
+        self.poll_seconds = poll_seconds
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self._channels: Dict[str, _Channel] = {}
+        self.batches = 0
+
+    def notify(self, org: Optional[str] = None):
+        """Wake the organization's pump; called after every write"""
+        channel = self._channels.get(org or current_org())
+        if channel is not None:
+            channel.wakeup.set()
+
+    def subscribe(self, after: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Batches of the current organization's changes after seq ``after``.
+
+        With ``after`` None, only changes made from now on are delivered.
+        Each batch is a ``read_changes`` result; the iterator never ends on
+        its own, so close it when the client goes away.
+        """
+        return self._follow(current_org(), after)
+
+    async def _follow(self, org: str, after: Optional[int]) -> AsyncIterator[Dict[str, Any]]:
+        with org_scope(org):
+            current = await db.change_seq()
+        if after is None:
+            after = current
+
+        # Registered before catching up, and a new pump starts from a seq
+        # read before that, so nothing is missed between the catch-up reads
+        # and the pump's batches; duplicates are skipped by seq
+        subscription = _Subscription(self.queue_size)
+        channel = self._channels.get(org)
+        if channel is None:
+            channel = self._channels[org] = _Channel()
+        channel.subscribers.add(subscription)
+        if channel.task is None or channel.task.done():
+            channel.task = asyncio.create_task(self._pump(org, channel, current))
+        try:
+            while True:
+                while True:
+                    with org_scope(org):
+                        batch = await read_changes(after, self.batch_size)
+                    if batch["reset"] or batch["changes"]:
+                        after = batch["last_seq"]
+                        yield batch
+                    if batch["reset"] or len(batch["changes"]) < self.batch_size:
+                        break
+
+                while True:
+                    batch = await subscription.queue.get()
+                    if batch is _OVERFLOW:
+                        break
+                    if batch["reset"]:
+                        # The pump skipped ahead; catch up (or reset) from the log
+                        break
+                    changes = [change for change in batch["changes"] if change["seq"] > after]
+                    if changes:
+                        after = changes[-1]["seq"]
+                        yield {"reset": False, "changes": changes, "last_seq": after}
+        finally:
+            channel.subscribers.discard(subscription)
+            if not channel.subscribers and channel.task is not None:
+                channel.task.cancel()
+                channel.task = None
+                if self._channels.get(org) is channel:
+                    del self._channels[org]
+
+    async def _pump(self, org: str, channel: _Channel, seq: int):
+        with org_scope(org):
+            while channel.subscribers:
+                try:
+                    await asyncio.wait_for(channel.wakeup.wait(), self.poll_seconds or None)
+                except asyncio.TimeoutError:
+                    pass
+                channel.wakeup.clear()
+                try:
+                    while True:
+                        batch = await read_changes(seq, self.batch_size)
+                        if not batch["reset"] and not batch["changes"]:
+                            break
+                        seq = batch["last_seq"]
+                        self.batches += 1
+                        for subscription in list(channel.subscribers):
+                            subscription.deliver(batch)
+                        if batch["reset"] or len(batch["changes"]) < self.batch_size:
+                            break
+                except Exception as e:
+                    print(f"✗ Change feed read failed for {org}: {e}")
+
+    async def close(self):
+        """Stop every pump (subscribers stop receiving new batches)"""
+        channels = list(self._channels.values())
+        self._channels.clear()
+        for channel in channels:
+            if channel.task is not None:
+                channel.task.cancel()
+                try:
+                    await channel.task
+                except asyncio.CancelledError:
+                    pass
+                channel.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "organizations": len(self._channels),
+            "subscribers": sum(len(channel.subscribers) for channel in self._channels.values()),
+            "batches": self.batches,
+        }
+
+
+class ChangeLogPruner:
+    """Keeps each organization's change log bounded as writes come in.
+
+    Every ``PRUNE_CHECK_WRITES`` writes it reads the log's bounds (two
+    index lookups on a reader) and, once more than a tenth of
+    ``max_rows`` entries are past the limit, deletes them in one range
+    delete. Consumers behind the pruned entries (snapshots, change feed
+    subscribers) reload instead of replaying them.
+    """
+
+    def __init__(self, max_rows: int, check_every: int = PRUNE_CHECK_WRITES):
+        self.max_rows = max(1, max_rows)
+        self.check_every = max(1, check_every)
+        self._writes: Dict[str, int] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.pruned = 0
+
+    def notify(self, org: Optional[str] = None):
+        """Count a write; called after every write"""
+        org = org or current_org()
+        writes = self._writes.get(org, 0) + 1
+        if writes < self.check_every or org in self._tasks:
+            self._writes[org] = writes
+            return
+        self._writes[org] = 0
+        task = asyncio.create_task(self._prune(org))
+        self._tasks[org] = task
+        task.add_done_callback(lambda _: self._tasks.pop(org, None))
+
+    async def _prune(self, org: str):
+        try:
+            with org_scope(org):
+                bounds = await db.fetch_one(LOG_BOUNDS_SQL)
+                if bounds["newest"] is None:
+                    return
+                cutoff = bounds["newest"] - self.max_rows
+                # Prune in steps of a tenth of the limit rather than on every check
+                if cutoff - bounds["oldest"] >= self.max_rows // 10:
+                    result = await db.execute(PRUNE_SQL, (cutoff,))
+                    self.pruned += result.rows_affected
+        except Exception as e:
+            print(f"✗ Change log prune failed for {org}: {e}")
+
+    async def close(self):
+        """Cancel prunes in progress"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Global change feed, woken by every write through the database client
+change_feed = ChangeBroadcaster(
+    poll_seconds=settings.change_feed_poll_seconds,
+    batch_size=settings.change_feed_batch_size,
+    queue_size=settings.change_feed_queue_size,
+)
+db.add_write_listener(change_feed.notify)
+
+# Global change log pruner, counting every write through the database client
+change_log_pruner = ChangeLogPruner(max_rows=settings.change_log_max_rows)
+db.add_write_listener(change_log_pruner.notify)
+
+metrics.gauge(
+    "expense_change_feed", "Change feed subscribers and delivered batches", ("stat",),
+    lambda: {(key,): value for key, value in change_feed.stats().items()}
+)
+
+metrics.gauge(
+    "expense_change_log_pruned", "Change log entries pruned since startup", (),
+    lambda: {(): change_log_pruner.pruned}
+)
@@ -0,0 +1,57 @@
+"""
+Conversions between the public expense representation and storage.
+
+Dates are stored as INTEGER day numbers (days since 1970-01-01) and
+amounts as INTEGER cents. The SQL fragments below decode them back to
+the public shape inside queries.
+"""
+import uuid
+from datetime import date
+from typing import Optional
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# SQL expressions decoding storage columns to their public form
+DATE_SQL = "date(day * 86400, 'unixepoch')"
+AMOUNT_SQL = "amount_cents / 100.0"
+
+# Public columns of an expense row, decoded from storage
+EXPENSE_COLUMNS_SQL = (
+    f"id, {DATE_SQL} AS date, {AMOUNT_SQL} AS amount, category, subcategory, note, created_at"
+)
+
+
+def date_to_day(value: str) -> int:
+    """Convert a YYYY-MM-DD string to a day number.
+
+    Raises ValueError for anything that is not an ISO calendar date.
+    """
+    try:
+        return date.fromisoformat(value).toordinal() - EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        raise ValueError(f"Date must be in YYYY-MM-DD format, got {value!r}")
+
+
+def day_to_date(day: int) -> str:
+    """Convert a day number back to a YYYY-MM-DD string"""
+    return date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+def day_to_month(day: int) -> int:
+    """Month key (YYYYMM) for a day number, matching the rollup tables"""
+    d = date.fromordinal(day + EPOCH_ORDINAL)
+    return d.year * 100 + d.month
+
+
+def amount_to_cents(amount: float) -> int:
+    """Convert an amount to integer cents"""
+    return int(round(amount * 100))
+
+
+def cents_to_amount(cents: Optional[int]) -> Optional[float]:
+    return None if cents is None else cents / 100
+
+
+def new_expense_id() -> str:
+    """Public expense id, same shape as the column default (32 hex chars)"""
+    return uuid.uuid4().hex
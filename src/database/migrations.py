@@ -0,0 +1,563 @@
+"""
+Versioned schema migrations.
+
+The schema version lives in ``PRAGMA user_version``. ``run_migrations``
+applies every migration newer than the stored version, each in its own
+transaction. Migrations are frozen once released: change the schema by
+appending a new one, never by editing an old one.
+
+``ensure_schema`` is the startup entry point. After a successful check it
+leaves a stamp file next to the database holding the schema fingerprint,
+so a restart against the same, already migrated file skips opening it
+for migrations.
+"""
+import hashlib
+import os
+import sqlite3
+from typing import Callable, List, NamedTuple, Optional
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _execute_script(conn: sqlite3.Connection, script: str):
+    """Run a multi-statement script inside the caller's transaction.
+
+    ``executescript`` would commit first, so statements are split and run
+    one by one. Trigger bodies are kept whole via ``complete_statement``.
+    """
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            if statement.strip():
+                conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+# --- Version 1: original layout ------------------------------------------
+
+V1_SQL = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    date TEXT NOT NULL,
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT DEFAULT '',
+    note TEXT DEFAULT '',
+    created_at TEXT DEFAULT (datetime('now')),
+    updated_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
+CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(category);
+"""
+
+
+def _initial_schema(conn: sqlite3.Connection):
+    _execute_script(conn, V1_SQL)
+
+
+# --- Version 2: compact integer storage ----------------------------------
+
+V2_TABLE_SQL = """
+CREATE TABLE expenses_compact (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL DEFAULT (lower(hex(randomblob(16)))),
+    day INTEGER NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT NOT NULL DEFAULT '',
+    note TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+V2_INDEX_SQL = """
+CREATE UNIQUE INDEX idx_expenses_public_id ON expenses(id);
+CREATE INDEX idx_expenses_day ON expenses(day);
+CREATE INDEX idx_expenses_category ON expenses(category);
+"""
+
+# Objects from the pre-migration rollup layout, rebuilt by version 3
+LEGACY_ROLLUP_SQL = """
+DROP TRIGGER IF EXISTS trg_expenses_rollup_insert;
+DROP TRIGGER IF EXISTS trg_expenses_rollup_delete;
+DROP TRIGGER IF EXISTS trg_expenses_rollup_update;
+DROP TABLE IF EXISTS expense_daily_totals;
+DROP TABLE IF EXISTS expense_monthly_totals;
+"""
+
+
+def _compact_storage(conn: sqlite3.Connection):
+    """Rewrite expenses with integer cents, day numbers and a rowid key.
+
+    Handles both legacy layouts: the package schema (TEXT id, created_at)
+    and the main.py schema (INTEGER id, no timestamps). Rows whose date or
+    amount cannot be converted are kept in ``expenses_unmigrated``.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(expenses)")}
+    if "amount_cents" in columns:
+        return
+
+    _execute_script(conn, LEGACY_ROLLUP_SQL)
+    _execute_script(conn, V2_TABLE_SQL)
+
+    if "created_at" in columns:
+        pk_expr = "NULL"
+        id_expr = "COALESCE(id, lower(hex(randomblob(16))))"
+        created_expr = "COALESCE(created_at, datetime('now'))"
+        updated_expr = "COALESCE(updated_at, datetime('now'))"
+        order = "date, created_at"
+    else:
+        # main.py layout: keep the integer id as both key and public id
+        pk_expr = "id"
+        id_expr = "CAST(id AS TEXT)"
+        created_expr = updated_expr = "datetime('now')"
+        order = "date, id"
+
+    valid = "date(date) IS date AND typeof(amount) IN ('integer', 'real')"
+    conn.execute(f"""
+        INSERT INTO expenses_compact
+            (pk, id, day, amount_cents, category, subcategory, note, created_at, updated_at)
+        SELECT {pk_expr}, {id_expr},
+               CAST(julianday(date) - 2440587.5 AS INTEGER),
+               CAST(ROUND(amount * 100) AS INTEGER),
+               category, COALESCE(subcategory, ''), COALESCE(note, ''),
+               {created_expr}, {updated_expr}
+        FROM expenses
+        WHERE {valid}
+        ORDER BY {order}
+    """)
+
+    invalid = conn.execute(f"SELECT COUNT(*) FROM expenses WHERE NOT ({valid})").fetchone()[0]
+    if invalid:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS expenses_unmigrated AS SELECT * FROM expenses WHERE NOT ({valid})")
+
+    conn.execute("DROP TABLE expenses")
+    conn.execute("ALTER TABLE expenses_compact RENAME TO expenses")
+    _execute_script(conn, V2_INDEX_SQL)
+
+
+# --- Version 3: summary rollups on the compact layout ---------------------
+
+V3_SQL = """
+CREATE TABLE expense_daily_totals (
+    day INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT NOT NULL DEFAULT '',
+    total_cents INTEGER NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, category, subcategory)
+) WITHOUT ROWID;
+
+CREATE TABLE expense_monthly_totals (
+    month INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT NOT NULL DEFAULT '',
+    total_cents INTEGER NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (month, category, subcategory)
+) WITHOUT ROWID;
+
+CREATE TRIGGER trg_expenses_rollup_insert
+AFTER INSERT ON expenses
+BEGIN
+    INSERT INTO expense_daily_totals (day, category, subcategory, total_cents, count)
+    VALUES (NEW.day, NEW.category, NEW.subcategory, NEW.amount_cents, 1)
+    ON CONFLICT (day, category, subcategory) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents,
+        count = count + 1;
+
+    INSERT INTO expense_monthly_totals (month, category, subcategory, total_cents, count)
+    VALUES (CAST(strftime('%Y%m', NEW.day * 86400, 'unixepoch') AS INTEGER),
+            NEW.category, NEW.subcategory, NEW.amount_cents, 1)
+    ON CONFLICT (month, category, subcategory) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents,
+        count = count + 1;
+END;
+
+CREATE TRIGGER trg_expenses_rollup_delete
+AFTER DELETE ON expenses
+BEGIN
+    UPDATE expense_daily_totals
+    SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE day = OLD.day AND category = OLD.category AND subcategory = OLD.subcategory;
+
+    DELETE FROM expense_daily_totals
+    WHERE day = OLD.day AND category = OLD.category AND subcategory = OLD.subcategory
+      AND count <= 0;
+
+    UPDATE expense_monthly_totals
+    SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE month = CAST(strftime('%Y%m', OLD.day * 86400, 'unixepoch') AS INTEGER)
+      AND category = OLD.category AND subcategory = OLD.subcategory;
+
+    DELETE FROM expense_monthly_totals
+    WHERE month = CAST(strftime('%Y%m', OLD.day * 86400, 'unixepoch') AS INTEGER)
+      AND category = OLD.category AND subcategory = OLD.subcategory
+      AND count <= 0;
+END;
+
+CREATE TRIGGER trg_expenses_rollup_update
+AFTER UPDATE OF day, amount_cents, category, subcategory ON expenses
+BEGIN
+    UPDATE expense_daily_totals
+    SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE day = OLD.day AND category = OLD.category AND subcategory = OLD.subcategory;
+
+    DELETE FROM expense_daily_totals
+    WHERE day = OLD.day AND category = OLD.category AND subcategory = OLD.subcategory
+      AND count <= 0;
+
+    UPDATE expense_monthly_totals
+    SET total_cents = total_cents - OLD.amount_cents, count = count - 1
+    WHERE month = CAST(strftime('%Y%m', OLD.day * 86400, 'unixepoch') AS INTEGER)
+      AND category = OLD.category AND subcategory = OLD.subcategory;
+
+    DELETE FROM expense_monthly_totals
+    WHERE month = CAST(strftime('%Y%m', OLD.day * 86400, 'unixepoch') AS INTEGER)
+      AND category = OLD.category AND subcategory = OLD.subcategory
+      AND count <= 0;
+
+    INSERT INTO expense_daily_totals (day, category, subcategory, total_cents, count)
+    VALUES (NEW.day, NEW.category, NEW.subcategory, NEW.amount_cents, 1)
+    ON CONFLICT (day, category, subcategory) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents,
+        count = count + 1;
+
+    INSERT INTO expense_monthly_totals (month, category, subcategory, total_cents, count)
+    VALUES (CAST(strftime('%Y%m', NEW.day * 86400, 'unixepoch') AS INTEGER),
+            NEW.category, NEW.subcategory, NEW.amount_cents, 1)
+    ON CONFLICT (month, category, subcategory) DO UPDATE SET
+        total_cents = total_cents + excluded.total_cents,
+        count = count + 1;
+END;
+
+INSERT INTO expense_daily_totals (day, category, subcategory, total_cents, count)
+SELECT day, category, subcategory, SUM(amount_cents), COUNT(*)
+FROM expenses
+GROUP BY day, category, subcategory;
+
+INSERT INTO expense_monthly_totals (month, category, subcategory, total_cents, count)
+SELECT CAST(strftime('%Y%m', day * 86400, 'unixepoch') AS INTEGER), category, subcategory,
+       SUM(total_cents), SUM(count)
+FROM expense_daily_totals
+GROUP BY 1, category, subcategory;
+"""
+
+
+def _summary_rollups(conn: sqlite3.Connection):
+    _execute_script(conn, V3_SQL)
+
+
+# --- Version 4: composite indexes for the tool queries -------------------
+
+V4_SQL = """
+DROP INDEX IF EXISTS idx_expenses_day;
+DROP INDEX IF EXISTS idx_expenses_category;
+
+-- list_expenses: range on day, ORDER BY day, created_at, pk (the rowid
+-- is implicitly the last index column) without a temp sort
+CREATE INDEX idx_expenses_day_created ON expenses(day, created_at);
+
+-- list_expenses with a category filter
+CREATE INDEX idx_expenses_category_day_created ON expenses(category, day, created_at);
+
+-- Range aggregates (raw summaries, consistency checks) read only the index
+CREATE INDEX idx_expenses_day_totals ON expenses(day, category, subcategory, amount_cents);
+
+ANALYZE;
+"""
+
+
+def _composite_indexes(conn: sqlite3.Connection):
+    _execute_script(conn, V4_SQL)
+
+
+# --- Version 5: change log ----------------------------------------------
+
+V5_SQL = """
+-- One row per insert, update or delete of an expense, in commit order.
+-- Consumers remember the last seq they have seen (their watermark) and
+-- read only newer changes. Old rows are pruned, so a consumer whose
+-- watermark is older than MIN(seq) - 1 must reload from scratch.
+CREATE TABLE expense_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    pk INTEGER NOT NULL,
+    expense_id TEXT NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+    changed_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE TRIGGER trg_expenses_log_insert
+AFTER INSERT ON expenses
+BEGIN
+    INSERT INTO expense_changes (pk, expense_id, op) VALUES (NEW.pk, NEW.id, 'insert');
+END;
+
+CREATE TRIGGER trg_expenses_log_update
+AFTER UPDATE ON expenses
+BEGIN
+    INSERT INTO expense_changes (pk, expense_id, op) VALUES (NEW.pk, NEW.id, 'update');
+END;
+
+CREATE TRIGGER trg_expenses_log_delete
+AFTER DELETE ON expenses
+BEGIN
+    INSERT INTO expense_changes (pk, expense_id, op) VALUES (OLD.pk, OLD.id, 'delete');
+END;
+"""
+
+
+def _change_log(conn: sqlite3.Connection):
+    _execute_script(conn, V5_SQL)
+
+
+# --- Version 6: full-text search over notes ------------------------------
+
+V6_SQL = """
+-- External-content index: the text lives only in expenses, the index is
+-- keyed by its pk. Prefix indexes make 2- and 3-character prefix queries
+-- index lookups instead of term scans.
+CREATE VIRTUAL TABLE expenses_fts USING fts5(
+    note,
+    subcategory,
+    content = 'expenses',
+    content_rowid = 'pk',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER trg_expenses_fts_insert
+AFTER INSERT ON expenses
+BEGIN
+    INSERT INTO expenses_fts (rowid, note, subcategory) VALUES (NEW.pk, NEW.note, NEW.subcategory);
+END;
+
+CREATE TRIGGER trg_expenses_fts_delete
+AFTER DELETE ON expenses
+BEGIN
+    INSERT INTO expenses_fts (expenses_fts, rowid, note, subcategory)
+    VALUES ('delete', OLD.pk, OLD.note, OLD.subcategory);
+END;
+
+CREATE TRIGGER trg_expenses_fts_update
+AFTER UPDATE OF note, subcategory ON expenses
+BEGIN
+    INSERT INTO expenses_fts (expenses_fts, rowid, note, subcategory)
+    VALUES ('delete', OLD.pk, OLD.note, OLD.subcategory);
+    INSERT INTO expenses_fts (rowid, note, subcategory) VALUES (NEW.pk, NEW.note, NEW.subcategory);
+END;
+
+INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild');
+"""
+
+
+def _full_text_search(conn: sqlite3.Connection):
+    _execute_script(conn, V6_SQL)
+
+
+# --- Version 7: partition catalog ------------------------------------------
+
+V7_SQL = """
+-- Archive tables holding closed years (see src.database.partitions). The
+-- tables live in the attached archive database; a table listed here is
+-- live, anything else in the archive is a leftover of an interrupted
+-- compaction. Day bounds let readers skip partitions outside a range.
+CREATE TABLE expense_partitions (
+    name TEXT PRIMARY KEY,
+    year INTEGER NOT NULL,
+    min_day INTEGER NOT NULL,
+    max_day INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+
+def _partition_catalog(conn: sqlite3.Connection):
+    _execute_script(conn, V7_SQL)
+
+
+# --- Version 8: monthly budgets ----------------------------------------------
+
+V8_SQL = """
+-- A standing monthly limit per category. Spending is never stored here:
+-- it is read from expense_monthly_totals, which the rollup triggers keep
+-- current in the same transaction as every write.
+CREATE TABLE expense_budgets (
+    category TEXT PRIMARY KEY,
+    limit_cents INTEGER NOT NULL CHECK (limit_cents > 0),
+    alert_ratio REAL NOT NULL DEFAULT 0.8 CHECK (alert_ratio > 0 AND alert_ratio <= 1),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+) WITHOUT ROWID;
+"""
+
+
+def _budgets(conn: sqlite3.Connection):
+    _execute_script(conn, V8_SQL)
+
+
+# --- Version 9: recurring expenses -------------------------------------------
+
+V9_SQL = """
+-- RRULE-like definitions (FREQ, INTERVAL, UNTIL, COUNT). Occurrences are
+-- inserted into expenses lazily (see src.database.recurring);
+-- materialized is how many have been, next_day the first one that has
+-- not (NULL once the rule has ended).
+CREATE TABLE recurring_rules (
+    id TEXT PRIMARY KEY,
+    frequency TEXT NOT NULL CHECK (frequency IN ('daily', 'weekly', 'monthly', 'yearly')),
+    interval INTEGER NOT NULL DEFAULT 1 CHECK (interval >= 1),
+    start_day INTEGER NOT NULL,
+    until_day INTEGER,
+    max_count INTEGER CHECK (max_count IS NULL OR max_count >= 1),
+    amount_cents INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    subcategory TEXT NOT NULL DEFAULT '',
+    note TEXT NOT NULL DEFAULT '',
+    materialized INTEGER NOT NULL DEFAULT 0,
+    next_day INTEGER,
+    created_at TEXT NOT NULL DEFAULT (datetime('now'))
+) WITHOUT ROWID;
+
+CREATE INDEX idx_recurring_rules_next_day ON recurring_rules (next_day) WHERE next_day IS NOT NULL;
+
+-- One row per generated occurrence; the primary key makes generating
+-- the same occurrence twice fail instead of duplicating the expense
+CREATE TABLE recurring_occurrences (
+    rule_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    expense_id TEXT NOT NULL,
+    PRIMARY KEY (rule_id, day)
+) WITHOUT ROWID;
+"""
+
+
+def _recurring_expenses(conn: sqlite3.Connection):
+    _execute_script(conn, V9_SQL)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial schema", _initial_schema),
+    Migration(2, "compact integer storage", _compact_storage),
+    Migration(3, "summary rollups", _summary_rollups),
+    Migration(4, "composite indexes", _composite_indexes),
+    Migration(5, "change log", _change_log),
+    Migration(6, "full-text search", _full_text_search),
+    Migration(7, "partition catalog", _partition_catalog),
+    Migration(8, "monthly budgets", _budgets),
+    Migration(9, "recurring expenses", _recurring_expenses),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def run_migrations(db_path: str) -> int:
+    """Bring the database at ``db_path`` up to the latest schema version.
+
+    Returns the resulting version. Raises RuntimeError if the database was
+    written by a newer release than this one.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        current = conn.execute("PRAGMA user_version").fetchone()[0]
+        if current > LATEST_VERSION:
+            raise RuntimeError(
+                f"Database schema version {current} is newer than this release supports ({LATEST_VERSION})"
+            )
+
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            print(f"✓ Applied migration {migration.version}: {migration.description}")
+            current = migration.version
+        return current
+    finally:
+        conn.close()
+
+
+def schema_fingerprint() -> str:
+    """Identifies the migration list this release ships"""
+    digest = hashlib.sha256()
+    for migration in MIGRATIONS:
+        digest.update(f"{migration.version}:{migration.description}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _stamp_path(db_path: str) -> str:
+    return db_path + ".schema"
+
+
+def _file_identity(db_path: str) -> Optional[str]:
+    try:
+        st = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    # An empty file has no schema yet, whatever the stamp says
+    return f"{st.st_dev}:{st.st_ino}" if st.st_size else None
+
+
+def _header_user_version(db_path: str) -> Optional[int]:
+    """``PRAGMA user_version`` as stored in the file header (bytes 60-63)"""
+    try:
+        with open(db_path, "rb") as f:
+            header = f.read(100)
+    except OSError:
+        return None
+    if len(header) < 100 or not header.startswith(b"SQLite format 3\x00"):
+        return None
+    return int.from_bytes(header[60:64], "big")
+
+
+def ensure_schema(db_path: str, check_write: bool = False) -> int:
+    """Migrate ``db_path`` unless a matching stamp shows it is already current.
+
+    The stamp records the schema fingerprint and the file's device/inode,
+    so a replaced or recreated database is always checked again. A file
+    restored in place keeps its inode, so the version in the file header
+    must also be the latest; a header not yet checkpointed from the WAL
+    only costs a redundant check. With ``check_write`` set, write access
+    is verified (without writing rows) before the stamp is stored. Returns
+    the schema version.
+    """
+    identity = _file_identity(db_path)
+    if identity is not None and _header_user_version(db_path) == LATEST_VERSION:
+        try:
+            with open(_stamp_path(db_path), "r", encoding="utf-8") as f:
+                if f.read() == f"{schema_fingerprint()} {identity}":
+                    return LATEST_VERSION
+        except OSError:
+            pass
+
+    version = run_migrations(db_path)
+    if check_write:
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("ROLLBACK")
+        finally:
+            conn.close()
+
+    try:
+        with open(_stamp_path(db_path), "w", encoding="utf-8") as f:
+            f.write(f"{schema_fingerprint()} {_file_identity(db_path)}")
+    except OSError:
+        # Read-only directory: the check simply runs again next start
+        pass
+    return version
@@ -0,0 +1,408 @@
+"""
+Hot/cold partitioning of the expenses table.
+
+Closed years move out of ``expenses`` into an archive database next to
+the main one (``<database>.archive``), attached to every connection as
+``archive``. Each archived year is one table there, a *partition*, with
+the same columns and indexes as ``expenses`` and its own full-text
+index. ``expense_partitions`` in the main database (migration 7) lists
+the live partitions and the days they cover; an archive table that is
+not listed there is ignored by readers and dropped by the next
+compaction.
+
+- Reads UNION ALL ``expenses`` with the partitions whose days overlap
+  the requested range. SQLite merges the arms through their
+  (day, created_at) indexes, so ORDER BY ... LIMIT still stops early.
+- Writes always go to ``expenses``. An expense dated in an archived year
+  stays in the main table until the next compaction folds it into that
+  year's partition. Updating or deleting an archived expense first moves
+  it back (``restore_expense``), so the triggers see an ordinary write.
+- The rollup tables keep covering every year; summaries never read the
+  archive. Moving rows in either direction leaves them unchanged.
+
+``compact`` is the background job. For every closed year that still has
+rows in the main table it builds a new partition from those rows plus
+the year's existing partition, swaps it into the catalog, and finally
+VACUUMs the archive.
+"""
+import asyncio
+import os
+import re
+import sqlite3
+from datetime import date
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+from src.database.codec import date_to_day, day_to_date
+from src.database.rollups import build_rollup_delta_queries
+
+ARCHIVE_SCHEMA = "archive"
+
+PARTITIONS_SQL = """
+    SELECT name, year, min_day, max_day, row_count
+    FROM expense_partitions
+    ORDER BY max_day DESC
+"""
+
+# The newest row never moves: new rows get MAX(pk) + 1 of the main table,
+# which therefore stays above every archived pk instead of reusing one
+_MOVABLE = "pk < (SELECT MAX(pk) FROM main.expenses)"
+
+# Partition tables are expenses_<year>_<n>; their FTS tables add a suffix
+_PARTITION_NAME = re.compile(r"^expenses_(\d{4})_(\d+)$")
+
+_COLUMNS = "pk, id, day, amount_cents, category, subcategory, note, created_at, updated_at"
+
+_PARTITION_SCHEMA = (
+    """
+    CREATE TABLE archive.{name} (
+        pk INTEGER PRIMARY KEY,
+        id TEXT NOT NULL,
+        day INTEGER NOT NULL,
+        amount_cents INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        subcategory TEXT NOT NULL DEFAULT '',
+        note TEXT NOT NULL DEFAULT '',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    """,
+)
+
+# Built after the rows are in: one sorted pass instead of per-row inserts
+_PARTITION_INDEXES = (
+    "CREATE UNIQUE INDEX archive.{name}_public_id ON {name}(id)",
+    "CREATE INDEX archive.{name}_day_created ON {name}(day, created_at)",
+    "CREATE INDEX archive.{name}_category_day_created ON {name}(category, day, created_at)",
+    """
+    CREATE VIRTUAL TABLE archive.{name}_fts USING fts5(
+        note,
+        subcategory,
+        content = '{name}',
+        content_rowid = 'pk',
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    "INSERT INTO archive.{name}_fts ({name}_fts) VALUES ('rebuild')",
+    # Rows only ever leave a partition (restore_expense), never change in place
+    """
+    CREATE TRIGGER archive.{name}_fts_delete
+    AFTER DELETE ON {name}
+    BEGIN
+        INSERT INTO {name}_fts ({name}_fts, rowid, note, subcategory)
+        VALUES ('delete', OLD.pk, OLD.note, OLD.subcategory);
+    END
+    """,
+)
+
+
+class Partition(NamedTuple):
+    """One archive table holding expenses of a single closed year"""
+    name: str
+    year: int
+    min_day: int
+    max_day: int
+    row_count: int
+
+    @property
+    def table(self) -> str:
+        return f"{ARCHIVE_SCHEMA}.{self.name}"
+
+    @property
+    def fts_table(self) -> str:
+        return f"{ARCHIVE_SCHEMA}.{self.name}_fts"
+
+
+def archive_path(db_path: str) -> str:
+    return db_path + ".archive"
+
+
+def overlapping(
+    partitions: Sequence[Partition],
+    start_day: Optional[int] = None,
+    end_day: Optional[int] = None
+) -> List[Partition]:
+    """Partitions holding days inside the inclusive range (open ends allowed)"""
+    return [
+        p for p in partitions
+        if (start_day is None or p.max_day >= start_day) and (end_day is None or p.min_day <= end_day)
+    ]
+
+
+def expense_tables(
+    partitions: Sequence[Partition],
+    start_day: Optional[int] = None,
+    end_day: Optional[int] = None
+) -> List[str]:
+    """``expenses`` followed by the archive tables that overlap the range, newest first"""
+    return ["expenses"] + [p.table for p in overlapping(partitions, start_day, end_day)]
+
+
+def attach_archive(conn: sqlite3.Connection, db_path: str, read_only: bool = True):
+    """Attach the archive to a plain sqlite3 connection (outside a transaction).
+
+    Read-only attaches skip a missing archive; nothing can be archived
+    before a pooled connection has created it.
+    """
+    path = archive_path(db_path)
+    if not read_only:
+        conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    elif os.path.exists(path):
+        conn.execute("ATTACH DATABASE ? AS archive", (f"file:{path}?mode=ro",))
+
+
+def load_partitions(conn: sqlite3.Connection) -> List[Partition]:
+    return [Partition(*row) for row in conn.execute(PARTITIONS_SQL)]
+
+
+def year_days(year: int) -> tuple:
+    """First and last day number of a calendar year"""
+    return date_to_day(f"{year:04d}-01-01"), date_to_day(f"{year:04d}-12-31")
+
+
+def _partition_tables(conn: sqlite3.Connection) -> List[str]:
+    names = conn.execute("SELECT name FROM archive.sqlite_master WHERE type = 'table'").fetchall()
+    return [name for (name,) in names if _PARTITION_NAME.match(name)]
+
+
+def _drop_orphans(db_path: str) -> List[str]:
+    """Drop archive tables the catalog no longer lists (runs in a thread)"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        attach_archive(conn, db_path, read_only=False)
+        conn.execute("BEGIN")
+        live = {p.name for p in load_partitions(conn)}
+        orphans = [name for name in _partition_tables(conn) if name not in live]
+        for name in orphans:
+            conn.execute(f"DROP TABLE IF EXISTS archive.{name}_fts")
+            conn.execute(f"DROP TABLE archive.{name}")
+        conn.execute("COMMIT")
+        return orphans
+    finally:
+        conn.close()
+
+
+def _build_partition(db_path: str, year: int, replaces: Sequence[str]) -> Dict[str, Any]:
+    """Copy a year's main-table rows and its ``replaces`` partitions into a new table.
+
+    Runs in a thread on its own connection. Only the archive is written,
+    so the main database's writer is never blocked; the copy becomes
+    visible when ``compact`` adds it to the catalog.
+    """
+    first_day, last_day = year_days(year)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        attach_archive(conn, db_path, read_only=False)
+        taken = [int(_PARTITION_NAME.match(n).group(2)) for n in _partition_tables(conn) if n.startswith(f"expenses_{year}_")]
+        name = f"expenses_{year}_{max(taken, default=0) + 1}"
+
+        conn.execute("BEGIN")
+        # Read in the same transaction as the copy, so later writes show up past it
+        seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM expense_changes").fetchone()[0]
+        for statement in _PARTITION_SCHEMA:
+            conn.execute(statement.format(name=name))
+        sources = [f"SELECT {_COLUMNS} FROM main.expenses WHERE day BETWEEN {first_day} AND {last_day} AND {_MOVABLE}"]
+        sources += [f"SELECT {_COLUMNS} FROM archive.{old}" for old in replaces]
+        conn.execute(f"INSERT INTO archive.{name} ({_COLUMNS}) {' UNION ALL '.join(sources)} ORDER BY day, created_at")
+        for statement in _PARTITION_INDEXES:
+            conn.execute(statement.format(name=name))
+        rows = conn.execute(f"SELECT COUNT(*) FROM archive.{name}").fetchone()[0]
+        conn.execute("COMMIT")
+        return {"name": name, "seq": seq, "rows": rows}
+    finally:
+        conn.close()
+
+
+def _vacuum_archive(db_path: str) -> bool:
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        attach_archive(conn, db_path, read_only=False)
+        conn.execute("VACUUM archive")
+        return True
+    except sqlite3.OperationalError as e:
+        # Busy readers: the space is reclaimed by the next run instead
+        print(f"✗ Archive VACUUM skipped: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+async def _closed_years(client, first_hot_day: int) -> List[int]:
+    """Years before ``first_hot_day`` that still have movable rows in the main table"""
+    years = []
+    bound = -(1 << 62)
+    while True:
+        row = await client.fetch_one(
+            f"SELECT MIN(day) AS day FROM expenses WHERE day > ? AND day < ? AND {_MOVABLE}", (bound, first_hot_day)
+        )
+        if row is None or row["day"] is None:
+            return years
+        year = int(day_to_date(row["day"])[:4])
+        years.append(year)
+        bound = year_days(year)[1]
+
+
+async def _swap_in(client, year: int, built: Dict[str, Any], replaces: Sequence[str]) -> bool:
+    """Publish a built partition and remove its rows from the main table.
+
+    Returns False, leaving everything as it was, if any copied row was
+    written after the copy was taken.
+    """
+    name = built["name"]
+    first_day, last_day = year_days(year)
+    moved = f"SELECT pk FROM archive.{name}"
+    main_rows = f"""
+        SELECT day, category, subcategory, amount_cents FROM expenses
+        WHERE day BETWEEN {first_day} AND {last_day} AND pk IN ({moved})
+    """
+    async with client.transaction():
+        stale = await client.fetch_one(
+            f"SELECT EXISTS (SELECT 1 FROM expense_changes WHERE seq > ? AND pk IN ({moved})) AS stale",
+            (built["seq"],)
+        )
+        if stale["stale"]:
+            return False
+
+        # The delete triggers subtract these rows from the rollups and log
+        # them as deleted; neither is true of a move, so add them back
+        # first and drop the log entries afterwards
+        before = await client.change_seq()
+        for statement in build_rollup_delta_queries(main_rows):
+            await client.execute(statement)
+        await client.execute(
+            f"DELETE FROM expenses WHERE day BETWEEN ? AND ? AND pk IN ({moved})", (first_day, last_day)
+        )
+        await client.execute("DELETE FROM expense_changes WHERE seq > ?", (before,))
+
+        if replaces:
+            await client.execute(
+                f"DELETE FROM expense_partitions WHERE name IN ({', '.join('?' * len(replaces))})", tuple(replaces)
+            )
+        await client.execute(
+            f"""
+            INSERT INTO expense_partitions (name, year, min_day, max_day, row_count)
+            SELECT ?, ?, MIN(day), MAX(day), COUNT(*) FROM archive.{name}
+            """,
+            (name, year)
+        )
+        # Changes the archive file, which tells every process to re-read the catalog
+        version = (await client.fetch_one("PRAGMA archive.user_version"))["user_version"]
+        await client.execute(f"PRAGMA archive.user_version = {version + 1}")
+    return True
+
+
+async def compact(client, hot_years: int, today: Optional[date] = None) -> Dict[str, Any]:
+    """Archive closed years of one database.
+
+    ``client`` is the database's ``SQLiteClient``. Years before the last
+    ``hot_years`` calendar years (the current one included) are archived;
+    ``hot_years`` 0 disables archiving.
+    """
+    if hot_years <= 0:
+        return {"status": "success", "message": "Archiving is disabled", "archived": []}
+
+    today = today or date.today()
+    first_hot_day = year_days(today.year - hot_years + 1)[0]
+    dropped = await asyncio.to_thread(_drop_orphans, client.db_path)
+
+    archived: List[Dict[str, Any]] = []
+    skipped: List[int] = []
+    for year in await _closed_years(client, first_hot_day):
+        replaces = [p.name for p in await client.partitions() if p.year == year]
+        built = await asyncio.to_thread(_build_partition, client.db_path, year, replaces)
+        if await _swap_in(client, year, built, replaces):
+            archived.append({"year": year, "partition": built["name"], "rows": built["rows"], "replaced": replaces})
+        else:
+            # Dropped as an orphan next time; the year is retried then
+            skipped.append(year)
+
+    vacuumed = False
+    if archived or dropped:
+        vacuumed = await asyncio.to_thread(_vacuum_archive, client.db_path)
+
+    return {
+        "status": "success",
+        "message": f"Archived {len(archived)} year(s)",
+        "hot_from": day_to_date(first_hot_day),
+        "archived": archived,
+        "skipped": skipped,
+        "dropped": dropped,
+        "vacuumed": vacuumed,
+    }
+
+
+# Moves the archived row back, keeping its pk unless the main table reused it
+RESTORE_SQL = f"""
+    INSERT INTO expenses ({_COLUMNS})
+    SELECT CASE WHEN EXISTS (SELECT 1 FROM expenses WHERE pk = a.pk) THEN NULL ELSE a.pk END,
+           a.id, a.day, a.amount_cents, a.category, a.subcategory, a.note, a.created_at, a.updated_at
+    FROM {{table}} AS a
+    WHERE a.id = ?
+"""
+
+# When the pk changed, readers keyed by pk (snapshots) must drop the old one
+RESTORE_LOG_SQL = """
+    INSERT INTO expense_changes (pk, expense_id, op)
+    SELECT a.pk, a.id, 'delete' FROM {table} AS a
+    WHERE a.id = ? AND NOT EXISTS (SELECT 1 FROM expenses WHERE pk = a.pk AND id = a.id)
+"""
+
+
+async def restore_expense(client, partition: str, expense_id: str) -> bool:
+    """Move an archived expense back into the main table before it is written.
+
+    Returns False if it was no longer in ``partition`` (restored by a
+    concurrent call).
+    """
+    table = f"{ARCHIVE_SCHEMA}.{partition}"
+    async with client.transaction():
+        result = await client.execute(RESTORE_SQL.format(table=table), (expense_id,))
+        if not result.rows_affected:
+            return False
+        # The insert trigger counted the row again
+        source = f"SELECT day, category, subcategory, amount_cents FROM {table} WHERE id = ?"
+        for statement in build_rollup_delta_queries(source, sign=-1):
+            await client.execute(statement, (expense_id,))
+        await client.execute(RESTORE_LOG_SQL.format(table=table), (expense_id,))
+        await client.execute(f"DELETE FROM {table} WHERE id = ?", (expense_id,))
+        await client.execute(
+            "UPDATE expense_partitions SET row_count = row_count - 1 WHERE name = ?", (partition,)
+        )
+    return True
+
+
+class CompactionJob:
+    """Runs ``compact_partitions`` for every organization on a fixed interval"""
+
+    def __init__(self, client, interval_seconds: float, hot_years: int):
+        self.client = client
+        self.interval_seconds = interval_seconds
+        self.hot_years = hot_years
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval_seconds > 0 and self.hot_years > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> Dict[str, Any]:
+        return await self.client.fan_out(lambda: self.client.compact_partitions(self.hot_years))
+
+    async def _run(self):
+        while True:
+            try:
+                results = await self.run_once()
+                for org, result in results.items():
+                    if result["archived"]:
+                        print(f"✓ Archived {org}: {', '.join(str(a['year']) for a in result['archived'])}")
+            except Exception as e:
+                print(f"✗ Partition compaction failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
@@ -0,0 +1,128 @@
+"""
+Recurring expenses, materialized lazily.
+
+A rule in ``recurring_rules`` (migration 9) describes a series the way
+an RRULE does: a frequency (daily, weekly, monthly or yearly), an
+interval, a start day and an optional UNTIL day or COUNT. Its
+occurrences are not written up front. Before a read covers a date range,
+``materialize`` inserts the occurrences up to the end of that range, but
+never past today: a future rent payment has not happened yet.
+
+Each rule keeps a watermark: ``materialized`` occurrences exist and
+``next_day`` is the first that does not. Occurrences are inserted and
+the watermark advanced in one write transaction, after re-reading the
+rule under the write lock, so concurrent readers (in this process or
+another) never generate an occurrence twice. ``recurring_occurrences``
+records each one and its primary key rejects duplicates outright. An
+occurrence that is later deleted is not generated again.
+
+Occurrences are ordinary rows in ``expenses``: the rollup triggers, the
+change log, snapshots and the change feed see them like any other
+insert. The caller invalidates the result cache for the returned
+(day, category) pairs.
+"""
+import calendar
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.database.codec import EPOCH_ORDINAL, cents_to_amount, new_expense_id
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+
+RULE_COLUMNS_SQL = (
+    "id, frequency, interval, start_day, until_day, max_count, amount_cents, "
+    "category, subcategory, note, materialized, next_day"
+)
+
+INSERT_RULE_SQL = f"""INSERT INTO recurring_rules ({RULE_COLUMNS_SQL})
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)"""
+
+NEXT_DUE_SQL = "SELECT MIN(next_day) AS day FROM recurring_rules"
+
+DUE_RULES_SQL = f"SELECT {RULE_COLUMNS_SQL} FROM recurring_rules WHERE next_day <= ? ORDER BY next_day"
+
+INSERT_OCCURRENCE_SQL = """INSERT INTO expenses (id, day, amount_cents, category, subcategory, note)
+                           VALUES (?, ?, ?, ?, ?, ?)"""
+
+INSERT_LEDGER_SQL = "INSERT INTO recurring_occurrences (rule_id, day, expense_id) VALUES (?, ?, ?)"
+
+ADVANCE_RULE_SQL = "UPDATE recurring_rules SET materialized = ?, next_day = ? WHERE id = ? AND materialized = ?"
+
+
+def occurrence_day(start_day: int, frequency: str, interval: int, index: int) -> int:
+    """Day number of occurrence ``index`` (0 is the start).
+
+    Monthly and yearly occurrences keep the start's day of the month,
+    moved back to the last day of shorter months (the 31st falls on the
+    30th in April, 29 February on the 28th in other years).
+    """
+    if frequency == "daily":
+        return start_day + index * interval
+    if frequency == "weekly":
+        return start_day + index * interval * 7
+    start = date.fromordinal(start_day + EPOCH_ORDINAL)
+    months = index * interval * (12 if frequency == "yearly" else 1)
+    year, month = divmod(start.year * 12 + start.month - 1 + months, 12)
+    day = min(start.day, calendar.monthrange(year, month + 1)[1])
+    return date(year, month + 1, day).toordinal() - EPOCH_ORDINAL
+
+
+def next_occurrence(rule: Dict[str, Any], index: int) -> Optional[int]:
+    """Day of occurrence ``index`` of ``rule``, or None past its UNTIL or COUNT"""
+    if rule["max_count"] is not None and index >= rule["max_count"]:
+        return None
+    day = occurrence_day(rule["start_day"], rule["frequency"], rule["interval"], index)
+    if rule["until_day"] is not None and day > rule["until_day"]:
+        return None
+    return day
+
+
+async def materialize(client, through_day: int) -> List[Tuple[int, str]]:
+    """Insert every occurrence due on or before ``through_day``.
+
+    Returns the (day, category) of each expense created. Costs one
+    indexed lookup when nothing is due.
+    """
+    due = await client.fetch_one(NEXT_DUE_SQL)
+    if due is None or due["day"] is None or due["day"] > through_day:
+        return []
+
+    created: List[Tuple[int, str]] = []
+    async with client.transaction():
+        # Re-read under the write lock: another reader may have got here first
+        for rule in await client.fetch_all(DUE_RULES_SQL, (through_day,)):
+            index, day = rule["materialized"], rule["next_day"]
+            expenses, ledger = [], []
+            while day is not None and day <= through_day:
+                expense_id = new_expense_id()
+                expenses.append((expense_id, day, rule["amount_cents"], rule["category"],
+                                 rule["subcategory"], rule["note"]))
+                ledger.append((rule["id"], day, expense_id))
+                index += 1
+                day = next_occurrence(rule, index)
+            await client.executemany(INSERT_OCCURRENCE_SQL, expenses)
+            await client.executemany(INSERT_LEDGER_SQL, ledger)
+            await client.execute(ADVANCE_RULE_SQL, (index, day, rule["id"], rule["materialized"]))
+            created.extend((row[1], rule["category"]) for row in expenses)
+    return created
+
+
+def rule_dict(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Public shape of a rule row"""
+    def iso(day: Optional[int]) -> Optional[str]:
+        return None if day is None else date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+    return {
+        "id": row["id"],
+        "frequency": row["frequency"],
+        "interval": row["interval"],
+        "start_date": iso(row["start_day"]),
+        "end_date": iso(row["until_day"]),
+        "count": row["max_count"],
+        "amount": cents_to_amount(row["amount_cents"]),
+        "category": row["category"],
+        "subcategory": row["subcategory"],
+        "note": row["note"],
+        "materialized": row["materialized"],
+        "next_date": iso(row["next_day"]),
+    }
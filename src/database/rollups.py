@@ -0,0 +1,271 @@
+"""
+Daily and monthly aggregate tables for summarize_expenses.
+
+The rollups (created by migration 3) are kept current by triggers on
+``expenses``, so every write path (single writes, batched writes, bulk
+import) maintains them inside the same transaction as the row change. A
+date range is answered from whole months in ``expense_monthly_totals``
+plus the leftover days at each edge from ``expense_daily_totals``.
+Totals are integer cents, so sums are exact.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.database.codec import EPOCH_ORDINAL
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month_start(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def split_range(start: date, end: date) -> Tuple[Optional[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Split an inclusive date range into whole months and leftover day spans.
+
+    Returns ``(month_span, day_spans)`` where ``month_span`` is an inclusive
+    ``(YYYYMM, YYYYMM)`` pair (or None) and ``day_spans`` are inclusive
+    day-number pairs to read from the daily table.
+    """
+    if start > end:
+        return None, []
+
+    def day(d: date) -> int:
+        return d.toordinal() - EPOCH_ORDINAL
+
+    first_full = start if start.day == 1 else _next_month_start(start)
+    after_last_full = _month_start(end + timedelta(days=1))
+
+    if first_full >= after_last_full:
+        return None, [(day(start), day(end))]
+
+    last_full = after_last_full - timedelta(days=1)
+    month_span = (first_full.year * 100 + first_full.month, last_full.year * 100 + last_full.month)
+
+    day_spans = []
+    if start < first_full:
+        day_spans.append((day(start), day(first_full) - 1))
+    if end >= after_last_full:
+        day_spans.append((day(after_last_full), day(end)))
+    return month_span, day_spans
+
+
+def _rollup_parts(
+    start: date,
+    end: date,
+    select_cols: str,
+    category: Optional[str] = None
+) -> Tuple[List[str], List[Any]]:
+    """SELECTs over the rollup tables that together cover ``start``..``end`` exactly"""
+    month_span, day_spans = split_range(start, end)
+    category_filter = " AND category = ?" if category else ""
+
+    parts = []
+    params: List[Any] = []
+    if month_span:
+        parts.append(
+            f"SELECT {select_cols}, total_cents, count FROM expense_monthly_totals "
+            f"WHERE month BETWEEN ? AND ?{category_filter}"
+        )
+        params.extend(month_span)
+        if category:
+            params.append(category)
+    for span in day_spans:
+        parts.append(
+            f"SELECT {select_cols}, total_cents, count FROM expense_daily_totals "
+            f"WHERE day BETWEEN ? AND ?{category_filter}"
+        )
+        params.extend(span)
+        if category:
+            params.append(category)
+    return parts, params
+
+
+def build_rollup_summary_query(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+) -> Tuple[str, tuple]:
+    """Build a summary query over the rollup tables.
+
+    Raises ValueError if the dates are not in YYYY-MM-DD format.
+    """
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except (TypeError, ValueError):
+        raise ValueError("Dates must be in YYYY-MM-DD format")
+
+    group_cols = "category, subcategory" if by_subcategory else "category"
+    parts, params = _rollup_parts(start, end, group_cols, category)
+
+    if not parts:
+        # Empty range; keep the result shape without touching any rows
+        parts.append(f"SELECT {group_cols}, total_cents, count FROM expense_monthly_totals WHERE 0")
+
+    query = f"""
+        SELECT {group_cols}, SUM(total_cents) / 100.0 AS total_amount, SUM(count) AS count
+        FROM ({" UNION ALL ".join(parts)})
+        GROUP BY {group_cols}
+        ORDER BY total_amount DESC
+    """
+    return query, tuple(params)
+
+
+def build_comparison_query(
+    ranges: List[Tuple[date, date]],
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+) -> Tuple[str, tuple]:
+    """Build one query totalling several date ranges side by side.
+
+    Each range is read from the rollup tables like a summary and tagged
+    with its index; conditional aggregation then yields ``cents_<i>`` and
+    ``count_<i>`` columns per category (and subcategory), ordered by the
+    first range's total.
+    """
+    group_cols = "category, subcategory" if by_subcategory else "category"
+    parts: List[str] = []
+    params: List[Any] = []
+    for index, (start, end) in enumerate(ranges):
+        range_parts, range_params = _rollup_parts(start, end, f"{index} AS period, {group_cols}", category)
+        parts.extend(range_parts)
+        params.extend(range_params)
+
+    if not parts:
+        parts.append(f"SELECT 0 AS period, {group_cols}, total_cents, count FROM expense_monthly_totals WHERE 0")
+
+    columns = ",\n               ".join(
+        f"SUM(CASE WHEN period = {index} THEN total_cents ELSE 0 END) AS cents_{index}, "
+        f"SUM(CASE WHEN period = {index} THEN count ELSE 0 END) AS count_{index}"
+        for index in range(len(ranges))
+    )
+    query = f"""
+        SELECT {group_cols},
+               {columns}
+        FROM ({" UNION ALL ".join(parts)})
+        GROUP BY {group_cols}
+        ORDER BY cents_0 DESC
+    """
+    return query, tuple(params)
+
+
+def build_raw_summary_query(
+    start_day: int,
+    end_day: int,
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+) -> Tuple[str, tuple]:
+    """Build the equivalent summary query over the raw expenses table"""
+    group_cols = "category, subcategory" if by_subcategory else "category"
+    query = f"""
+        SELECT {group_cols}, SUM(amount_cents) / 100.0 AS total_amount, COUNT(*) AS count
+        FROM expenses
+        WHERE day BETWEEN ? AND ?
+    """
+    params: List[Any] = [start_day, end_day]
+
+    if category:
+        query += " AND category = ?"
+        params.append(category)
+
+    query += f" GROUP BY {group_cols} ORDER BY total_amount DESC"
+    return query, tuple(params)
+
+
+MONTH_OF_DAY_SQL = "CAST(strftime('%Y%m', day * 86400, 'unixepoch') AS INTEGER)"
+
+
+def build_rollup_delta_queries(source: str, sign: int = 1) -> List[str]:
+    """Statements adding (``sign`` 1) or subtracting (-1) rows to the rollups.
+
+    ``source`` is a query yielding day, category, subcategory and
+    amount_cents. Ordinary writes are covered by the triggers; this is for
+    rows moving between the main table and the archive (see partitions),
+    which must not change the totals.
+    """
+    upsert = """
+        ON CONFLICT ({key}, category, subcategory) DO UPDATE SET
+            total_cents = total_cents + excluded.total_cents,
+            count = count + excluded.count
+    """
+    return [
+        f"""
+        INSERT INTO expense_daily_totals (day, category, subcategory, total_cents, count)
+        SELECT day, category, subcategory, {sign} * SUM(amount_cents), {sign} * COUNT(*)
+        FROM ({source}) WHERE true
+        GROUP BY day, category, subcategory
+        """ + upsert.format(key="day"),
+        f"""
+        INSERT INTO expense_monthly_totals (month, category, subcategory, total_cents, count)
+        SELECT {MONTH_OF_DAY_SQL}, category, subcategory, {sign} * SUM(amount_cents), {sign} * COUNT(*)
+        FROM ({source}) WHERE true
+        GROUP BY 1, category, subcategory
+        """ + upsert.format(key="month"),
+    ]
+
+
+def build_consistency_query(tables: Sequence[str] = ("expenses",)) -> str:
+    """Query listing rollup rows that disagree with the raw rows in ``tables``"""
+    source = " UNION ALL ".join(f"SELECT day, category, subcategory, amount_cents FROM {t}" for t in tables)
+    return f"""
+WITH raw_daily AS (
+    SELECT day, category, subcategory, SUM(amount_cents) AS total_cents, COUNT(*) AS count
+    FROM ({source})
+    GROUP BY day, category, subcategory
+),
+raw_monthly AS (
+    SELECT {MONTH_OF_DAY_SQL} AS month, category, subcategory,
+           SUM(amount_cents) AS total_cents, COUNT(*) AS count
+    FROM ({source})
+    GROUP BY 1, category, subcategory
+),
+daily_diff AS (
+    SELECT 'daily' AS level, r.day AS period, r.category, r.subcategory,
+           r.total_cents AS expected_cents, d.total_cents AS rollup_cents,
+           r.count AS expected_count, d.count AS rollup_count
+    FROM raw_daily r
+    LEFT JOIN expense_daily_totals d
+      ON d.day = r.day AND d.category = r.category AND d.subcategory = r.subcategory
+    UNION ALL
+    SELECT 'daily', d.day, d.category, d.subcategory, NULL, d.total_cents, NULL, d.count
+    FROM expense_daily_totals d
+    WHERE NOT EXISTS (
+        SELECT 1 FROM raw_daily r
+        WHERE r.day = d.day AND r.category = d.category AND r.subcategory = d.subcategory
+    )
+),
+monthly_diff AS (
+    SELECT 'monthly' AS level, r.month AS period, r.category, r.subcategory,
+           r.total_cents AS expected_cents, m.total_cents AS rollup_cents,
+           r.count AS expected_count, m.count AS rollup_count
+    FROM raw_monthly r
+    LEFT JOIN expense_monthly_totals m
+      ON m.month = r.month AND m.category = r.category AND m.subcategory = r.subcategory
+    UNION ALL
+    SELECT 'monthly', m.month, m.category, m.subcategory, NULL, m.total_cents, NULL, m.count
+    FROM expense_monthly_totals m
+    WHERE NOT EXISTS (
+        SELECT 1 FROM raw_monthly r
+        WHERE r.month = m.month AND r.category = m.category AND r.subcategory = m.subcategory
+    )
+)
+SELECT * FROM (SELECT * FROM daily_diff UNION ALL SELECT * FROM monthly_diff)
+WHERE expected_count IS NOT rollup_count
+   OR expected_cents IS NOT rollup_cents
+"""
+
+
+CONSISTENCY_SQL = build_consistency_query()
+
+
+async def check_rollup_consistency(client) -> List[Dict[str, Any]]:
+    """Compare the rollup tables against the raw expenses, archived ones included.
+
+    Returns one entry per mismatched (period, category, subcategory); an
+    empty list means the rollups are consistent.
+    """
+    partitions = await client.partitions()
+    return await client.fetch_all(build_consistency_query(["expenses"] + [p.table for p in partitions]))
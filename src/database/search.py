@@ -0,0 +1,162 @@
+"""
+Full-text search over expense notes and subcategories.
+
+``expenses_fts`` (created by migration 6) is an FTS5 index kept in sync
+with ``expenses`` by triggers; every archive partition has its own. User input is never passed to MATCH as
+is: ``build_match_query`` rewrites it into quoted terms so punctuation
+in a merchant name cannot raise an FTS5 syntax error, while keeping
+phrases, trailing-``*`` prefixes and the OR / NOT operators.
+"""
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+from src.database.codec import EXPENSE_COLUMNS_SQL, date_to_day
+from src.database.partitions import Partition, overlapping
+
+# Column weights for bm25: a hit in the note counts more than one in the subcategory
+NOTE_WEIGHT = 1.0
+SUBCATEGORY_WEIGHT = 0.5
+
+_TOKEN = re.compile(r'"([^"]*)"?|(\S+)')
+_OPERATORS = ("OR", "NOT")
+
+
+def build_match_query(text: str) -> str:
+    """Turn a search box string into a safe FTS5 MATCH expression.
+
+    - words are matched as whole tokens; ``groc*`` matches by prefix
+    - ``"whole foods"`` matches the phrase
+    - ``OR`` and ``NOT`` (upper case) between terms are kept as operators;
+      terms are otherwise ANDed
+
+    Raises ValueError if nothing searchable is left.
+    """
+    parts: List[str] = []
+    for phrase, word in _TOKEN.findall(text or ""):
+        if word in _OPERATORS:
+            if parts and parts[-1] not in _OPERATORS:
+                parts.append(word)
+            continue
+        term = phrase if phrase else word
+        prefix = not phrase and term.endswith("*")
+        term = term.replace('"', "").rstrip("*").strip()
+        if not any(ch.isalnum() for ch in term):
+            continue
+        parts.append(f'"{term}"' + ("*" if prefix else ""))
+
+    while parts and parts[-1] in _OPERATORS:
+        parts.pop()
+    if not parts:
+        raise ValueError("Search query must contain at least one word")
+    return " ".join(parts)
+
+
+def _search_arm(
+    fts: str,
+    table: str,
+    filters: str,
+    filter_params: List[Any],
+    paged_in_index: bool,
+    after: Optional[List[Any]],
+    limit: Optional[int]
+) -> Tuple[str, List[Any]]:
+    """Ranked matches from one FTS index joined to its table (aliased ``expenses``)"""
+    index = fts.rpartition(".")[2]
+    params: List[Any] = []
+    matches = f"""
+            SELECT rowid AS pk, bm25({index}, {NOTE_WEIGHT}, {SUBCATEGORY_WEIGHT}) AS score
+            FROM {fts}
+            WHERE {index} MATCH ?
+    """
+
+    if paged_in_index:
+        # No row filters: page inside the index so only one page is joined
+        if after is not None:
+            matches = f"SELECT * FROM ({matches}) WHERE (score, pk) > (?, ?)"
+            params.extend(after)
+        matches += " ORDER BY score, pk"
+        if limit is not None:
+            matches += " LIMIT ?"
+            params.append(limit)
+        query = f"""
+            SELECT {EXPENSE_COLUMNS_SQL}, m.score, m.pk
+            FROM ({matches}) AS m
+            JOIN {table} AS expenses ON expenses.pk = m.pk
+            ORDER BY m.score, m.pk
+        """
+        return query, params
+
+    query = f"""
+        SELECT {EXPENSE_COLUMNS_SQL}, m.score, m.pk
+        FROM ({matches}) AS m
+        JOIN {table} AS expenses ON expenses.pk = m.pk
+        WHERE 1{filters}
+    """
+    params.extend(filter_params)
+    if after is not None:
+        query += " AND (m.score, m.pk) > (?, ?)"
+        params.extend(after)
+
+    query += " ORDER BY m.score, m.pk"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+
+def build_search_query(
+    text: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    after: Optional[List[Any]] = None,
+    limit: Optional[int] = None,
+    partitions: Sequence[Partition] = ()
+) -> Tuple[str, tuple]:
+    """Build a ranked search query, best match first.
+
+    Rows are ordered by (score, pk), where score is bm25 (lower is
+    better); ``after`` is the (score, pk) of the last row of the previous
+    page. Archive ``partitions`` overlapping the date range are searched
+    through their own indexes. bm25 weighs terms by how common they are
+    in each index, so archived matches rank close to, not exactly as, a
+    single index would. Raises ValueError for malformed dates or an empty
+    search.
+    """
+    match = build_match_query(text)
+    filters = ""
+    filter_params: List[Any] = []
+    start_day = end_day = None
+    if start_date:
+        start_day = date_to_day(start_date)
+        filters += " AND day >= ?"
+        filter_params.append(start_day)
+    if end_date:
+        end_day = date_to_day(end_date)
+        filters += " AND day <= ?"
+        filter_params.append(end_day)
+    if category:
+        filters += " AND category = ?"
+        filter_params.append(category)
+
+    sources = [("expenses_fts", "expenses")]
+    sources += [(p.fts_table, p.table) for p in overlapping(partitions, start_day, end_day)]
+    paged_in_index = not (start_date or end_date or category)
+
+    arms = []
+    params: List[Any] = []
+    for fts, table in sources:
+        arm, arm_params = _search_arm(fts, table, filters, filter_params, paged_in_index, after, limit)
+        arms.append(arm)
+        params.append(match)
+        params.extend(arm_params)
+    if len(arms) == 1:
+        return arms[0], tuple(params)
+
+    # Every arm is already ranked and cut to one page; merge them
+    query = " UNION ALL ".join(f"SELECT * FROM ({arm})" for arm in arms)
+    query = f"SELECT * FROM ({query}) ORDER BY score, pk"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, tuple(params)
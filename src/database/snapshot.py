@@ -0,0 +1,353 @@
+"""
+Columnar, NumPy-backed snapshot of the expenses table for analytics.
+
+Each organization's expenses are held as parallel arrays: day numbers as
+int32, amounts as int64 cents, and categories and notes as int32 codes
+into per-snapshot dictionaries. Trend, percentile and top-N queries are
+boolean masks and ``bincount`` over those arrays instead of row-by-row
+Python.
+
+Archived expenses (see ``partitions``) are part of the snapshot; moving
+rows into the archive is not a change, so it does not trigger a refresh.
+
+Snapshots are immutable. A refresh reads the change log
+(``expense_changes``) past the snapshot's watermark, re-reads only the
+changed rows and builds a new snapshot, so callers holding the old one
+are unaffected. Changed rows are read in the same read transaction as the
+new watermark, and replaying a change is idempotent, so a write racing a
+refresh is at worst applied again by the next one.
+"""
+import asyncio
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.database.codec import day_to_date
+from src.database.partitions import attach_archive, expense_tables, load_partitions
+from src.database.sqlite_client import CHANGE_SEQ_SQL, db
+from src.utils.tenancy import current_org
+
+
+# Reload everything instead of patching when this share of rows changed
+FULL_RELOAD_RATIO = 0.25
+# SQLite's default limit on host parameters is 32766; stay well below it
+PK_CHUNK = 900
+
+SNAPSHOT_COLUMNS_SQL = "pk, day, amount_cents, category, lower(trim(note))"
+
+
+class ExpenseSnapshot:
+    """Immutable columnar copy of one organization's expenses"""
+
+    def __init__(
+        self,
+        watermark: int,
+        pk: np.ndarray,
+        day: np.ndarray,
+        cents: np.ndarray,
+        category: np.ndarray,
+        note: np.ndarray,
+        categories: List[str],
+        notes: List[str]
+    ):
+        self.watermark = watermark
+        self.pk = pk
+        self.day = day
+        self.cents = cents
+        self.category = category
+        self.note = note
+        self.categories = categories
+        self.notes = notes
+        self._category_codes = {name: code for code, name in enumerate(categories)}
+        self._note_codes = {name: code for code, name in enumerate(notes)}
+
+    def __len__(self) -> int:
+        return len(self.pk)
+
+    @classmethod
+    def from_rows(
+        cls,
+        watermark: int,
+        rows: Sequence[Tuple],
+        base: Optional["ExpenseSnapshot"] = None
+    ) -> "ExpenseSnapshot":
+        """Build a snapshot from ``(pk, day, cents, category, note)`` rows.
+
+        With ``base``, the rows are appended to it and its dictionaries are
+        extended, so existing codes stay valid.
+        """
+        categories = list(base.categories) if base else []
+        notes = list(base.notes) if base else []
+        category_codes = dict(base._category_codes) if base else {}
+        note_codes = dict(base._note_codes) if base else {}
+
+        def encode(values, codes, names):
+            out = np.empty(len(values), dtype=np.int32)
+            for i, value in enumerate(values):
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(names)
+                    names.append(value)
+                out[i] = code
+            return out
+
+        if rows:
+            pk, day, cents, category, note = zip(*rows)
+        else:
+            pk = day = cents = category = note = ()
+        columns = (
+            np.array(pk, dtype=np.int64),
+            np.array(day, dtype=np.int32),
+            np.array(cents, dtype=np.int64),
+            encode(category, category_codes, categories),
+            encode([n or "" for n in note], note_codes, notes),
+        )
+        if base is not None:
+            columns = tuple(
+                np.concatenate((old, new))
+                for old, new in zip((base.pk, base.day, base.cents, base.category, base.note), columns)
+            )
+        return cls(watermark, *columns, categories, notes)
+
+    def without(self, pks: np.ndarray) -> "ExpenseSnapshot":
+        """Copy of this snapshot without the given primary keys"""
+        keep = ~np.isin(self.pk, pks)
+        return ExpenseSnapshot(
+            self.watermark, self.pk[keep], self.day[keep], self.cents[keep],
+            self.category[keep], self.note[keep], self.categories, self.notes
+        )
+
+    def mask(self, start_day: int, end_day: int, category: Optional[str] = None) -> np.ndarray:
+        """Boolean mask of rows in an inclusive day range and optional category"""
+        selected = (self.day >= start_day) & (self.day <= end_day)
+        if category:
+            code = self._category_codes.get(category)
+            if code is None:
+                return np.zeros(len(self.pk), dtype=bool)
+            selected &= self.category == code
+        return selected
+
+    def trends(
+        self,
+        start_day: int,
+        end_day: int,
+        granularity: str,
+        category: Optional[str] = None,
+        rolling_window: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Totals per week or month over the range, empty periods included.
+
+        Weeks start on Monday and are labelled with that Monday's date;
+        months are labelled YYYY-MM.
+        """
+        selected = self.mask(start_day, end_day, category)
+        days = self.day[selected]
+        if granularity == "week":
+            first, last = (start_day + 3) // 7, (end_day + 3) // 7
+            buckets = (days + 3) // 7
+        else:
+            first, last = _month_index(start_day), _month_index(end_day)
+            buckets = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        if last < first:
+            return []
+
+        index = buckets - first
+        size = last - first + 1
+        totals = np.bincount(index, weights=self.cents[selected], minlength=size)[:size]
+        counts = np.bincount(index, minlength=size)[:size]
+
+        rolling = None
+        if rolling_window > 1:
+            sums = np.cumsum(totals)
+            sums[rolling_window:] = sums[rolling_window:] - sums[:-rolling_window]
+            rolling = sums / rolling_window
+
+        periods = []
+        for i in range(size):
+            bucket = first + i
+            if granularity == "week":
+                label = day_to_date(bucket * 7 - 3)
+            else:
+                label = f"{1970 + bucket // 12:04d}-{bucket % 12 + 1:02d}"
+            period = {"period": label, "total": round(float(totals[i]) / 100, 2), "count": int(counts[i])}
+            if rolling is not None:
+                period["rolling_average"] = round(float(rolling[i]) / 100, 2) if i >= rolling_window - 1 else None
+            periods.append(period)
+        return periods
+
+    def percentiles(
+        self,
+        start_day: int,
+        end_day: int,
+        percentiles: Sequence[float],
+        category: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Amount percentiles over the range, overall and per category"""
+        selected = self.mask(start_day, end_day, category)
+        cents = self.cents[selected]
+        codes = self.category[selected]
+
+        def describe(values: np.ndarray) -> Dict[str, Any]:
+            result: Dict[str, Any] = {"count": int(len(values))}
+            points = np.percentile(values, percentiles) if len(values) else [None] * len(percentiles)
+            for p, value in zip(percentiles, points):
+                result[f"p{p:g}"] = None if value is None else round(float(value) / 100, 2)
+            return result
+
+        by_category = []
+        if len(cents):
+            # One sort groups rows by category; each group is then a slice
+            order = np.argsort(codes, kind="stable")
+            sorted_codes = codes[order]
+            sorted_cents = cents[order]
+            boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+            for group_codes, group_cents in zip(
+                np.split(sorted_codes, boundaries), np.split(sorted_cents, boundaries)
+            ):
+                entry = {"category": self.categories[group_codes[0]]}
+                entry.update(describe(group_cents))
+                by_category.append(entry)
+            by_category.sort(key=lambda entry: entry["count"], reverse=True)
+        return describe(cents), by_category
+
+    def top_notes(
+        self,
+        start_day: int,
+        end_day: int,
+        limit: int,
+        by: str = "total",
+        category: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Most frequent or highest-spend notes (merchants) in the range"""
+        selected = self.mask(start_day, end_day, category)
+        empty = self._note_codes.get("")
+        if empty is not None:
+            selected &= self.note != empty
+        codes = self.note[selected]
+        totals = np.bincount(codes, weights=self.cents[selected], minlength=len(self.notes))
+        counts = np.bincount(codes, minlength=len(self.notes))
+
+        ranking = totals if by == "total" else counts
+        limit = min(limit, int(np.count_nonzero(counts)))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-ranking, limit - 1)[:limit]
+        top = top[np.lexsort((top, -ranking[top]))]
+        return [
+            {
+                "note": self.notes[code],
+                "total": round(float(totals[code]) / 100, 2),
+                "count": int(counts[code]),
+                "average": round(float(totals[code]) / int(counts[code]) / 100, 2),
+            }
+            for code in top
+        ]
+
+
+def _month_index(day: int) -> int:
+    """Months since 1970-01 for a day number"""
+    return int(np.datetime64(day, "D").astype("datetime64[M]").astype(np.int64))
+
+
+def read_snapshot(path: str, base: Optional[ExpenseSnapshot]) -> Tuple[ExpenseSnapshot, bool]:
+    """Build a fresh snapshot of the database at ``path`` (runs in a thread or worker process).
+
+    Returns the snapshot and whether it was patched from ``base`` rather
+    than reloaded.
+    """
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        attach_archive(conn, path)
+        # One read transaction so the watermark and the rows agree
+        conn.execute("BEGIN")
+        watermark = conn.execute(CHANGE_SEQ_SQL).fetchone()[0]
+        tables = expense_tables(load_partitions(conn))
+
+        if base is not None:
+            oldest = conn.execute("SELECT MIN(seq) FROM expense_changes").fetchone()[0]
+            pruned_past_us = oldest is not None and oldest > base.watermark + 1
+            if watermark < base.watermark or pruned_past_us:
+                base = None
+
+        if base is not None:
+            changed = [row[0] for row in conn.execute(
+                "SELECT DISTINCT pk FROM expense_changes WHERE seq > ?", (base.watermark,)
+            )]
+            if len(changed) <= max(len(base), 1) * FULL_RELOAD_RATIO:
+                rows = []
+                for i in range(0, len(changed), PK_CHUNK):
+                    chunk = changed[i:i + PK_CHUNK]
+                    # A changed row may have been archived since
+                    for table in tables:
+                        rows.extend(conn.execute(
+                            f"SELECT {SNAPSHOT_COLUMNS_SQL} FROM {table} "
+                            f"WHERE pk IN ({', '.join('?' * len(chunk))})",
+                            chunk
+                        ))
+                # Deleted rows are simply not re-read; updated rows replace the old copy
+                snapshot = ExpenseSnapshot.from_rows(
+                    watermark, rows, base.without(np.array(changed, dtype=np.int64))
+                )
+                return snapshot, True
+
+        rows = conn.execute(
+            " UNION ALL ".join(f"SELECT {SNAPSHOT_COLUMNS_SQL} FROM {table}" for table in tables)
+        ).fetchall()
+        return ExpenseSnapshot.from_rows(watermark, rows), False
+    finally:
+        conn.close()
+
+
+class SnapshotStore:
+    """Latest snapshot per organization, refreshed when the change log moves"""
+
+    def __init__(self):
+        self._snapshots: Dict[str, ExpenseSnapshot] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.full_loads = 0
+        self.incremental_loads = 0
+
+    async def get(self) -> ExpenseSnapshot:
+        """Current organization's snapshot, refreshed if the table has changed"""
+        org = current_org()
+        snapshot = self._snapshots.get(org)
+        watermark = await db.change_seq()
+        if snapshot is not None and snapshot.watermark == watermark:
+            return snapshot
+
+        lock = self._locks.setdefault(org, asyncio.Lock())
+        async with lock:
+            snapshot = self._snapshots.get(org)
+            if snapshot is not None and snapshot.watermark >= watermark:
+                return snapshot
+            fresh, incremental = await asyncio.to_thread(read_snapshot, db.path_for(org), snapshot)
+            if incremental:
+                self.incremental_loads += 1
+            else:
+                self.full_loads += 1
+            self._snapshots[org] = fresh
+            return fresh
+
+    def drop(self, org: str):
+        """Forget ``org``'s snapshot; called when its database shard is closed"""
+        self._snapshots.pop(org, None)
+        lock = self._locks.get(org)
+        if lock is not None and not lock.locked():
+            del self._locks[org]
+
+    def clear(self):
+        self._snapshots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "organizations": len(self._snapshots),
+            "rows": sum(len(s) for s in self._snapshots.values()),
+            "full_loads": self.full_loads,
+            "incremental_loads": self.incremental_loads,
+        }
+
+
+# Global snapshot store instance
+snapshots = SnapshotStore()
+db.add_evict_listener(snapshots.drop)
@@ -1,80 +1,671 @@
 import aiosqlite
-import sqlite3
+import asyncio
 import os
-from typing import Any, List, Dict, Optional
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Dict, Optional, Tuple
 from src.config.settings import settings
+from src.database.migrations import LATEST_VERSION, ensure_schema, run_migrations
+from src.database.partitions import ARCHIVE_SCHEMA, PARTITIONS_SQL, Partition, archive_path, compact
+from src.database.write_batcher import WriteBatcher
+from src.utils.metrics import metrics, record_query
+from src.utils.tenancy import DEFAULT_ORG, current_org, org_scope, validate_org_id
+
+
+# Writer connection of the transaction opened by ``SQLiteClient.transaction``
+# in the current task, if any
+_transaction_conn: ContextVar[Optional[aiosqlite.Connection]] = ContextVar("sqlite_transaction", default=None)
+
+
+# Latest change log entry; every committed write adds one (see migration 5)
+CHANGE_SEQ_SQL = "SELECT COALESCE(MAX(seq), 0) AS seq FROM expense_changes"
+
+
+class QueryResult:
+    """Outcome of a write statement"""
+
+    def __init__(self, lastrowid, rowcount):
+        self.last_insert_rowid = lastrowid
+        self.rows_affected = rowcount
 
 
 class SQLiteClient:
-    """Async SQLite database client for expense tracker using aiosqlite"""
+    """Async SQLite database client for expense tracker using aiosqlite.
 
-    def __init__(self):
+    Connections are opened lazily on first use and kept for the lifetime of
+    the process: one writer connection serialised by a lock, plus a pool of
+    read-only reader connections. Pragmas are applied once when each
+    connection is opened. Call ``close()`` on shutdown.
+
+    When write batching is enabled, ``execute`` goes through a
+    ``WriteBatcher`` that group-commits concurrent writes.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, write_batching: Optional[bool] = None):
         """Initialize SQLite client with database path from settings"""
-        self.db_path = settings.database_path
+        self.db_path = db_path or settings.database_path
+        self.reader_pool_size = max(1, settings.db_reader_pool_size)
         # Ensure database directory exists
         os.makedirs(os.path.dirname(self.db_path) if os.path.dirname(self.db_path) else '.', exist_ok=True)
 
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._reader_queue: Optional[asyncio.Queue] = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self._schema_ready = False
+        self._partitions: Optional[Tuple[tuple, List[Partition]]] = None
+        self._batcher: Optional[WriteBatcher] = None
+        if settings.db_write_batching if write_batching is None else write_batching:
+            self._batcher = WriteBatcher(
+                self,
+                max_batch_size=settings.db_write_batch_max_size,
+                max_delay_ms=settings.db_write_batch_max_delay_ms,
+            )
+
+    def _pragmas(self, read_only: bool) -> List[str]:
+        """Per-connection pragmas applied once at open"""
+        pragmas = [
+            f"PRAGMA busy_timeout = {int(settings.db_busy_timeout_ms)}",
+            f"PRAGMA cache_size = {int(settings.db_cache_size)}",
+            f"PRAGMA mmap_size = {int(settings.db_mmap_size)}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+        if read_only:
+            pragmas.append("PRAGMA query_only = ON")
+        else:
+            pragmas.insert(0, f"PRAGMA journal_mode = {settings.db_journal_mode}")
+            pragmas.append(f"PRAGMA synchronous = {settings.db_synchronous}")
+        return pragmas
+
+    async def _open_connection(self, read_only: bool) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path)
+        for pragma in self._pragmas(read_only):
+            await conn.execute(pragma)
+        # Attached after the pragmas: journal_mode without a schema name would
+        # apply to every attached database
+        await conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (archive_path(self.db_path),))
+        if not read_only:
+            await conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode = {settings.db_journal_mode}")
+            await conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.synchronous = {settings.db_synchronous}")
+        return conn
+
+    async def connect(self):
+        """Open the writer and reader connections if not already open"""
+        if self._writer is not None:
+            return
+        async with self._open_lock:
+            if self._writer is not None:
+                return
+            # The writer goes first so the file exists and journal_mode is set
+            writer = await self._open_connection(read_only=False)
+            readers = []
+            try:
+                for _ in range(self.reader_pool_size):
+                    readers.append(await self._open_connection(read_only=True))
+            except Exception:
+                for conn in readers:
+                    await conn.close()
+                await writer.close()
+                raise
+
+            queue = asyncio.Queue()
+            for conn in readers:
+                queue.put_nowait(conn)
+            self._readers = readers
+            self._reader_queue = queue
+            self._writer = writer
+
+    async def close(self):
+        """Flush pending writes and close all pooled connections"""
+        if self._batcher is not None:
+            await self._batcher.close()
+        async with self._open_lock:
+            writer, readers = self._writer, self._readers
+            self._writer = None
+            self._readers = []
+            self._reader_queue = None
+            for conn in readers:
+                await conn.close()
+            if writer is not None:
+                await writer.close()
+
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        await self.connect()
+        return await self._reader_queue.get()
+
+    def _release_reader(self, conn: aiosqlite.Connection):
+        if self._reader_queue is not None and conn in self._readers:
+            self._reader_queue.put_nowait(conn)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the enclosed calls in a single write transaction.
+
+        The writer is held for the whole block. ``execute``, ``executemany``
+        and ``fetch_all`` calls made from the current task use it without
+        committing, so reads see the block's own writes. Commits when the
+        block exits normally and rolls back if it raises. Nested blocks join
+        the outer transaction.
+        """
+        if _transaction_conn.get() is not None:
+            yield
+            return
+
+        await self.connect()
+        async with self._write_lock:
+            conn = self._writer
+            await conn.execute("BEGIN IMMEDIATE")
+            token = _transaction_conn.set(conn)
+            try:
+                yield
+            except BaseException:
+                await conn.rollback()
+                raise
+            else:
+                try:
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+            finally:
+                _transaction_conn.reset(token)
+
     async def execute(self, query: str, params: Optional[tuple] = None) -> Any:
         """Execute a query asynchronously and return result info"""
+        started = time.perf_counter()
         try:
-            async with aiosqlite.connect(self.db_path) as conn:
+            await self.connect()
+            conn = _transaction_conn.get()
+            if conn is not None:
                 cursor = await conn.execute(query, params or ())
-                await conn.commit()
+                result = QueryResult(cursor.lastrowid, cursor.rowcount)
+            elif self._batcher is not None:
+                result = await self._batcher.submit(query, params)
+            else:
+                async with self._write_lock:
+                    try:
+                        cursor = await self._writer.execute(query, params or ())
+                        await self._writer.commit()
+                    except Exception:
+                        await self._writer.rollback()
+                        raise
+                result = QueryResult(cursor.lastrowid, cursor.rowcount)
+        except Exception as e:
+            if metrics.enabled:
+                record_query("execute", query, started, failed=True)
+            raise Exception(f"Database error: {str(e)}")
 
-                # Create result object with attributes
-                class Result:
-                    def __init__(self, lastrowid, rowcount):
-                        self.last_insert_rowid = lastrowid
-                        self.rows_affected = rowcount
+        if metrics.enabled:
+            record_query("execute", query, started)
+        return result
 
-                result = Result(cursor.lastrowid, cursor.rowcount)
-                return result
+    async def executemany(self, query: str, params_seq: Iterable[tuple]) -> Any:
+        """Execute a statement for every parameter tuple in one transaction.
+
+        Bypasses the write batcher since the caller already supplies a batch.
+        """
+        started = time.perf_counter()
+        try:
+            await self.connect()
+            conn = _transaction_conn.get()
+            if conn is not None:
+                cursor = await conn.executemany(query, params_seq)
+            else:
+                async with self._write_lock:
+                    try:
+                        cursor = await self._writer.executemany(query, params_seq)
+                        await self._writer.commit()
+                    except Exception:
+                        await self._writer.rollback()
+                        raise
         except Exception as e:
+            if metrics.enabled:
+                record_query("executemany", query, started, failed=True)
             raise Exception(f"Database error: {str(e)}")
 
+        if metrics.enabled:
+            record_query("executemany", query, started)
+        return QueryResult(cursor.lastrowid, cursor.rowcount)
+
     async def fetch_all(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """Execute query asynchronously and return all results as list of dicts"""
+        columns, rows = await self.fetch_columns(query, params)
+        # Convert row tuples to dictionaries
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def fetch_columns(self, query: str, params: Optional[tuple] = None) -> Tuple[List[str], List[tuple]]:
+        """Execute query asynchronously and return the column names and the row tuples"""
+        started = time.perf_counter()
         try:
-            async with aiosqlite.connect(self.db_path) as conn:
-                conn.row_factory = aiosqlite.Row
+            conn = _transaction_conn.get() or await self._acquire_reader()
+            try:
                 cursor = await conn.execute(query, params or ())
                 rows = await cursor.fetchall()
+                columns = [d[0] for d in cursor.description]
+                await cursor.close()
+            finally:
+                self._release_reader(conn)
+        except Exception as e:
+            if metrics.enabled:
+                record_query("fetch", query, started, failed=True)
+            raise Exception(f"Database error: {str(e)}")
 
-                # Convert Row objects to dictionaries
-                results = [dict(row) for row in rows]
-                return results
+        if metrics.enabled:
+            record_query("fetch", query, started, len(rows))
+        return columns, rows
+
+    async def iter_rows(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        fetch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield rows as dicts, fetching ``fetch_size`` rows per round trip.
+
+        A reader connection is held until the generator is exhausted or closed.
+        """
+        fetch_size = fetch_size or settings.stream_fetch_size
+        started = time.perf_counter()
+        try:
+            conn = await self._acquire_reader()
         except Exception as e:
+            if metrics.enabled:
+                record_query("stream", query, started, failed=True)
             raise Exception(f"Database error: {str(e)}")
+        count = 0
+        failed = False
+        try:
+            cursor = await conn.execute(query, params or ())
+            try:
+                columns = [d[0] for d in cursor.description]
+                while True:
+                    rows = await cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    count += len(rows)
+                    for row in rows:
+                        yield dict(zip(columns, row))
+            finally:
+                await cursor.close()
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._release_reader(conn)
+            if metrics.enabled:
+                # Includes the time the consumer spent between batches
+                record_query("stream", query, started, count, failed)
 
     async def fetch_one(self, query: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
         """Execute query asynchronously and return first result as dict"""
         results = await self.fetch_all(query, params)
         return results[0] if results else None
 
-    def init_schema(self):
-        """Initialize database schema (synchronous for startup)"""
-        schema_sql = """
-        CREATE TABLE IF NOT EXISTS expenses (
-            id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
-            date TEXT NOT NULL,
-            amount REAL NOT NULL,
-            category TEXT NOT NULL,
-            subcategory TEXT DEFAULT '',
-            note TEXT DEFAULT '',
-            created_at TEXT DEFAULT (datetime('now')),
-            updated_at TEXT DEFAULT (datetime('now'))
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
-        CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(category);
+    async def change_seq(self) -> int:
+        """Sequence number of the latest write in the change log (0 if none)"""
+        row = await self.fetch_one(CHANGE_SEQ_SQL)
+        return row["seq"]
+
+    def _archive_identity(self) -> tuple:
+        identity = []
+        for path in (archive_path(self.db_path), archive_path(self.db_path) + "-wal"):
+            try:
+                st = os.stat(path)
+                identity.append((st.st_ino, st.st_size, st.st_mtime_ns))
+            except FileNotFoundError:
+                identity.append(None)
+        return tuple(identity)
+
+    async def partitions(self) -> List[Partition]:
+        """Live archive partitions, newest first.
+
+        Every change to the catalog also writes the archive in the same
+        transaction (which SQLite commits after the main database), so the
+        list is cached until the archive or its WAL changes on disk.
+        """
+        if _transaction_conn.get() is not None:
+            return [Partition(**row) for row in await self.fetch_all(PARTITIONS_SQL)]
+        identity = self._archive_identity()
+        if self._partitions is None or self._partitions[0] != identity:
+            partitions = [Partition(**row) for row in await self.fetch_all(PARTITIONS_SQL)]
+            self._partitions = (identity, partitions)
+        return self._partitions[1]
+
+    async def compact_partitions(self, hot_years: Optional[int] = None, today=None) -> Dict[str, Any]:
+        """Move closed years into the archive (see ``partitions.compact``)"""
+        hot_years = settings.partition_hot_years if hot_years is None else hot_years
+        return await compact(self, hot_years, today)
+
+    def init_schema(self) -> int:
+        """Migrate the database to the latest schema version (synchronous for startup)"""
+        return run_migrations(self.db_path)
+
+    async def ensure_schema(self, check_write: bool = False) -> int:
+        """Check and migrate the schema once per process, off the event loop.
+
+        Meant for server lifespan hooks; a current stamp file makes this a
+        single small file read.
+        """
+        if self._schema_ready:
+            return LATEST_VERSION
+        version = await asyncio.to_thread(ensure_schema, self.db_path, check_write)
+        self._schema_ready = True
+        return version
+
+
+class _Shard:
+    __slots__ = ("org", "client", "in_use", "last_used")
+
+    def __init__(self, org: str, client: SQLiteClient):
+        self.org = org
+        self.client = client
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class ShardedClient:
+    """Routes each call to the current organization's own database.
+
+    The default organization uses ``settings.database_path``; every other
+    organization gets ``<shard_directory>/<org>.db``, created and migrated
+    the first time it is used. Each shard is a full ``SQLiteClient`` with
+    its own writer, so tenants never wait on each other's write lock.
+
+    At most ``max_open`` shards stay open. The least recently used idle
+    shard is closed when a new one is opened, and shards idle longer than
+    ``idle_seconds`` are closed in the background. A shard with calls in
+    flight is never closed. Opening a shard (migrations, pool creation)
+    only makes callers for that organization wait; concurrent first calls
+    for it share the one open.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        shard_directory: Optional[str] = None,
+        max_open: Optional[int] = None,
+        idle_seconds: Optional[float] = None
+    ):
+        self.db_path = db_path or settings.database_path
+        self.shard_directory = shard_directory or settings.shard_directory or os.path.join(
+            os.path.dirname(self.db_path) or ".", "shards"
+        )
+        self.max_open = max(1, max_open or settings.shard_max_open)
+        self.idle_seconds = settings.shard_idle_seconds if idle_seconds is None else idle_seconds
+        self._shards: "OrderedDict[str, _Shard]" = OrderedDict()
+        self._opening: Dict[str, "asyncio.Future[_Shard]"] = {}
+        self._evict_lock = asyncio.Lock()
+        self._last_sweep = time.monotonic()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._write_listeners: List[Callable[[str], None]] = []
+        self._evict_listeners: List[Callable[[str], None]] = []
+        self.opened = 0
+        self.evicted = 0
+
+    def path_for(self, org: str) -> str:
+        if org == DEFAULT_ORG:
+            return self.db_path
+        return os.path.join(self.shard_directory, f"{validate_org_id(org)}.db")
+
+    async def _open(self, org: str) -> _Shard:
+        client = SQLiteClient(self.path_for(org))
+        await client.ensure_schema()
+        await client.connect()
+        self.opened += 1
+        shard = _Shard(org, client)
+        self._shards[org] = shard
+        return shard
+
+    def _opened(self, org: str, opening: "asyncio.Future[_Shard]"):
+        if self._opening.get(org) is opening:
+            del self._opening[org]
+        if not opening.cancelled():
+            # Waiters re-raise a failed open; mark it retrieved even if none are left
+            opening.exception()
+
+    async def _acquire(self, org: Optional[str] = None) -> _Shard:
+        org = org or current_org()
+        shard = self._shards.get(org)
+        opened = False
+        while shard is None:
+            opening = self._opening.get(org)
+            if opening is None or opening.done():
+                opening = asyncio.ensure_future(self._open(org))
+                self._opening[org] = opening
+                opening.add_done_callback(lambda done, org=org: self._opened(org, done))
+            # Shielded so a cancelled caller does not abort the open for the others
+            await asyncio.shield(opening)
+            # Evicted again before this caller resumed: open it once more
+            shard = self._shards.get(org)
+            opened = True
+        shard.in_use += 1
+        shard.last_used = time.monotonic()
+        self._shards.move_to_end(org)
+        if opened and len(self._shards) > self.max_open:
+            async with self._evict_lock:
+                # Only idle shards are closed, so this can briefly exceed max_open
+                await self._evict(over_capacity_only=True)
+
+        if self.idle_seconds and shard.last_used - self._last_sweep > self.idle_seconds / 4:
+            self._last_sweep = shard.last_used
+            if self._sweeper is None or self._sweeper.done():
+                self._sweeper = asyncio.create_task(self._sweep())
+        return shard
+
+    def _release(self, shard: _Shard):
+        shard.in_use -= 1
+        shard.last_used = time.monotonic()
+
+    async def _evict(self, over_capacity_only: bool = False):
+        """Close idle shards, least recently used first"""
+        now = time.monotonic()
+        victims = []
+        open_count = len(self._shards)
+        for org, shard in self._shards.items():
+            if shard.in_use:
+                continue
+            over_capacity = open_count - len(victims) > self.max_open
+            expired = not over_capacity_only and self.idle_seconds and now - shard.last_used > self.idle_seconds
+            if over_capacity or expired:
+                victims.append(org)
+        # Unlink every victim before the first await: once closing starts,
+        # a concurrent _acquire could otherwise pick up a later victim
+        closing = [self._shards.pop(org) for org in victims]
+        self.evicted += len(closing)
+        for shard in closing:
+            for listener in self._evict_listeners:
+                listener(shard.org)
+            await shard.client.close()
+
+    async def _sweep(self):
+        async with self._evict_lock:
+            await self._evict()
+
+    def add_write_listener(self, listener: Callable[[str], None]):
+        """Call ``listener(org)`` after every write through this client.
+
+        Listeners must be cheap and must not raise; they run on the event
+        loop right after the write returns. Inside ``transaction()`` they
+        also run once more after the commit.
+        """
+        self._write_listeners.append(listener)
+
+    def add_evict_listener(self, listener: Callable[[str], None]):
+        """Call ``listener(org)`` when an organization's shard is closed as idle.
+
+        Lets per-organization state kept outside the database be released
+        along with the shard; the same rules as write listeners apply.
+        """
+        self._evict_listeners.append(listener)
+
+    def _notify_write(self, org: str):
+        for listener in self._write_listeners:
+            listener(org)
+
+    async def execute(self, query: str, params: Optional[tuple] = None) -> Any:
+        shard = await self._acquire()
+        try:
+            result = await shard.client.execute(query, params)
+        finally:
+            self._release(shard)
+        self._notify_write(shard.org)
+        return result
+
+    async def executemany(self, query: str, params_seq: Iterable[tuple]) -> Any:
+        shard = await self._acquire()
+        try:
+            result = await shard.client.executemany(query, params_seq)
+        finally:
+            self._release(shard)
+        self._notify_write(shard.org)
+        return result
+
+    async def fetch_all(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        shard = await self._acquire()
+        try:
+            return await shard.client.fetch_all(query, params)
+        finally:
+            self._release(shard)
+
+    async def fetch_columns(self, query: str, params: Optional[tuple] = None) -> Tuple[List[str], List[tuple]]:
+        shard = await self._acquire()
+        try:
+            return await shard.client.fetch_columns(query, params)
+        finally:
+            self._release(shard)
+
+    async def fetch_one(self, query: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        results = await self.fetch_all(query, params)
+        return results[0] if results else None
+
+    async def iter_rows(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        fetch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        shard = await self._acquire()
+        try:
+            async for row in shard.client.iter_rows(query, params, fetch_size):
+                yield row
+        finally:
+            self._release(shard)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """``SQLiteClient.transaction`` on the current organization's shard"""
+        shard = await self._acquire()
+        try:
+            async with shard.client.transaction():
+                yield
+        finally:
+            self._release(shard)
+        self._notify_write(shard.org)
+
+    async def change_seq(self) -> int:
+        """``SQLiteClient.change_seq`` for the current organization"""
+        row = await self.fetch_one(CHANGE_SEQ_SQL)
+        return row["seq"]
+
+    async def partitions(self) -> List[Partition]:
+        """``SQLiteClient.partitions`` for the current organization"""
+        shard = await self._acquire()
+        try:
+            return await shard.client.partitions()
+        finally:
+            self._release(shard)
+
+    async def compact_partitions(self, hot_years: Optional[int] = None, today=None) -> Dict[str, Any]:
+        """``SQLiteClient.compact_partitions`` for the current organization"""
+        shard = await self._acquire()
+        try:
+            return await shard.client.compact_partitions(hot_years, today)
+        finally:
+            self._release(shard)
+
+    def init_schema(self) -> int:
+        """Migrate the default organization's database (synchronous for startup)"""
+        return run_migrations(self.db_path)
+
+    async def ensure_schema(self, check_write: bool = False) -> int:
+        """Check the default organization's schema; other shards are checked when opened"""
+        shard = await self._acquire(DEFAULT_ORG)
+        try:
+            return await shard.client.ensure_schema(check_write)
+        finally:
+            self._release(shard)
+
+    async def connect(self):
+        """Open the default organization's database"""
+        self._release(await self._acquire(DEFAULT_ORG))
+
+    async def close(self):
+        """Close every open shard"""
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._opening:
+            await asyncio.gather(*self._opening.values(), return_exceptions=True)
+        async with self._evict_lock:
+            shards = list(self._shards.values())
+            self._shards.clear()
+            for shard in shards:
+                await shard.client.close()
+
+    def organizations(self) -> List[str]:
+        """Every organization with a database, the default one first"""
+        orgs = [DEFAULT_ORG]
+        try:
+            names = sorted(os.listdir(self.shard_directory))
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            org, ext = os.path.splitext(name)
+            if ext == ".db" and org != DEFAULT_ORG:
+                try:
+                    orgs.append(validate_org_id(org))
+                except ValueError:
+                    continue
+        return orgs
+
+    async def fan_out(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        orgs: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Run ``fn`` once per organization, concurrently, each in its own org scope.
+
+        At most ``max_open`` organizations run at once so a fan-out over many
+        tenants does not thrash the shard LRU.
         """
+        orgs = self.organizations() if orgs is None else orgs
+        limit = asyncio.Semaphore(self.max_open)
+
+        async def run(org: str):
+            async with limit:
+                with org_scope(org):
+                    return await fn()
+
+        results = await asyncio.gather(*(run(org) for org in orgs))
+        return dict(zip(orgs, results))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "open": len(self._shards),
+            "max_open": self.max_open,
+            "opened": self.opened,
+            "evicted": self.evicted,
+            "in_use": {org: shard.in_use for org, shard in self._shards.items() if shard.in_use},
+        }
 
-        # Use synchronous sqlite3 for schema initialization
-        conn = sqlite3.connect(self.db_path)
-        conn.executescript(schema_sql)
-        conn.commit()
-        conn.close()
 
+# Global database client instance, routed per organization
+db = ShardedClient()
 
-# Global database client instance
-db = SQLiteClient()
+metrics.gauge(
+    "expense_shards", "Per-organization database shards", ("stat",),
+    lambda: {(key,): value for key, value in db.stats().items() if key in ("open", "opened", "evicted")}
+)
@@ -0,0 +1,132 @@
+import asyncio
+from typing import Any, List, Optional, Tuple
+
+
+class WriteBatcher:
+    """Group-commit stage in front of the writer connection.
+
+    Concurrent writes are queued and committed together in a single
+    transaction, so N writers pay for one fsync instead of N. A batch is
+    flushed once ``max_batch_size`` operations are queued or ``max_delay_ms``
+    has passed since the first one arrived. Each caller still gets its own
+    ``QueryResult`` (or exception) back.
+    """
+
+    def __init__(self, client, max_batch_size: int = 64, max_delay_ms: float = 2.0):
+        self.client = client
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_delay = max(0.0, max_delay_ms) / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, query: str, params: Optional[tuple] = None):
+        """Queue a write and wait for the batch containing it to commit"""
+        self._ensure_running()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, params or (), future))
+        return await future
+
+    async def close(self):
+        """Flush pending writes and stop the background task"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        try:
+            await self._task
+        finally:
+            self._task = None
+            self._queue = None
+
+    async def _collect(self, first) -> Tuple[List[tuple], bool]:
+        """Gather a batch starting with ``first``; report whether a stop was requested"""
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch, stop = await self._collect(first)
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # _flush resolves every caller itself; keep serving later writes
+                print(f"✗ Write batch failed: {e}")
+            if stop:
+                return
+
+    async def _flush(self, batch: List[tuple]):
+        # Skip operations whose callers have already gone away
+        batch = [op for op in batch if not op[2].done()]
+        if not batch:
+            return
+
+        try:
+            results = await self._write(batch)
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _write(self, batch: List[tuple]) -> List[Any]:
+        """Run ``batch`` in one transaction; return a result or exception per operation"""
+        from src.database.sqlite_client import QueryResult
+
+        results: List[Any] = []
+        async with self.client._write_lock:
+            conn = self.client._writer
+            await conn.execute("BEGIN IMMEDIATE")
+
+            for index, (query, params, _) in enumerate(batch):
+                try:
+                    cursor = await conn.execute(query, params)
+                    results.append(QueryResult(cursor.lastrowid, cursor.rowcount))
+                except Exception as e:
+                    # A failed statement is rolled back on its own; the rest of
+                    # the batch survives unless SQLite aborted the transaction.
+                    results.append(e)
+                    if not conn.in_transaction:
+                        for prior in range(index):
+                            if not isinstance(results[prior], Exception):
+                                results[prior] = e
+                        results.extend([e] * (len(batch) - index - 1))
+                        break
+
+            if conn.in_transaction:
+                try:
+                    await conn.commit()
+                except Exception as e:
+                    try:
+                        await conn.rollback()
+                    except Exception as rollback_error:
+                        print(f"✗ Write batch rollback failed: {rollback_error}")
+                    results = [e] * len(batch)
+        return results
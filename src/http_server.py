@@ -1,22 +1,82 @@
 """
 Simple HTTP API for expense tracker tools
 """
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Literal, Optional, Tuple
+import asyncio
+import hashlib
+import io
+import tempfile
+import time
 
+from src.config.category_catalog import category_catalog
 from src.config.settings import settings
+from src.database.change_feed import change_feed, change_log_pruner, read_changes
+from src.database.partitions import CompactionJob
 from src.database.sqlite_client import db
-from src.models.expense import Expense
+import src.tools.analytics_tools  # noqa: F401  (registers the analytics tools)
+import src.tools.budget_tools  # noqa: F401  (registers the budget tools)
+import src.tools.recurring_tools  # noqa: F401  (registers the recurring expense tools)
+import src.tools.report_tools  # noqa: F401  (registers the background report tools)
+from src.tools.expense_tools import (
+    build_list_query, compare_periods_data, list_expenses_page, materialize_recurring, summarize_expenses_data
+)
+from src.tools.export_tools import MEDIA_TYPES, export_filename, stream_export
+from src.tools.import_tools import import_expenses_stream
+from src.tools.registry import tool_registry
+from src.utils.compression import CompressionMiddleware, etag_matches
+from src.utils.jobs import jobs
+from src.utils.metrics import TOOL_RESPONSE_BYTES, metrics, record_tool
+from src.utils.result_cache import result_cache
+from src.utils.serialization import dumps
+from src.utils.tenancy import ADMIN_HEADER, ORG_HEADER, admin_scope, current_org, is_admin, org_scope, validate_org_id
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Check the schema and open the connection pool on startup; close it on shutdown"""
+    await db.ensure_schema()
+    print("✓ Database schema initialized")
+    await db.connect()
+    compaction.start()
+    try:
+        yield
+    finally:
+        await compaction.stop()
+        await jobs.close()
+        await change_feed.close()
+        await change_log_pruner.close()
+        await db.close()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson when it is installed"""
 
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
 
-# Initialize database
-db.init_schema()
-print("✓ Database schema initialized")
+
+# Moves closed years into the archive in the background
+compaction = CompactionJob(db, settings.partition_compact_interval_seconds, settings.partition_hot_years)
 
 # Create FastAPI app
-app = FastAPI(title="Expense Tracker HTTP API")
+app = FastAPI(title="Expense Tracker HTTP API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+
+@app.middleware("http")
+async def organization_scope(request: Request, call_next):
+    """Route the request to the organization named in the X-Org-Id header"""
+    try:
+        org = validate_org_id(request.headers.get(ORG_HEADER))
+    except ValueError as e:
+        return JSONResponse({"detail": str(e)}, status_code=400)
+    with org_scope(org), admin_scope(request.headers.get(ADMIN_HEADER)):
+        return await call_next(request)
+
 
 # Add CORS middleware
 app.add_middleware(
@@ -27,115 +87,380 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps everything else, including CORS and error responses
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+
+# Uploads larger than this are spooled to a temporary file instead of memory
+IMPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
 
 class ToolCallRequest(BaseModel):
     name: str
     arguments: Dict[str, Any]
 
 
+class ToolCallsRequest(BaseModel):
+    calls: List[ToolCallRequest]
+    atomic: bool = False
+
+
 @app.get("/")
 def read_root():
     return {"message": "Expense Tracker HTTP API", "status": "running"}
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    """Read-tool result cache counters"""
+    return result_cache.stats()
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Tool and query metrics in Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/categories")
+def get_categories(request: Request):
+    """Category catalog, served from its cached bytes with an ETag"""
+    etag = category_catalog.etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=category_catalog.body, media_type="application/json", headers={"ETag": etag})
+
+
+class _BatchAborted(Exception):
+    """Raised inside an atomic batch to roll it back"""
+
+
+def _failed(outcome: Dict[str, Any]) -> bool:
+    result = outcome.get("result")
+    return not outcome["success"] or (isinstance(result, dict) and result.get("status") == "error")
+
+
+async def dispatch_tool(call: ToolCallRequest) -> Dict[str, Any]:
+    """Run one tool call through the registry; shared by /call_tool and /call_tools"""
+    if tool_registry.get(call.name) is None:
+        return {"success": False, "error": f"Tool '{call.name}' not found"}
+
+    started = time.perf_counter()
+    try:
+        outcome = {"success": True, "result": await tool_registry.call(call.name, call.arguments)}
+    except Exception as e:
+        outcome = {"success": False, "error": str(e)}
+    if metrics.enabled:
+        record_tool("http", call.name, started, failed=_failed(outcome))
+    return outcome
+
+
+async def run_tool_calls(calls: List[ToolCallRequest], atomic: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
+    """Run a batch of tool calls; results come back in request order.
+
+    Consecutive read calls run concurrently and each write waits for
+    everything before it, so the batch behaves as if run in order. With
+    ``atomic`` set, a batch containing writes runs in order inside one
+    transaction and is rolled back entirely if any call fails. Returns
+    the results and whether the batch was rolled back.
+    """
+    def writes(call: ToolCallRequest) -> bool:
+        tool = tool_registry.get(call.name)
+        return tool is not None and tool.writes
+
+    results: List[Dict[str, Any]] = [{}] * len(calls)
+
+    if atomic and any(writes(call) for call in calls):
+        failed_at = None
+        try:
+            with result_cache.deferred_invalidation():
+                async with db.transaction():
+                    for index, call in enumerate(calls):
+                        results[index] = await dispatch_tool(call)
+                        if _failed(results[index]):
+                            failed_at = index
+                            raise _BatchAborted()
+        except _BatchAborted:
+            message = f"Rolled back because call {failed_at} failed"
+            for index in range(len(calls)):
+                if index != failed_at:
+                    results[index] = {"success": False, "error": message}
+            return results, True
+        return results, False
+
+    index = 0
+    while index < len(calls):
+        if writes(calls[index]):
+            results[index] = await dispatch_tool(calls[index])
+            index += 1
+            continue
+        end = index
+        while end < len(calls) and not writes(calls[end]):
+            end += 1
+        results[index:end] = await asyncio.gather(*(dispatch_tool(call) for call in calls[index:end]))
+        index = end
+    return results, False
+
+
 @app.post("/call_tool")
 async def call_tool(request: ToolCallRequest):
     """Call a tool via HTTP"""
-    try:
-        tool_name = request.name
-        args = request.arguments
-
-        # Route to appropriate tool function
-        if tool_name == "add_expense":
-            result = await add_expense_impl(
-                date=args.get("date"),
-                amount=args.get("amount"),
-                category=args.get("category"),
-                subcategory=args.get("subcategory", ""),
-                note=args.get("note", "")
-            )
-        elif tool_name == "list_expenses":
-            result = await list_expenses_impl(
-                start_date=args.get("start_date"),
-                end_date=args.get("end_date"),
-                category=args.get("category")
-            )
-        elif tool_name == "summarize_expenses":
-            result = await summarize_expenses_impl(
-                start_date=args.get("start_date"),
-                end_date=args.get("end_date"),
-                category=args.get("category")
-            )
-        else:
-            raise HTTPException(status_code=404, detail=f"Tool '{tool_name}' not found")
-
-        return {"success": True, "result": result}
+    response = FastJSONResponse(await dispatch_tool(request))
+    if metrics.enabled and tool_registry.get(request.name) is not None:
+        TOOL_RESPONSE_BYTES.observe(len(response.body), "http", request.name)
+    return response
 
-    except Exception as e:
-        return {"success": False, "error": str(e)}
 
+@app.post("/call_tools")
+async def call_tools(request: ToolCallsRequest):
+    """Call several tools in one request.
 
-async def add_expense_impl(date: str, amount: float, category: str, subcategory: str = "", note: str = ""):
-    """Add expense implementation"""
-    try:
-        expense = Expense(date=date, amount=amount, category=category, subcategory=subcategory, note=note)
-        result = await db.execute(
-            "INSERT INTO expenses (date, amount, category, subcategory, note) VALUES (?, ?, ?, ?, ?)",
-            (expense.date, expense.amount, expense.category, expense.subcategory, expense.note)
+    Read calls run concurrently; set ``atomic`` to commit the writes
+    all-or-nothing.
+    """
+    if len(request.calls) > settings.call_tools_max_calls:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.call_tools_max_calls} calls per batch, got {len(request.calls)}"
         )
-        return {
-            "status": "success",
-            "expense_id": result.last_insert_rowid,
-            "message": f"Expense of ${expense.amount:.2f} for {expense.category} added successfully"
-        }
+
+    results, rolled_back = await run_tool_calls(request.calls, request.atomic)
+    response = FastJSONResponse({
+        "success": not any(_failed(outcome) for outcome in results),
+        "rolled_back": rolled_back,
+        "results": results,
+    })
+    if metrics.enabled:
+        TOOL_RESPONSE_BYTES.observe(len(response.body), "http", "call_tools")
+    return response
+
+
+@app.post("/import")
+async def import_expenses(request: Request, format: str = "csv", chunk_size: Optional[int] = None):
+    """Bulk import expenses from a CSV or JSONL request body"""
+    try:
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_BYTES) as spool:
+            async for chunk in request.stream():
+                spool.write(chunk)
+            spool.seek(0)
+
+            # utf-8-sig drops the BOM that spreadsheet exports often start with
+            stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+            try:
+                return await import_expenses_stream(stream, format, chunk_size)
+            finally:
+                stream.detach()
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
-async def list_expenses_impl(start_date: str, end_date: str, category: Optional[str] = None):
-    """List expenses implementation"""
+@app.get("/expenses/stream")
+async def stream_expenses(start_date: str, end_date: str, category: Optional[str] = None):
+    """Stream every expense in the range as NDJSON, newest first"""
     try:
-        query = "SELECT id, date, amount, category, subcategory, note, created_at FROM expenses WHERE date BETWEEN ? AND ?"
-        params = [start_date, end_date]
+        query, params = build_list_query(start_date, end_date, category, partitions=await db.partitions())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await materialize_recurring(end_date)
 
-        if category:
-            query += " AND category = ?"
-            params.append(category)
+    async def ndjson():
+        async for row in db.iter_rows(query, params):
+            yield dumps(row) + b"\n"
 
-        query += " ORDER BY date DESC, created_at DESC"
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
-        expenses = await db.fetch_all(query, tuple(params))
-        return expenses or []
-    except Exception as e:
-        return [{"status": "error", "message": str(e)}]
 
+@app.get("/expenses/export")
+async def export_expenses(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    format: Literal["csv", "jsonl"] = "csv",
+    gzip: bool = False
+):
+    """Download every expense in the range as CSV or JSONL, optionally gzipped.
 
-async def summarize_expenses_impl(start_date: str, end_date: str, category: Optional[str] = None):
-    """Summarize expenses implementation"""
+    Rows are read and encoded in a worker thread and streamed as they are
+    produced, so memory stays flat for any range.
+    """
     try:
-        query = """
-            SELECT category, SUM(amount) as total_amount, COUNT(*) as count
-            FROM expenses WHERE date BETWEEN ? AND ?
-        """
-        params = [start_date, end_date]
-
-        if category:
-            query += " AND category = ?"
-            params.append(category)
-
-        query += " GROUP BY category ORDER BY total_amount DESC"
-
-        results = await db.fetch_all(query, tuple(params))
-        total = sum(r['total_amount'] for r in results) if results else 0
-
-        return {
-            "summary": results,
-            "total": round(total, 2),
-            "period": f"{start_date} to {end_date}",
-            "categories_count": len(results)
-        }
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+        chunks = await stream_export(start_date, end_date, category, format, gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filename = export_filename(format, gzip)
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def data_etag(request: Request) -> str:
+    """Strong ETag for a read route: changes whenever the organization's data does.
+
+    Built from the change log sequence and the request URL, so checking it
+    costs one indexed MAX() and never runs the route's query.
+    """
+    seq = await db.change_seq()
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    key = f"{current_org()}:{seq}:{request.url.path}?{query}"
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    # no-cache: clients may store the response but must revalidate it
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": ORG_HEADER}
+
+
+@app.get("/expenses")
+async def get_expenses(
+    request: Request,
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: Literal["rows", "columns"] = "rows"
+):
+    """One page of expenses (see the list_expenses tool), revalidated with If-None-Match"""
+    # Before the ETag: new occurrences advance the change log and so the ETag
+    await materialize_recurring(end_date)
+    etag = await data_etag(request)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    try:
+        result = await list_expenses_page(start_date, end_date, category, limit, cursor, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(result, headers=cache_headers(etag))
+
+
+@app.get("/expenses/summary")
+async def get_expense_summary(
+    request: Request,
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    by_subcategory: bool = False,
+    format: Literal["rows", "columns"] = "rows"
+):
+    """Totals per category (see the summarize_expenses tool), revalidated with If-None-Match"""
+    # Before the ETag: new occurrences advance the change log and so the ETag
+    await materialize_recurring(end_date)
+    etag = await data_etag(request)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    try:
+        result = await summarize_expenses_data(start_date, end_date, category, by_subcategory, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(result, headers=cache_headers(etag))
+
+
+@app.get("/expenses/compare")
+async def compare_expense_periods(
+    period: Literal["week", "month", "quarter", "year"] = "month",
+    anchor_date: Optional[str] = None,
+    periods: int = 2,
+    align: Literal["previous", "year_over_year"] = "previous",
+    to_date: bool = False,
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+):
+    """Per-category totals for aligned periods with deltas (see the compare_periods tool)"""
+    try:
+        return await compare_periods_data(
+            period, anchor_date, periods, align, to_date, category, by_subcategory
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/changes")
+async def list_changes(after: int = 0, limit: Optional[int] = None):
+    """Row-level changes after seq ``after``, oldest first"""
+    limit = min(limit or settings.change_feed_batch_size, settings.change_feed_batch_size)
+    return await read_changes(after, max(1, limit))
+
+
+def _sse(event: str, seq: int, data: Any) -> bytes:
+    return f"id: {seq}\nevent: {event}\ndata: ".encode() + dumps(data) + b"\n\n"
+
+
+@app.get("/changes/stream")
+async def stream_changes(request: Request, after: Optional[int] = None):
+    """Push changes as server-sent events.
+
+    Each ``change`` event carries its seq as the event id, so a client
+    that reconnects resumes where it left off (``Last-Event-ID``, or
+    ``after``). Without either, only changes made from now on are sent.
+    A ``reset`` event means the changes after the requested seq are no
+    longer in the log: reload, then continue from its ``last_seq``.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            after = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID must be a change seq")
+    feed = change_feed.subscribe(after)
+
+    async def events():
+        # Read the feed in its own task so idle connections still get keepalives
+        queue: asyncio.Queue = asyncio.Queue(1)
+
+        async def consume():
+            try:
+                async for batch in feed:
+                    await queue.put(batch)
+            except Exception as e:
+                await queue.put(e)
+
+        consumer = asyncio.create_task(consume())
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    batch = await asyncio.wait_for(queue.get(), settings.change_feed_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if isinstance(batch, Exception):
+                    raise batch
+                if batch["reset"]:
+                    yield _sse("reset", batch["last_seq"], {"last_seq": batch["last_seq"]})
+                    continue
+                yield b"".join(_sse("change", change["seq"], change) for change in batch["changes"])
+        finally:
+            consumer.cancel()
+            await asyncio.gather(consumer, return_exceptions=True)
+            await feed.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/partitions")
+async def list_partitions():
+    """Archive partitions of the organization's database, newest first"""
+    return {"partitions": [p._asdict() for p in await db.partitions()], "hot_years": settings.partition_hot_years}
+
+
+@app.post("/partitions/compact")
+async def compact_partitions(hot_years: Optional[int] = None):
+    """Archive the organization's closed years now instead of waiting for the background job (admin)"""
+    if not is_admin():
+        raise HTTPException(status_code=403, detail="Compaction requires the admin token (X-Admin-Token header)")
+    return await db.compact_partitions(hot_years)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -41,3 +41,20 @@ class ExpenseSummary(BaseModel):
     category: str
     total_amount: float
     count: int
+
+
+class PeriodTotal(BaseModel):
+    """Total for one period of a comparison, with the change from the period before it"""
+
+    period: str
+    total_amount: float
+    count: int
+    delta: Optional[float] = None
+    percent_change: Optional[float] = None
+
+
+class ExpenseComparison(ExpenseSummary):
+    """Category summary for the most recent period, with every compared period"""
+
+    subcategory: Optional[str] = None
+    periods: List[PeriodTotal]
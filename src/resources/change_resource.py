@@ -0,0 +1,82 @@
+from fastmcp import FastMCP
+from fastmcp.server.dependencies import get_context
+from src.config.settings import settings
+from src.database.change_feed import change_feed, read_changes
+from src.database.sqlite_client import db
+from src.utils.tenancy import current_org, org_scope
+from typing import Dict
+import asyncio
+import json
+import weakref
+
+CHANGES_URI = "expense:///changes"
+
+
+class ResourceNotifier:
+    """Sends resources/updated for ``CHANGES_URI`` to the sessions watching each organization.
+
+    A session starts watching when it reads one of the change resources.
+    One change feed subscription per organization serves all its sessions;
+    it ends once no session is left.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, "weakref.WeakSet"] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def watch(self):
+        """Subscribe the session of the current MCP request, if there is one"""
+        try:
+            session = get_context().session
+        except RuntimeError:
+            return
+        org = current_org()
+        self._sessions.setdefault(org, weakref.WeakSet()).add(session)
+        task = self._tasks.get(org)
+        if task is None or task.done():
+            self._tasks[org] = asyncio.create_task(self._forward(org))
+
+    async def _forward(self, org: str):
+        with org_scope(org):
+            feed = change_feed.subscribe()
+        try:
+            async for _ in feed:
+                sessions = self._sessions.get(org)
+                if not sessions:
+                    return
+                for session in list(sessions):
+                    try:
+                        await session.send_resource_updated(CHANGES_URI)
+                    except Exception:
+                        # Disconnected; it re-subscribes by reading again
+                        sessions.discard(session)
+        finally:
+            await feed.aclose()
+
+    async def close(self):
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        self._sessions.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# Global notifier for MCP sessions
+resource_notifier = ResourceNotifier()
+
+
+def register_change_resources(mcp: FastMCP):
+    """Register change feed MCP resources"""
+
+    @mcp.resource(CHANGES_URI, mime_type="application/json", description="Latest change sequence number; reading it subscribes to resources/updated notifications on every write")
+    async def get_change_position():
+        """Get the latest change seq and watch for changes"""
+        resource_notifier.watch()
+        return json.dumps({"last_seq": await db.change_seq()})
+
+    @mcp.resource(CHANGES_URI + "/{after_seq}", mime_type="application/json", description="Row-level changes after a sequence number, oldest first; reading it subscribes to resources/updated notifications")
+    async def get_changes(after_seq: int):
+        """Get the changes after ``after_seq`` and watch for more"""
+        resource_notifier.watch()
+        return json.dumps(await read_changes(int(after_seq), settings.change_feed_batch_size))
@@ -0,0 +1,18 @@
+from fastmcp import FastMCP
+from src.utils.metrics import metrics
+from src.utils.result_cache import result_cache
+import json
+
+
+def register_stats_resources(mcp: FastMCP):
+    """Register runtime statistics MCP resources"""
+
+    @mcp.resource("expense:///cache/stats", mime_type="application/json", description="Read-tool result cache hit/miss counters")
+    def get_cache_stats():
+        """Get result cache statistics"""
+        return json.dumps(result_cache.stats(), indent=2)
+
+    @mcp.resource("expense:///metrics", mime_type="text/plain", description="Tool and query latency metrics in Prometheus text format")
+    def get_metrics():
+        """Get tool and database metrics"""
+        return metrics.render()
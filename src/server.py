@@ -1,22 +1,51 @@
+from contextlib import asynccontextmanager
 from fastmcp import FastMCP
 from src.config.settings import settings
+from src.database.partitions import CompactionJob
 from src.database.sqlite_client import db
+from src.tools.analytics_tools import register_analytics_tools
+from src.tools.budget_tools import register_budget_tools
 from src.tools.expense_tools import register_expense_tools
+from src.tools.export_tools import register_export_tools
+from src.tools.import_tools import register_import_tools
+from src.tools.recurring_tools import register_recurring_tools
+from src.tools.report_tools import register_report_tools
+from src.database.change_feed import change_feed, change_log_pruner
 from src.resources.category_resource import register_category_resources
+from src.resources.change_resource import register_change_resources, resource_notifier
+from src.resources.stats_resource import register_stats_resources
+from src.utils.jobs import jobs
+from src.utils.middleware import OrganizationMiddleware, ToolMetricsMiddleware
 
 
-# Initialize FastMCP server
-mcp = FastMCP("ExpenseTracker")
-
-
-def init_database():
-    """Initialize database schema"""
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Check the schema and open the connection pool on startup; close it on shutdown"""
     try:
-        db.init_schema()
-        print("✓ Database schema initialized successfully")
+        version = await db.ensure_schema()
+        print(f"✓ Database schema ready (v{version})")
     except Exception as e:
         print(f"✗ Database initialization error: {e}")
         raise
+    await db.connect()
+    compaction = CompactionJob(db, settings.partition_compact_interval_seconds, settings.partition_hot_years)
+    compaction.start()
+    try:
+        yield
+    finally:
+        await compaction.stop()
+        await jobs.close()
+        await resource_notifier.close()
+        await change_feed.close()
+        await change_log_pruner.close()
+        await db.close()
+        print("✓ Database connections closed")
+
+
+# Initialize FastMCP server
+mcp = FastMCP("ExpenseTracker", lifespan=lifespan)
+mcp.add_middleware(OrganizationMiddleware())
+mcp.add_middleware(ToolMetricsMiddleware())
 
 
 def main():
@@ -25,12 +54,17 @@ def main():
     print(f"Environment: {settings.environment}")
     print(f"Database: {settings.database_path}")
 
-    # Initialize database
-    init_database()
-
     # Register tools and resources
     register_expense_tools(mcp)
+    register_import_tools(mcp)
+    register_export_tools(mcp)
+    register_analytics_tools(mcp)
+    register_budget_tools(mcp)
+    register_recurring_tools(mcp)
+    register_report_tools(mcp)
     register_category_resources(mcp)
+    register_stats_resources(mcp)
+    register_change_resources(mcp)
 
     print(f"✓ Registered MCP tools and resources")
 
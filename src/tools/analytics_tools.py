@@ -0,0 +1,156 @@
+from src.database.codec import date_to_day
+from src.tools.expense_tools import materialize_recurring
+from src.tools.registry import tool_registry
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Tuple
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+    from src.database.snapshot import ExpenseSnapshot
+
+
+DEFAULT_PERCENTILES = [50, 90, 95, 99]
+MAX_TOP_NOTES = 100
+MAX_ROLLING_WINDOW = 52
+
+
+def _day_range(start_date: str, end_date: str) -> Tuple[int, int]:
+    """Raises ValueError for malformed dates"""
+    return date_to_day(start_date), date_to_day(end_date)
+
+
+def check_rolling_window(rolling_window: int) -> int:
+    """Raises ValueError outside 0..MAX_ROLLING_WINDOW"""
+    if not 0 <= rolling_window <= MAX_ROLLING_WINDOW:
+        raise ValueError(f"rolling_window must be between 0 and {MAX_ROLLING_WINDOW}")
+    return rolling_window
+
+
+def check_percentiles(percentiles: Optional[List[float]]) -> List[float]:
+    """The percentiles to compute; raises ValueError outside 0-100"""
+    percentiles = percentiles or DEFAULT_PERCENTILES
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise ValueError("Percentiles must be between 0 and 100")
+    return percentiles
+
+
+async def _snapshot() -> "ExpenseSnapshot":
+    # NumPy is imported on first use, not at server startup
+    from src.database.snapshot import snapshots
+    await materialize_recurring()
+    return await snapshots.get()
+
+
+@tool_registry.tool()
+async def expense_trends(
+    start_date: str,
+    end_date: str,
+    granularity: Literal["week", "month"] = "month",
+    category: Optional[str] = None,
+    rolling_window: int = 0
+) -> Dict[str, Any]:
+    """Spending per week or month over a date range.
+
+    Periods without expenses are included with a zero total.
+
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        granularity: "week" (starting Monday) or "month"
+        category: Optional category filter
+        rolling_window: Also return the average of the last N periods (0 or 1 for none, max 52)
+
+    Returns:
+        Dictionary with one entry per period (total, count, rolling_average)
+    """
+    try:
+        start_day, end_day = _day_range(start_date, end_date)
+        check_rolling_window(rolling_window)
+        snapshot = await _snapshot()
+        periods = snapshot.trends(start_day, end_day, granularity, category, rolling_window)
+        return {
+            "granularity": granularity,
+            "periods": periods,
+            "total": round(sum(p["total"] for p in periods), 2),
+            "period": f"{start_date} to {end_date}"
+        }
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error computing trends: {str(e)}"}
+
+
+@tool_registry.tool()
+async def expense_percentiles(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    percentiles: Optional[List[float]] = None
+) -> Dict[str, Any]:
+    """Distribution of expense amounts over a date range.
+
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        category: Optional category filter
+        percentiles: Percentiles to compute, each 0-100 (default 50, 90, 95, 99)
+
+    Returns:
+        Dictionary with the overall percentiles and a breakdown by category
+    """
+    try:
+        start_day, end_day = _day_range(start_date, end_date)
+        percentiles = check_percentiles(percentiles)
+        snapshot = await _snapshot()
+        overall, by_category = snapshot.percentiles(start_day, end_day, percentiles, category)
+        return {
+            "overall": overall,
+            "by_category": by_category,
+            "period": f"{start_date} to {end_date}"
+        }
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error computing percentiles: {str(e)}"}
+
+
+@tool_registry.tool()
+async def top_notes(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    limit: int = 10,
+    by: Literal["total", "count"] = "total"
+) -> Dict[str, Any]:
+    """Top merchants or notes by spend or by number of expenses.
+
+    Notes are compared case-insensitively; expenses without a note are
+    ignored.
+
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        category: Optional category filter
+        limit: Number of notes to return (default 10, max 100)
+        by: Rank by "total" spend or by "count"
+
+    Returns:
+        Dictionary with the top notes and their total, count and average
+    """
+    try:
+        start_day, end_day = _day_range(start_date, end_date)
+        limit = max(1, min(limit, MAX_TOP_NOTES))
+        snapshot = await _snapshot()
+        return {
+            "notes": snapshot.top_notes(start_day, end_day, limit, by, category),
+            "by": by,
+            "period": f"{start_date} to {end_date}"
+        }
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error ranking notes: {str(e)}"}
+
+
+def register_analytics_tools(mcp: "FastMCP"):
+    """Register the snapshot-backed analytics tools"""
+    tool_registry.add_to(mcp, expense_trends, expense_percentiles, top_notes)
@@ -0,0 +1,117 @@
+from src.database.budgets import (
+    DELETE_BUDGET_SQL, SPENT_SQL, UPSERT_BUDGET_SQL, fetch_budget_status, month_end, parse_month
+)
+from src.database.codec import amount_to_cents, cents_to_amount
+from src.database.sqlite_client import db
+from src.tools.expense_tools import canonical_category, materialize_recurring
+from src.tools.registry import tool_registry
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+
+
+@tool_registry.tool(writes=True)
+async def set_budget(category: str, monthly_limit: float, alert_threshold: float = 0.8) -> Dict[str, Any]:
+    """Set or change the monthly budget for a category.
+
+    Args:
+        category: Expense category the budget applies to
+        monthly_limit: Spending limit per calendar month (positive number)
+        alert_threshold: Share of the limit (0-1) from which the budget is reported as "warning"
+
+    Returns:
+        Dictionary with status and the budget's state for the current month
+    """
+    try:
+        category, _ = canonical_category(category)
+    except ValueError as e:
+        return {"status": "error", "message": f"Validation error: {str(e)}"}
+    limit_cents = amount_to_cents(monthly_limit)
+    if limit_cents <= 0:
+        return {"status": "error", "message": "monthly_limit must be positive"}
+    if not 0 < alert_threshold <= 1:
+        return {"status": "error", "message": "alert_threshold must be greater than 0 and at most 1"}
+
+    try:
+        await db.execute(UPSERT_BUDGET_SQL, (category, limit_cents, alert_threshold))
+        month_key = parse_month(None)
+        await materialize_recurring(month_end(month_key))
+        status = await fetch_budget_status(db, month_key, category)
+        return {
+            "status": "success",
+            "message": f"Monthly budget for {category} set to ${limit_cents / 100:.2f}",
+            "budget": status[0] if status else None,
+        }
+    except Exception as e:
+        return {"status": "error", "message": f"Error setting budget: {str(e)}"}
+
+
+@tool_registry.tool(writes=True)
+async def remove_budget(category: str) -> Dict[str, Any]:
+    """Remove the monthly budget of a category.
+
+    Args:
+        category: Expense category whose budget to remove
+
+    Returns:
+        Dictionary with status and message
+    """
+    try:
+        category, _ = canonical_category(category)
+    except ValueError as e:
+        return {"status": "error", "message": f"Validation error: {str(e)}"}
+    try:
+        result = await db.execute(DELETE_BUDGET_SQL, (category,))
+        if result.rows_affected == 0:
+            return {"status": "error", "message": f"No budget set for {category}"}
+        return {"status": "success", "message": f"Budget for {category} removed"}
+    except Exception as e:
+        return {"status": "error", "message": f"Error removing budget: {str(e)}"}
+
+
+@tool_registry.tool()
+async def check_budget(month: Optional[str] = None, category: Optional[str] = None) -> Dict[str, Any]:
+    """Spending against the monthly budgets.
+
+    Answered from the running monthly totals, so it costs the same however
+    many expenses the month has.
+
+    Args:
+        month: Month in YYYY-MM format (default: the current month)
+        category: Only this category (default: every category with a budget)
+
+    Returns:
+        Dictionary with one entry per budget (limit, spent, remaining,
+        percent_used, and state "ok", "warning" or "over") and the
+        categories over budget
+    """
+    try:
+        month_key = parse_month(month)
+        if category is not None:
+            category, _ = canonical_category(category)
+    except ValueError as e:
+        return {"status": "error", "message": f"Validation error: {str(e)}"}
+
+    try:
+        # Recurring expenses already due this month count towards it
+        await materialize_recurring(month_end(month_key))
+        budgets = await fetch_budget_status(db, month_key, category)
+        result: Dict[str, Any] = {
+            "month": f"{month_key // 100:04d}-{month_key % 100:02d}",
+            "budgets": budgets,
+            "over_budget": [b["category"] for b in budgets if b["over_budget"]],
+        }
+        if category is not None and not budgets:
+            # No budget, but the spending is still worth reporting
+            spent = await db.fetch_one(SPENT_SQL, (month_key, category))
+            result["message"] = f"No budget set for {category}"
+            result["spent"] = cents_to_amount(spent["spent_cents"])
+        return result
+    except Exception as e:
+        return {"status": "error", "message": f"Error checking budgets: {str(e)}"}
+
+
+def register_budget_tools(mcp: "FastMCP"):
+    """Register budget MCP tools"""
+    tool_registry.add_to(mcp, set_budget, remove_budget, check_budget)
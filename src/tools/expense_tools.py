@@ -1,205 +1,860 @@
-from fastmcp import FastMCP
+from src.config.category_catalog import category_catalog
+from src.config.settings import settings
+from src.database.budgets import fetch_budget_status, month_end
+from src.database.codec import (
+    DATE_SQL,
+    EXPENSE_COLUMNS_SQL,
+    amount_to_cents,
+    date_to_day,
+    day_to_date,
+    day_to_month,
+    new_expense_id,
+)
+from src.database.partitions import Partition, expense_tables, restore_expense
+from src.database.recurring import materialize
+from src.database.rollups import build_comparison_query, build_rollup_summary_query
+from src.database.search import build_search_query
 from src.database.sqlite_client import db
-from src.models.expense import Expense, ExpenseSummary
-from typing import List, Optional, Dict, Any
-
-
-def register_expense_tools(mcp: FastMCP):
-    """Register all expense-related MCP tools"""
-
-    @mcp.tool()
-    async def add_expense(
-        date: str,
-        amount: float,
-        category: str,
-        subcategory: str = "",
-        note: str = ""
-    ) -> Dict[str, Any]:
-        """Add a new expense to the database.
-
-        Args:
-            date: Date in YYYY-MM-DD format
-            amount: Expense amount (positive number)
-            category: Main expense category
-            subcategory: Optional subcategory
-            note: Optional note or description
-
-        Returns:
-            Dictionary with status, expense_id, and message
-        """
+from src.models.expense import Expense, ExpenseComparison, ExpenseSummary, PeriodTotal
+from src.tools.registry import tool_registry
+from src.utils.pagination import clamp_limit, decode_cursor, encode_cursor
+from src.utils.result_cache import result_cache
+from src.utils.tenancy import is_admin
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, List, Literal, Optional, Dict, Any, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+
+
+INSERT_SQL = """INSERT INTO expenses (id, day, amount_cents, category, subcategory, note)
+                VALUES (?, ?, ?, ?, ?, ?)"""
+DELETE_SQL = "DELETE FROM expenses WHERE id = ?"
+SELECT_LOCATION_SQL = f"SELECT {DATE_SQL} AS date, category, subcategory FROM expenses WHERE id = ?"
+
+
+async def locate_expense(expense_id: str) -> Optional[Dict[str, Any]]:
+    """Date, category and subcategory of an expense, plus the archive partition holding it (None if live)"""
+    partitions = await db.partitions()
+    if not partitions:
+        existing = await db.fetch_one(SELECT_LOCATION_SQL, (expense_id,))
+        if existing is not None:
+            existing["partition_name"] = None
+        return existing
+
+    arms = [f"SELECT {DATE_SQL} AS date, category, subcategory, NULL AS partition_name FROM expenses WHERE id = ?"]
+    arms += [f"SELECT {DATE_SQL}, category, subcategory, '{p.name}' FROM {p.table} WHERE id = ?" for p in partitions]
+    return await db.fetch_one(" UNION ALL ".join(arms) + " LIMIT 1", (expense_id,) * len(arms))
+
+
+async def _unarchive(expense_id: str) -> Optional[Dict[str, Any]]:
+    """Locate an expense about to be written, moving it out of the archive first"""
+    existing = await locate_expense(expense_id)
+    if existing is not None and existing["partition_name"]:
+        await restore_expense(db, existing["partition_name"], expense_id)
+    return existing
+
+
+def build_list_query(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    after: Optional[List[Any]] = None,
+    limit: Optional[int] = None,
+    include_key: bool = False,
+    partitions: Sequence[Partition] = ()
+) -> Tuple[str, tuple]:
+    """Build the list query ordered by the (day, created_at, pk) keyset.
+
+    With ``include_key`` the rowid key is selected as ``pk`` so the caller
+    can build a cursor from the last row. Archive ``partitions`` overlapping
+    the range are read too, merged with the main table in keyset order.
+    Raises ValueError for dates that are not in YYYY-MM-DD format.
+    """
+    start_day, end_day = date_to_day(start_date), date_to_day(end_date)
+    tables = expense_tables(partitions, start_day, end_day)
+    key_column = ", pk" if include_key else ""
+    where = "WHERE day BETWEEN ? AND ?"
+    where_params: List[Any] = [start_day, end_day]
+
+    if category:
+        where += " AND category = ?"
+        where_params.append(category)
+
+    if after is not None:
+        # The explicit day bound lets the index seek straight to the cursor
+        where += " AND day <= ? AND (day, created_at, pk) < (?, ?, ?)"
+        where_params.append(after[0])
+        where_params.extend(after)
+
+    params = where_params * len(tables)
+    order = " ORDER BY day DESC, created_at DESC, pk DESC"
+    if limit is not None:
+        order += " LIMIT ?"
+        params.append(limit)
+
+    if len(tables) == 1:
+        return f"""
+        SELECT {EXPENSE_COLUMNS_SQL}{key_column}
+        FROM expenses
+        {where}
+        {order}
+        """, tuple(params)
+
+    # Ordering the compound itself makes SQLite merge the arms, each read in
+    # (day, created_at) index order, so LIMIT stops early and nothing is
+    # sorted; the outer query only drops the ordering columns
+    arms = " UNION ALL ".join(f"SELECT {EXPENSE_COLUMNS_SQL}, day, pk FROM {table} {where}" for table in tables)
+    query = f"""
+        SELECT id, date, amount, category, subcategory, note, created_at{key_column}
+        FROM ({arms}{order})
+    """
+    return query, tuple(params)
+
+
+async def materialize_recurring(end_date: Optional[str] = None):
+    """Create the recurring expenses due by ``end_date`` (and by today at the latest).
+
+    Called before reading a date range so the range includes them. A
+    malformed date is left for the read itself to report.
+    """
+    through = date_to_day(date.today().isoformat())
+    if end_date:
         try:
-            # Validate with Pydantic model
-            expense = Expense(
-                date=date,
-                amount=amount,
-                category=category,
-                subcategory=subcategory,
-                note=note
-            )
-
-            # Insert into database
-            result = await db.execute(
-                """INSERT INTO expenses (date, amount, category, subcategory, note)
-                   VALUES (?, ?, ?, ?, ?)""",
-                (expense.date, expense.amount, expense.category, expense.subcategory, expense.note)
-            )
-
+            through = min(through, date_to_day(end_date))
+        except ValueError:
+            return
+    for day, category in set(await materialize(db, through)):
+        result_cache.invalidate(day_to_date(day), category)
+
+
+async def list_expenses_page(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: str = "rows"
+) -> Dict[str, Any]:
+    """Fetch one page of expenses using keyset pagination"""
+    limit = clamp_limit(limit, settings.list_default_limit, settings.list_max_limit)
+    after = decode_cursor(cursor, 3) if cursor else None
+    await materialize_recurring(end_date)
+
+    return await result_cache.get_or_compute(
+        "list_expenses",
+        {"start_date": start_date, "end_date": end_date, "category": category, "limit": limit, "cursor": cursor,
+         "format": format},
+        start_date, end_date, category,
+        lambda: _fetch_list_page(start_date, end_date, category, limit, after, format)
+    )
+
+
+async def _fetch_list_page(
+    start_date: str,
+    end_date: str,
+    category: Optional[str],
+    limit: int,
+    after: Optional[List[Any]],
+    format: str = "rows"
+) -> Dict[str, Any]:
+    # Fetch one extra row to learn whether another page exists
+    query, params = build_list_query(
+        start_date, end_date, category, after, limit + 1, include_key=True, partitions=await db.partitions()
+    )
+    if format == "columns":
+        return await _fetch_list_columns(query, params, limit)
+    expenses = await db.fetch_all(query, params)
+
+    next_cursor = None
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        last = expenses[-1]
+        next_cursor = encode_cursor([date_to_day(last["date"]), last["created_at"], last["pk"]])
+    for expense in expenses:
+        del expense["pk"]
+
+    return {
+        "expenses": expenses,
+        "count": len(expenses),
+        "limit": limit,
+        "next_cursor": next_cursor
+    }
+
+
+async def _fetch_list_columns(query: str, params: tuple, limit: int) -> Dict[str, Any]:
+    """``_fetch_list_page`` in the columnar shape, built from the row tuples"""
+    columns, rows = await db.fetch_columns(query, params)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = encode_cursor([date_to_day(last["date"]), last["created_at"], last["pk"]])
+
+    # pk is the last selected column; it is only needed for the cursor
+    return {
+        "columns": columns[:-1],
+        "rows": [row[:-1] for row in rows],
+        "count": len(rows),
+        "limit": limit,
+        "next_cursor": next_cursor
+    }
+
+
+async def search_expenses_page(
+    query: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Fetch one page of full-text search results, best match first"""
+    limit = clamp_limit(limit, settings.list_default_limit, settings.list_max_limit)
+    after = decode_cursor(cursor, 2) if cursor else None
+
+    return await result_cache.get_or_compute(
+        "search_expenses",
+        {"query": query, "start_date": start_date, "end_date": end_date, "category": category,
+         "limit": limit, "cursor": cursor},
+        start_date, end_date, category,
+        lambda: _fetch_search_page(query, start_date, end_date, category, limit, after)
+    )
+
+
+async def _fetch_search_page(
+    query: str,
+    start_date: Optional[str],
+    end_date: Optional[str],
+    category: Optional[str],
+    limit: int,
+    after: Optional[List[Any]]
+) -> Dict[str, Any]:
+    sql, params = build_search_query(
+        query, start_date, end_date, category, after, limit + 1, partitions=await db.partitions()
+    )
+    expenses = await db.fetch_all(sql, params)
+
+    next_cursor = None
+    if len(expenses) > limit:
+        expenses = expenses[:limit]
+        last = expenses[-1]
+        next_cursor = encode_cursor([last["score"], last["pk"]])
+    for expense in expenses:
+        del expense["score"], expense["pk"]
+
+    return {
+        "expenses": expenses,
+        "count": len(expenses),
+        "limit": limit,
+        "next_cursor": next_cursor
+    }
+
+
+async def summarize_expenses_data(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    by_subcategory: bool = False,
+    format: str = "rows"
+) -> Dict[str, Any]:
+    """Summarize a date range from the rollup tables"""
+    await materialize_recurring(end_date)
+    return await result_cache.get_or_compute(
+        "summarize_expenses",
+        {"start_date": start_date, "end_date": end_date, "category": category, "by_subcategory": by_subcategory,
+         "format": format},
+        start_date, end_date, category,
+        lambda: _compute_summary(start_date, end_date, category, by_subcategory, format)
+    )
+
+
+async def _compute_summary(
+    start_date: str,
+    end_date: str,
+    category: Optional[str],
+    by_subcategory: bool,
+    format: str = "rows"
+) -> Dict[str, Any]:
+    query, params = build_rollup_summary_query(start_date, end_date, category, by_subcategory)
+    if format == "columns":
+        columns, rows = await db.fetch_columns(query, params)
+        total_index, category_index = columns.index("total_amount"), columns.index("category")
+        return {
+            "columns": columns,
+            "rows": rows,
+            "total": round(sum(row[total_index] for row in rows), 2),
+            "period": f"{start_date} to {end_date}",
+            "categories_count": len({row[category_index] for row in rows})
+        }
+    return summary_result(await db.fetch_all(query, params), start_date, end_date)
+
+
+def summary_result(results: List[Dict[str, Any]], start_date: str, end_date: str) -> Dict[str, Any]:
+    """Shape rollup summary rows into the summarize_expenses result"""
+    # Calculate grand total
+    total = sum(r['total_amount'] for r in results) if results else 0
+
+    return {
+        "summary": results,
+        "total": round(total, 2),
+        "period": f"{start_date} to {end_date}",
+        "categories_count": len({r['category'] for r in results})
+    }
+
+
+# Months per period; weeks are handled separately
+PERIOD_MONTHS = {"month": 1, "quarter": 3, "year": 12}
+MAX_COMPARE_PERIODS = 24
+
+
+def _shift_months(d: date, months: int) -> date:
+    """First day of the month ``months`` after the month of ``d``"""
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def aligned_periods(
+    period: str,
+    anchor: date,
+    count: int,
+    align: str = "previous",
+    to_date: bool = False
+) -> List[Tuple[str, date, date]]:
+    """The ``period`` containing ``anchor`` and the ``count - 1`` before it.
+
+    With ``align="previous"`` they are consecutive; with
+    ``align="year_over_year"`` they are the same period in earlier years.
+    With ``to_date`` every period is cut to the same offset as ``anchor``
+    (month-to-date against last month-to-date). Returns
+    ``(label, start, end)`` tuples, most recent first.
+    """
+    if period == "week":
+        iso_year, iso_week, _ = anchor.isocalendar()
+        start = anchor - timedelta(days=anchor.weekday())
+        periods = []
+        for i in range(count):
+            if align == "year_over_year":
+                year = iso_year - i
+                # Not every ISO year has a week 53
+                week = min(iso_week, date(year, 12, 28).isocalendar()[1])
+                week_start = date.fromisocalendar(year, week, 1)
+            else:
+                week_start = start - timedelta(weeks=i)
+            year, week, _ = week_start.isocalendar()
+            periods.append((f"{year}-W{week:02d}", week_start, week_start + timedelta(days=6)))
+    else:
+        months = PERIOD_MONTHS[period]
+        start = _shift_months(anchor, -((anchor.month - 1) % months))
+        step = 12 if align == "year_over_year" else months
+        periods = []
+        for i in range(count):
+            period_start = _shift_months(start, -step * i)
+            period_end = _shift_months(period_start, months) - timedelta(days=1)
+            if period == "month":
+                label = f"{period_start.year}-{period_start.month:02d}"
+            elif period == "quarter":
+                label = f"{period_start.year}-Q{(period_start.month - 1) // 3 + 1}"
+            else:
+                label = str(period_start.year)
+            periods.append((label, period_start, period_end))
+
+    if to_date:
+        current_start = periods[0][1]
+        periods = [
+            (label, s, min(e, _same_offset(current_start, anchor, s, period))) for label, s, e in periods
+        ]
+    return periods
+
+
+def _same_offset(start: date, anchor: date, other_start: date, period: str) -> date:
+    """The date as far into the period starting at ``other_start`` as ``anchor`` is into ``start``.
+
+    Month-based periods use the same month and day (clamped to the end of
+    a shorter month), so leap days don't shift the cut.
+    """
+    if period == "week":
+        return other_start + (anchor - start)
+    months = (anchor.year - start.year) * 12 + anchor.month - start.month
+    month_start = _shift_months(other_start, months)
+    month_end = _shift_months(month_start, 1) - timedelta(days=1)
+    return min(month_start + timedelta(days=anchor.day - 1), month_end)
+
+
+async def compare_periods_data(
+    period: str = "month",
+    anchor_date: Optional[str] = None,
+    periods: int = 2,
+    align: str = "previous",
+    to_date: bool = False,
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+) -> Dict[str, Any]:
+    """Totals per category for aligned periods, from one rollup query.
+
+    Raises ValueError for a malformed anchor date or period count.
+    """
+    anchor, ranges = comparison_ranges(period, anchor_date, periods, align, to_date)
+    await materialize_recurring(max(e for _, _, e in ranges).isoformat())
+    args = {
+        "period": period, "anchor_date": anchor.isoformat(), "periods": periods, "align": align,
+        "to_date": to_date, "category": category, "by_subcategory": by_subcategory
+    }
+    return await result_cache.get_or_compute(
+        "compare_periods", args,
+        min(s for _, s, _ in ranges).isoformat(), max(e for _, _, e in ranges).isoformat(), category,
+        lambda: _compute_comparison(ranges, category, by_subcategory)
+    )
+
+
+def comparison_ranges(
+    period: str,
+    anchor_date: Optional[str],
+    periods: int,
+    align: str,
+    to_date: bool
+) -> Tuple[date, List[Tuple[str, date, date]]]:
+    """The anchor date and the aligned periods to compare.
+
+    Raises ValueError for a malformed anchor date or period count.
+    """
+    if not 2 <= periods <= MAX_COMPARE_PERIODS:
+        raise ValueError(f"periods must be between 2 and {MAX_COMPARE_PERIODS}")
+    try:
+        anchor = date.fromisoformat(anchor_date) if anchor_date else date.today()
+    except ValueError:
+        raise ValueError("Date must be in YYYY-MM-DD format")
+    return anchor, aligned_periods(period, anchor, periods, align, to_date)
+
+
+def _period_totals(labels: List[str], cents: List[int], counts: List[int]) -> List[PeriodTotal]:
+    """PeriodTotal per period, each compared with the (older) one after it"""
+    totals = []
+    for i, label in enumerate(labels):
+        entry = PeriodTotal(period=label, total_amount=cents[i] / 100, count=counts[i])
+        if i + 1 < len(labels):
+            entry.delta = (cents[i] - cents[i + 1]) / 100
+            if cents[i + 1]:
+                entry.percent_change = round((cents[i] - cents[i + 1]) / cents[i + 1] * 100, 1)
+        totals.append(entry)
+    return totals
+
+
+async def _compute_comparison(
+    ranges: List[Tuple[str, date, date]],
+    category: Optional[str],
+    by_subcategory: bool
+) -> Dict[str, Any]:
+    query, params = build_comparison_query([(s, e) for _, s, e in ranges], category, by_subcategory)
+    return comparison_result(ranges, await db.fetch_all(query, params))
+
+
+def comparison_result(ranges: List[Tuple[str, date, date]], rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Shape comparison query rows into the compare_periods result"""
+    labels = [label for label, _, _ in ranges]
+    indexes = range(len(ranges))
+    categories = []
+    for row in rows:
+        cents = [row[f"cents_{i}"] for i in indexes]
+        counts = [row[f"count_{i}"] for i in indexes]
+        categories.append(ExpenseComparison(
+            category=row["category"],
+            subcategory=row.get("subcategory"),
+            total_amount=cents[0] / 100,
+            count=counts[0],
+            periods=_period_totals(labels, cents, counts)
+        ).model_dump(exclude_none=True))
+
+    totals = _period_totals(
+        labels,
+        [sum(row[f"cents_{i}"] for row in rows) for i in indexes],
+        [sum(row[f"count_{i}"] for row in rows) for i in indexes]
+    )
+    return {
+        "periods": [
+            {"period": label, "start_date": s.isoformat(), "end_date": e.isoformat()}
+            for label, s, e in ranges
+        ],
+        "totals": [t.model_dump(exclude_none=True) for t in totals],
+        "categories": categories
+    }
+
+
+def canonical_category(category: str, subcategory: Optional[str] = "") -> Tuple[str, str]:
+    """Check a category/subcategory against the catalog.
+
+    Returns the canonical pair, or the values unchanged when validation is
+    disabled. Raises ValueError for unknown values.
+    """
+    if not settings.category_validation:
+        return category, subcategory or ""
+    return category_catalog.normalize(category, subcategory)
+
+
+async def insert_expense(expense: Expense) -> str:
+    """Insert a validated expense and return its public id.
+
+    Raises ValueError if the category is not in the catalog.
+    """
+    expense.category, expense.subcategory = canonical_category(expense.category, expense.subcategory)
+    expense_id = new_expense_id()
+    await db.execute(
+        INSERT_SQL,
+        (expense_id, date_to_day(expense.date), amount_to_cents(expense.amount),
+         expense.category, expense.subcategory, expense.note)
+    )
+    result_cache.invalidate(expense.date, expense.category)
+    return expense_id
+
+
+async def _with_budget(response: Dict[str, Any], expense_date: str, category: str) -> Dict[str, Any]:
+    """Add the budget state of the expense's month and category to a write response"""
+    try:
+        month = day_to_month(date_to_day(expense_date))
+        await materialize_recurring(month_end(month))
+        budget = await fetch_budget_status(db, month, category)
+    except Exception:
+        # The write has committed; don't report it as failed over the budget lookup
+        return response
+    response["over_budget"] = bool(budget) and budget[0]["over_budget"]
+    if budget:
+        response["budget"] = budget[0]
+    return response
+
+
+@tool_registry.tool(writes=True)
+async def add_expense(
+    date: str,
+    amount: float,
+    category: str,
+    subcategory: str = "",
+    note: str = ""
+) -> Dict[str, Any]:
+    """Add a new expense to the database.
+
+    Args:
+        date: Date in YYYY-MM-DD format
+        amount: Expense amount (positive number)
+        category: Main expense category
+        subcategory: Optional subcategory
+        note: Optional note or description
+
+    Returns:
+        Dictionary with status, expense_id, message and over_budget, plus
+        the budget's state when the category has a monthly budget
+    """
+    try:
+        # Validate with Pydantic model
+        expense = Expense(
+            date=date,
+            amount=amount,
+            category=category,
+            subcategory=subcategory,
+            note=note
+        )
+
+        # Insert into database
+        expense_id = await insert_expense(expense)
+
+        response = {
+            "status": "success",
+            "expense_id": expense_id,
+            "message": f"Expense of ${expense.amount:.2f} for {expense.category} added successfully"
+        }
+        return await _with_budget(response, expense.date, expense.category)
+
+    except ValueError as e:
+        return {"status": "error", "message": f"Validation error: {str(e)}"}
+    except Exception as e:
+        return {"status": "error", "message": f"Database error: {str(e)}"}
+
+
+@tool_registry.tool()
+async def list_expenses(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    format: Literal["rows", "columns"] = "rows"
+) -> Dict[str, Any]:
+    """List expenses within a date range, optionally filtered by category.
+
+    Results are newest first and paginated. Pass the returned
+    next_cursor back as cursor to fetch the following page.
+
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        category: Optional category filter
+        limit: Optional page size (default 100, max 1000)
+        cursor: Optional cursor from a previous page
+        format: "rows" for a list of expense objects, or "columns" for
+            {"columns": [...], "rows": [[...], ...]}, which is more compact
+
+    Returns:
+        Dictionary with expenses (or columns and rows), limit and
+        next_cursor (null on the last page)
+    """
+    try:
+        return await list_expenses_page(start_date, end_date, category, limit, cursor, format)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error listing expenses: {str(e)}"}
+
+
+@tool_registry.tool()
+async def search_expenses(
+    query: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    """Search expense notes and subcategories (merchants, descriptions).
+
+    Results are ranked by relevance and paginated. Words must all match;
+    end a word with * to match by prefix (groc*), wrap words in double
+    quotes to match a phrase, and use OR / NOT between terms.
+
+    Args:
+        query: Search text, e.g. coffee, "whole foods", uber OR lyft
+        start_date: Optional start date in YYYY-MM-DD format
+        end_date: Optional end date in YYYY-MM-DD format
+        category: Optional category filter
+        limit: Optional page size (default 100, max 1000)
+        cursor: Optional next_cursor from a previous page
+
+    Returns:
+        Dictionary with matching expenses, limit and next_cursor (null on the last page)
+    """
+    try:
+        return await search_expenses_page(query, start_date, end_date, category, limit, cursor)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error searching expenses: {str(e)}"}
+
+
+@tool_registry.tool()
+async def summarize_expenses(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    by_subcategory: bool = False,
+    format: Literal["rows", "columns"] = "rows"
+) -> Dict[str, Any]:
+    """Get expense summary by category for a date range.
+
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        category: Optional category filter for specific category summary
+        by_subcategory: Break totals down by subcategory as well
+        format: "rows" for a list of summary objects, or "columns" for
+            {"columns": [...], "rows": [[...], ...]}
+
+    Returns:
+        Dictionary with summary data including totals by category
+    """
+    try:
+        return await summarize_expenses_data(start_date, end_date, category, by_subcategory, format)
+    except Exception as e:
+        return {"status": "error", "message": f"Error summarizing expenses: {str(e)}"}
+
+
+@tool_registry.tool()
+async def compare_periods(
+    period: Literal["week", "month", "quarter", "year"] = "month",
+    anchor_date: Optional[str] = None,
+    periods: int = 2,
+    align: Literal["previous", "year_over_year"] = "previous",
+    to_date: bool = False,
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+) -> Dict[str, Any]:
+    """Compare spending by category across aligned periods in one call.
+
+    For example, this month against last month, or this quarter against
+    the same quarter in the last three years.
+
+    Args:
+        period: Period length: "week" (ISO, Monday first), "month", "quarter" or "year"
+        anchor_date: A date in the most recent period, YYYY-MM-DD (default today)
+        periods: Number of periods to compare, including the most recent (2-24)
+        align: "previous" for consecutive periods, "year_over_year" for the same period in earlier years
+        to_date: Cut every period at the same offset as anchor_date (e.g. month-to-date)
+        category: Optional category filter
+        by_subcategory: Break totals down by subcategory as well
+
+    Returns:
+        Dictionary with the compared periods (most recent first), overall
+        totals and per-category totals, each with the delta and percent
+        change from the period before
+    """
+    try:
+        return await compare_periods_data(
+            period, anchor_date, periods, align, to_date, category, by_subcategory
+        )
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error comparing periods: {str(e)}"}
+
+
+@tool_registry.tool()
+async def summarize_organizations(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None
+) -> Dict[str, Any]:
+    """Summarize a date range across every organization (admin).
+
+    Each organization's database is queried concurrently and the results
+    are merged by category. Requires the admin token in the
+    X-Admin-Token header.
+
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        category: Optional category filter
+
+    Returns:
+        Dictionary with each organization's summary, the merged summary
+        and the grand total
+    """
+    if not is_admin():
+        return {"status": "error", "message": "summarize_organizations requires the admin token (X-Admin-Token header)"}
+    try:
+        per_org = await db.fan_out(lambda: summarize_expenses_data(start_date, end_date, category))
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for result in per_org.values():
+            for row in result["summary"]:
+                entry = merged.setdefault(row["category"], {"category": row["category"], "total_amount": 0.0, "count": 0})
+                entry["total_amount"] += row["total_amount"]
+                entry["count"] += row["count"]
+        summary = sorted(merged.values(), key=lambda r: r["total_amount"], reverse=True)
+        for entry in summary:
+            entry["total_amount"] = round(entry["total_amount"], 2)
+
+        return {
+            "organizations": per_org,
+            "summary": summary,
+            "total": round(sum(r["total"] for r in per_org.values()), 2),
+            "period": f"{start_date} to {end_date}",
+            "organizations_count": len(per_org)
+        }
+    except Exception as e:
+        return {"status": "error", "message": f"Error summarizing organizations: {str(e)}"}
+
+
+@tool_registry.tool(writes=True)
+async def delete_expense(expense_id: str) -> Dict[str, Any]:
+    """Delete an expense by its ID.
+
+    Args:
+        expense_id: The ID of the expense to delete
+
+    Returns:
+        Dictionary with status and message
+    """
+    try:
+        # Restore and delete together, so a failed delete leaves the archive as it was
+        async with db.transaction():
+            existing = await _unarchive(expense_id)
+            result = await db.execute(DELETE_SQL, (expense_id,))
+
+        if result.rows_affected > 0:
+            if existing:
+                result_cache.invalidate(existing["date"], existing["category"])
             return {
                 "status": "success",
-                "expense_id": result.last_insert_rowid if hasattr(result, 'last_insert_rowid') else "created",
-                "message": f"Expense of ${expense.amount:.2f} for {expense.category} added successfully"
+                "message": f"Expense {expense_id} deleted successfully"
             }
-
-        except ValueError as e:
-            return {"status": "error", "message": f"Validation error: {str(e)}"}
-        except Exception as e:
-            return {"status": "error", "message": f"Database error: {str(e)}"}
-
-    @mcp.tool()
-    async def list_expenses(
-        start_date: str,
-        end_date: str,
-        category: Optional[str] = None
-    ) -> List[Dict[str, Any]]:
-        """List expenses within a date range, optionally filtered by category.
-
-        Args:
-            start_date: Start date in YYYY-MM-DD format
-            end_date: End date in YYYY-MM-DD format
-            category: Optional category filter
-
-        Returns:
-            List of expense dictionaries
-        """
-        try:
-            query = """
-                SELECT id, date, amount, category, subcategory, note, created_at
-                FROM expenses
-                WHERE date BETWEEN ? AND ?
-            """
-            params = [start_date, end_date]
-
-            if category:
-                query += " AND category = ?"
-                params.append(category)
-
-            query += " ORDER BY date DESC, created_at DESC"
-
-            expenses = await db.fetch_all(query, tuple(params))
-
-            return expenses if expenses else []
-
-        except Exception as e:
-            return [{"status": "error", "message": f"Error listing expenses: {str(e)}"}]
-
-    @mcp.tool()
-    async def summarize_expenses(
-        start_date: str,
-        end_date: str,
-        category: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Get expense summary by category for a date range.
-
-        Args:
-            start_date: Start date in YYYY-MM-DD format
-            end_date: End date in YYYY-MM-DD format
-            category: Optional category filter for specific category summary
-
-        Returns:
-            Dictionary with summary data including totals by category
-        """
-        try:
-            query = """
-                SELECT
-                    category,
-                    SUM(amount) as total_amount,
-                    COUNT(*) as count
-                FROM expenses
-                WHERE date BETWEEN ? AND ?
-            """
-            params = [start_date, end_date]
-
-            if category:
-                query += " AND category = ?"
-                params.append(category)
-
-            query += " GROUP BY category ORDER BY total_amount DESC"
-
-            results = await db.fetch_all(query, tuple(params))
-
-            # Calculate grand total
-            total = sum(r['total_amount'] for r in results) if results else 0
-
+        else:
             return {
-                "summary": results,
-                "total": round(total, 2),
-                "period": f"{start_date} to {end_date}",
-                "categories_count": len(results)
+                "status": "error",
+                "message": f"Expense {expense_id} not found"
             }
 
-        except Exception as e:
-            return {"status": "error", "message": f"Error summarizing expenses: {str(e)}"}
-
-    @mcp.tool()
-    async def delete_expense(expense_id: str) -> Dict[str, Any]:
-        """Delete an expense by its ID.
+    except Exception as e:
+        return {"status": "error", "message": f"Error deleting expense: {str(e)}"}
+
+
+@tool_registry.tool(writes=True)
+async def update_expense(
+    expense_id: str,
+    date: Optional[str] = None,
+    amount: Optional[float] = None,
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    note: Optional[str] = None
+) -> Dict[str, Any]:
+    """Update an existing expense.
+
+    Args:
+        expense_id: The ID of the expense to update
+        date: New date (optional)
+        amount: New amount (optional)
+        category: New category (optional)
+        subcategory: New subcategory (optional)
+        note: New note (optional)
+
+    Returns:
+        Dictionary with status and message; when the date, amount or
+        category changed, also over_budget and the budget's state like
+        add_expense
+    """
+    if all(value is None for value in (date, amount, category, subcategory, note)):
+        return {"status": "error", "message": "No fields to update"}
+    if amount is not None and amount_to_cents(amount) <= 0:
+        return {"status": "error", "message": "Validation error: Amount must be greater than 0"}
+    try:
+        day = date_to_day(date) if date is not None else None
+    except ValueError as e:
+        return {"status": "error", "message": f"Validation error: {str(e)}"}
+
+    try:
+        # Nothing is written (not even an archive restore) until every check
+        # has passed, and the restore and the update commit together
+        async with db.transaction():
+            existing = await locate_expense(expense_id)
+            if existing is None:
+                return {"status": "error", "message": f"Expense {expense_id} not found"}
+
+            if category is not None or subcategory is not None:
+                # A new category must still fit the stored subcategory
+                keep_subcategory = subcategory is None
+                try:
+                    new_category, new_subcategory = canonical_category(
+                        category if category is not None else existing["category"],
+                        existing["subcategory"] if keep_subcategory else subcategory
+                    )
+                except ValueError as e:
+                    message = f"Validation error: {str(e)}"
+                    if keep_subcategory and existing["subcategory"]:
+                        message += (f" (the expense's subcategory '{existing['subcategory']}' must fit the new "
+                                    "category; pass subcategory, or \"\" to clear it)")
+                    return {"status": "error", "message": message}
+                if category is not None:
+                    category = new_category
+                if not keep_subcategory or new_subcategory != existing["subcategory"]:
+                    subcategory = new_subcategory
 
-        Args:
-            expense_id: The ID of the expense to delete
-
-        Returns:
-            Dictionary with status and message
-        """
-        try:
-            result = await db.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
-
-            if result.rows_affected > 0:
-                return {
-                    "status": "success",
-                    "message": f"Expense {expense_id} deleted successfully"
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Expense {expense_id} not found"
-                }
-
-        except Exception as e:
-            return {"status": "error", "message": f"Error deleting expense: {str(e)}"}
-
-    @mcp.tool()
-    async def update_expense(
-        expense_id: str,
-        date: Optional[str] = None,
-        amount: Optional[float] = None,
-        category: Optional[str] = None,
-        subcategory: Optional[str] = None,
-        note: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Update an existing expense.
-
-        Args:
-            expense_id: The ID of the expense to update
-            date: New date (optional)
-            amount: New amount (optional)
-            category: New category (optional)
-            subcategory: New subcategory (optional)
-            note: New note (optional)
-
-        Returns:
-            Dictionary with status and message
-        """
-        try:
             # Build update query dynamically
             updates = []
             params = []
 
-            if date is not None:
-                updates.append("date = ?")
-                params.append(date)
+            if day is not None:
+                updates.append("day = ?")
+                params.append(day)
             if amount is not None:
-                updates.append("amount = ?")
-                params.append(amount)
+                updates.append("amount_cents = ?")
+                params.append(amount_to_cents(amount))
             if category is not None:
                 updates.append("category = ?")
                 params.append(category)
@@ -210,25 +865,38 @@ def register_expense_tools(mcp: FastMCP):
                 updates.append("note = ?")
                 params.append(note)
 
-            if not updates:
-                return {"status": "error", "message": "No fields to update"}
-
             updates.append("updated_at = datetime('now')")
             params.append(expense_id)
 
+            if existing["partition_name"]:
+                await restore_expense(db, existing["partition_name"], expense_id)
             query = f"UPDATE expenses SET {', '.join(updates)} WHERE id = ?"
             result = await db.execute(query, tuple(params))
 
-            if result.rows_affected > 0:
-                return {
-                    "status": "success",
-                    "message": f"Expense {expense_id} updated successfully"
-                }
-            else:
-                return {
-                    "status": "error",
-                    "message": f"Expense {expense_id} not found"
-                }
+        if result.rows_affected > 0:
+            # Invalidate both where the expense was and where it is now
+            result_cache.invalidate(existing["date"], existing["category"])
+            result_cache.invalidate(date or existing["date"], category or existing["category"])
+            response = {
+                "status": "success",
+                "message": f"Expense {expense_id} updated successfully"
+            }
+            if date is None and amount is None and category is None:
+                return response
+            return await _with_budget(response, date or existing["date"], category or existing["category"])
+        else:
+            return {
+                "status": "error",
+                "message": f"Expense {expense_id} not found"
+            }
+
+    except Exception as e:
+        return {"status": "error", "message": f"Error updating expense: {str(e)}"}
 
-        except Exception as e:
-            return {"status": "error", "message": f"Error updating expense: {str(e)}"}
+
+def register_expense_tools(mcp: "FastMCP"):
+    """Register all expense-related MCP tools"""
+    tool_registry.add_to(
+        mcp, add_expense, list_expenses, search_expenses, summarize_expenses, compare_periods,
+        summarize_organizations, delete_expense, update_expense
+    )
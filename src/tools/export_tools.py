@@ -0,0 +1,264 @@
+"""
+Export expenses to CSV or JSON Lines with bounded memory.
+
+The export runs in a worker thread on its own read-only connection: it
+reads the range (archive partitions included) ``stream_fetch_size`` rows
+at a time inside one read transaction, encodes each batch (and gzips it when asked) and hands the
+bytes on. Encoding a large range therefore never blocks the event loop,
+and memory is bounded by one batch plus a short queue of encoded chunks,
+whatever the size of the range.
+"""
+from src.config.settings import settings
+from src.database.codec import date_to_day
+from src.database.partitions import attach_archive, load_partitions
+from src.database.sqlite_client import CHANGE_SEQ_SQL, db
+from src.tools.expense_tools import build_list_query, materialize_recurring
+from src.tools.registry import tool_registry
+from src.utils.serialization import dumps
+from src.utils.tenancy import current_org
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Optional
+import asyncio
+import csv
+import io
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+# Same header the CSV import reads, so an export can be imported again
+EXPORT_FIELDS = ("id", "date", "amount", "category", "subcategory", "note", "created_at")
+
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "jsonl": "application/x-ndjson"}
+
+# Encoded chunks buffered between the export thread and a slow HTTP client
+QUEUE_CHUNKS = 8
+
+
+class ExportCancelled(Exception):
+    """The consumer of an export stream went away"""
+
+
+def export_filename(format: str, compress: bool) -> str:
+    return f"expenses.{format}" + (".gz" if compress else "")
+
+
+def _check_format(format: str) -> str:
+    format = format.lower()
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported format '{format}', expected one of {', '.join(EXPORT_FORMATS)}")
+    return format
+
+
+def _write_export(
+    path: str,
+    start_date: str,
+    end_date: str,
+    category: Optional[str],
+    format: str,
+    compress: bool,
+    write: Callable[[bytes], None]
+) -> Dict[str, int]:
+    """Encode every expense in the range and pass the bytes to ``write`` (runs in a thread).
+
+    Returns the row count, the bytes written and the change log sequence
+    the export reflects.
+    """
+    fetch_size = settings.stream_fetch_size
+    # wbits 31: zlib stream with a gzip header and trailer
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    rows = 0
+    written = 0
+
+    def emit(data: bytes):
+        nonlocal written
+        if gzip is not None:
+            data = gzip.compress(data)
+        if data:
+            write(data)
+            written += len(data)
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        attach_archive(conn, path)
+        # One read transaction: concurrent writes and compaction don't tear the export
+        conn.execute("BEGIN")
+        seq = conn.execute(CHANGE_SEQ_SQL).fetchone()[0]
+        query, params = build_list_query(start_date, end_date, category, partitions=load_partitions(conn))
+        cursor = conn.execute(query, params)
+        columns = [d[0] for d in cursor.description]
+        if format == "csv":
+            writer.writerow(EXPORT_FIELDS)
+        while True:
+            batch = cursor.fetchmany(fetch_size)
+            if not batch:
+                break
+            rows += len(batch)
+            if format == "csv":
+                writer.writerows(batch)
+                emit(buffer.getvalue().encode("utf-8"))
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                emit(b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in batch))
+        if format == "csv" and rows == 0:
+            emit(buffer.getvalue().encode("utf-8"))
+        if gzip is not None:
+            data = gzip.flush()
+            write(data)
+            written += len(data)
+    finally:
+        conn.close()
+    return {"rows": rows, "bytes": written, "change_seq": seq}
+
+
+async def _prepare_export(
+    start_date: str,
+    end_date: str,
+    category: Optional[str],
+    format: str
+) -> tuple:
+    """Validate the arguments and return (database path, format)"""
+    format = _check_format(format)
+    date_to_day(start_date)
+    date_to_day(end_date)
+    # Opens (and migrates) the organization's shard on first use
+    await db.change_seq()
+    await materialize_recurring(end_date)
+    return db.path_for(current_org()), format
+
+
+async def stream_export(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    format: str = "csv",
+    compress: bool = False
+) -> AsyncIterator[bytes]:
+    """Validate the arguments, then return an async iterator of export bytes.
+
+    Raises ValueError before anything is streamed. The export thread
+    blocks when ``QUEUE_CHUNKS`` chunks are waiting, so a slow client
+    slows the export down instead of growing memory, and it stops as soon
+    as the iterator is closed.
+    """
+    path, format = await _prepare_export(start_date, end_date, category, format)
+    # bytes, then None at the end or the exception that stopped the export
+    chunks: queue.Queue = queue.Queue(QUEUE_CHUNKS)
+    cancelled = threading.Event()
+
+    def put(data: Optional[bytes]):
+        while True:
+            if cancelled.is_set():
+                raise ExportCancelled()
+            try:
+                chunks.put(data, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        outcome = None
+        try:
+            _write_export(path, start_date, end_date, category, format, compress, put)
+        except ExportCancelled:
+            return
+        except Exception as e:
+            outcome = e
+        try:
+            put(outcome)
+        except ExportCancelled:
+            pass
+
+    async def iterate() -> AsyncIterator[bytes]:
+        producer = asyncio.ensure_future(asyncio.to_thread(produce))
+        try:
+            while True:
+                chunk = await asyncio.to_thread(chunks.get)
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            cancelled.set()
+            await producer
+            # Wake a chunks.get() left waiting by a cancelled request
+            try:
+                chunks.put_nowait(None)
+            except queue.Full:
+                pass
+
+    return iterate()
+
+
+@tool_registry.tool()
+async def export_expenses(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    format: str = "csv",
+    gzip: bool = False
+) -> Dict[str, Any]:
+    """Export every expense in a date range to a CSV or JSONL file on the server.
+
+    Rows are written newest first, in batches, so any range can be
+    exported with constant memory. The HTTP API serves the same export as
+    a download from GET /expenses/export.
+
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        category: Optional category filter
+        format: Either "csv" or "jsonl"
+        gzip: Compress the file with gzip
+
+    Returns:
+        Dictionary with the file path, row count and file size
+    """
+    try:
+        path, format = await _prepare_export(start_date, end_date, category, format)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    directory = settings.export_directory or os.path.join(os.path.dirname(db.db_path) or ".", "exports")
+    name = f"{current_org()}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}-{export_filename(format, gzip)}"
+    target = os.path.join(directory, name)
+
+    def run() -> Dict[str, int]:
+        os.makedirs(directory, exist_ok=True)
+        with open(target, "wb") as f:
+            return _write_export(path, start_date, end_date, category, format, gzip, f.write)
+
+    try:
+        result = await asyncio.to_thread(run)
+    except Exception as e:
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+        return {"status": "error", "message": str(e)}
+
+    return {
+        "status": "success",
+        "message": f"Exported {result['rows']} expenses",
+        "path": target,
+        "format": format,
+        "gzip": gzip,
+        **result,
+    }
+
+
+def register_export_tools(mcp: "FastMCP"):
+    """Register export MCP tools"""
+    tool_registry.add_to(mcp, export_expenses)
@@ -0,0 +1,190 @@
+from pydantic import TypeAdapter, ValidationError
+from src.config.settings import settings
+from src.database.codec import amount_to_cents, date_to_day, day_to_date, new_expense_id
+from src.database.sqlite_client import db
+from src.models.expense import Expense
+from src.tools.expense_tools import INSERT_SQL, canonical_category
+from src.tools.registry import tool_registry
+from src.utils.result_cache import result_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, TextIO, Tuple
+import csv
+import io
+import itertools
+import json
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+_chunk_adapter = TypeAdapter(List[Expense])
+
+
+def _iter_csv(stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (row_number, record) pairs from a CSV stream with a header row"""
+    reader = csv.DictReader(stream)
+    for row_number, row in enumerate(reader, start=1):
+        # Short rows come back with None for missing trailing columns
+        yield row_number, {k: v for k, v in row.items() if k is not None and v is not None}
+
+
+def _iter_jsonl(stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (line_number, record) pairs from a JSON Lines stream"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def _validate_chunk(records: List[Tuple[int, Any]]) -> Tuple[List[tuple], List[Dict[str, Any]]]:
+    """Validate a chunk of records in one pass.
+
+    Returns insert parameter tuples for the valid rows and error entries
+    for the rest.
+    """
+    errors: List[Dict[str, Any]] = []
+    candidates: List[Tuple[int, Any]] = []
+    for row_number, record in records:
+        if isinstance(record, Exception):
+            errors.append({"row": row_number, "message": str(record)})
+        elif not isinstance(record, dict):
+            errors.append({"row": row_number, "message": "Row must be an object"})
+        else:
+            candidates.append((row_number, record))
+
+    payload = [record for _, record in candidates]
+    try:
+        expenses = list(enumerate(_chunk_adapter.validate_python(payload)))
+    except ValidationError as e:
+        bad: Dict[int, str] = {}
+        for err in e.errors():
+            index = err["loc"][0]
+            field = ".".join(str(part) for part in err["loc"][1:])
+            bad.setdefault(index, f"{field}: {err['msg']}" if field else err["msg"])
+        errors.extend({"row": candidates[i][0], "message": msg} for i, msg in sorted(bad.items()))
+        expenses = [
+            (i, Expense.model_validate(record))
+            for i, record in enumerate(payload)
+            if i not in bad
+        ]
+
+    params = []
+    for i, e in expenses:
+        try:
+            category, subcategory = canonical_category(e.category, e.subcategory)
+        except ValueError as err:
+            errors.append({"row": candidates[i][0], "message": str(err)})
+            continue
+        params.append((new_expense_id(), date_to_day(e.date), amount_to_cents(e.amount), category, subcategory, e.note))
+    errors.sort(key=lambda err: err["row"])
+    return params, errors
+
+
+async def import_expenses_stream(
+    stream: TextIO,
+    format: str = "csv",
+    chunk_size: Optional[int] = None,
+    max_errors: Optional[int] = None
+) -> Dict[str, Any]:
+    """Import expenses from a CSV or JSONL text stream.
+
+    The stream is consumed ``chunk_size`` rows at a time. Each chunk is
+    validated in bulk and inserted with ``executemany`` in its own
+    transaction, so memory stays bounded by the chunk size rather than
+    the input size.
+    """
+    format = format.lower()
+    if format not in IMPORT_FORMATS:
+        return {"status": "error", "message": f"Unsupported format '{format}', expected one of {', '.join(IMPORT_FORMATS)}"}
+
+    chunk_size = max(1, chunk_size or settings.import_chunk_size)
+    max_errors = settings.import_max_errors if max_errors is None else max_errors
+
+    records = _iter_csv(stream) if format == "csv" else _iter_jsonl(stream)
+    rows_read = 0
+    rows_imported = 0
+    error_count = 0
+    errors: List[Dict[str, Any]] = []
+
+    try:
+        while True:
+            chunk = list(itertools.islice(records, chunk_size))
+            if not chunk:
+                break
+            rows_read += len(chunk)
+
+            params, chunk_errors = _validate_chunk(chunk)
+            error_count += len(chunk_errors)
+            errors.extend(chunk_errors[:max(0, max_errors - len(errors))])
+
+            if params:
+                await db.executemany(INSERT_SQL, params)
+                rows_imported += len(params)
+                for day, category in {(row[1], row[3]) for row in params}:
+                    result_cache.invalidate(day_to_date(day), category)
+    except (csv.Error, UnicodeDecodeError) as e:
+        return {
+            "status": "error",
+            "message": f"Could not parse input after {rows_read} rows: {str(e)}",
+            "rows_read": rows_read,
+            "rows_imported": rows_imported,
+            "rows_failed": error_count,
+            "errors": errors,
+        }
+    except Exception as e:
+        # Chunks committed before the failure stay imported
+        return {
+            "status": "error",
+            "message": str(e),
+            "rows_read": rows_read,
+            "rows_imported": rows_imported,
+            "rows_failed": error_count,
+            "errors": errors,
+        }
+
+    if error_count == 0:
+        status = "success"
+    elif rows_imported:
+        status = "partial"
+    else:
+        status = "error"
+
+    return {
+        "status": status,
+        "message": f"Imported {rows_imported} of {rows_read} rows",
+        "rows_read": rows_read,
+        "rows_imported": rows_imported,
+        "rows_failed": error_count,
+        "errors": errors,
+        "errors_truncated": error_count > len(errors),
+    }
+
+
+@tool_registry.tool(writes=True)
+async def import_expenses(
+    data: str,
+    format: str = "csv",
+    chunk_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """Bulk import expenses from CSV or JSONL text.
+
+    Args:
+        data: CSV with a header row (date,amount,category,subcategory,note)
+            or JSON Lines with one expense object per line
+        format: Either "csv" or "jsonl"
+        chunk_size: Optional number of rows committed per transaction
+
+    Returns:
+        Dictionary with status, row counts and per-row errors
+    """
+    return await import_expenses_stream(io.StringIO(data, newline=""), format, chunk_size)
+
+
+def register_import_tools(mcp: "FastMCP"):
+    """Register bulk import MCP tools"""
+    tool_registry.add_to(mcp, import_expenses)
@@ -0,0 +1,125 @@
+from src.database.codec import amount_to_cents, date_to_day, new_expense_id
+from src.database.recurring import INSERT_RULE_SQL, RULE_COLUMNS_SQL, next_occurrence, rule_dict
+from src.database.sqlite_client import db
+from src.models.expense import Expense
+from src.tools.expense_tools import canonical_category
+from src.tools.registry import tool_registry
+from typing import TYPE_CHECKING, Any, Dict, Literal, Optional
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+
+
+@tool_registry.tool(writes=True)
+async def add_recurring_expense(
+    start_date: str,
+    amount: float,
+    category: str,
+    frequency: Literal["daily", "weekly", "monthly", "yearly"] = "monthly",
+    interval: int = 1,
+    end_date: Optional[str] = None,
+    count: Optional[int] = None,
+    subcategory: str = "",
+    note: str = ""
+) -> Dict[str, Any]:
+    """Add an expense that repeats, such as rent or a subscription.
+
+    Occurrences are added to the expenses automatically once their date
+    has passed, the first time a list, summary or report covers them;
+    each is added exactly once, and deleting one does not bring it back.
+    Monthly and yearly occurrences keep the start date's day of the
+    month, moved to the last day of shorter months.
+
+    Args:
+        start_date: Date of the first occurrence in YYYY-MM-DD format
+        amount: Amount of each occurrence (positive number)
+        category: Main expense category
+        frequency: "daily", "weekly", "monthly" or "yearly"
+        interval: Repeat every N periods, e.g. 2 with "weekly" for every other week
+        end_date: Optional last possible date (inclusive) in YYYY-MM-DD format
+        count: Optional total number of occurrences
+        subcategory: Optional subcategory
+        note: Optional note or description
+
+    Returns:
+        Dictionary with status, rule_id and the rule
+    """
+    try:
+        expense = Expense(date=start_date, amount=amount, category=category, subcategory=subcategory, note=note)
+        expense.category, expense.subcategory = canonical_category(expense.category, expense.subcategory)
+        start_day = date_to_day(start_date)
+        until_day = date_to_day(end_date) if end_date else None
+        if interval < 1:
+            raise ValueError("interval must be at least 1")
+        if count is not None and count < 1:
+            raise ValueError("count must be at least 1")
+        if until_day is not None and until_day < start_day:
+            raise ValueError("end_date must not be before start_date")
+    except ValueError as e:
+        return {"status": "error", "message": f"Validation error: {str(e)}"}
+
+    try:
+        rule_id = new_expense_id()
+        rule = {
+            "id": rule_id, "frequency": frequency, "interval": interval, "start_day": start_day,
+            "until_day": until_day, "max_count": count, "amount_cents": amount_to_cents(expense.amount),
+            "category": expense.category, "subcategory": expense.subcategory, "note": expense.note,
+            "materialized": 0,
+        }
+        rule["next_day"] = next_occurrence(rule, 0)
+        await db.execute(INSERT_RULE_SQL, (
+            rule_id, frequency, interval, start_day, until_day, count, rule["amount_cents"],
+            expense.category, expense.subcategory, expense.note, rule["next_day"]
+        ))
+        return {
+            "status": "success",
+            "rule_id": rule_id,
+            "rule": rule_dict(rule),
+            "message": f"Recurring expense of ${expense.amount:.2f} for {expense.category} added ({frequency})"
+        }
+    except Exception as e:
+        return {"status": "error", "message": f"Database error: {str(e)}"}
+
+
+@tool_registry.tool()
+async def list_recurring_expenses() -> Dict[str, Any]:
+    """List the recurring expense rules.
+
+    Returns:
+        Dictionary with every rule, how many occurrences have been added
+        so far and the date of the next one (None once the rule has ended)
+    """
+    try:
+        rows = await db.fetch_all(f"SELECT {RULE_COLUMNS_SQL} FROM recurring_rules ORDER BY start_day, id")
+        rules = [rule_dict(row) for row in rows]
+        return {"rules": rules, "count": len(rules)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error listing recurring expenses: {str(e)}"}
+
+
+@tool_registry.tool(writes=True)
+async def remove_recurring_expense(rule_id: str) -> Dict[str, Any]:
+    """Stop a recurring expense.
+
+    Occurrences already added stay; use delete_expense to remove them.
+
+    Args:
+        rule_id: The ID of the rule, from add_recurring_expense or list_recurring_expenses
+
+    Returns:
+        Dictionary with status and message
+    """
+    try:
+        async with db.transaction():
+            result = await db.execute("DELETE FROM recurring_rules WHERE id = ?", (rule_id,))
+            await db.execute("DELETE FROM recurring_occurrences WHERE rule_id = ?", (rule_id,))
+        if result.rows_affected == 0:
+            return {"status": "error", "message": f"Recurring expense {rule_id} not found"}
+        return {"status": "success", "message": f"Recurring expense {rule_id} removed"}
+    except Exception as e:
+        return {"status": "error", "message": f"Error removing recurring expense: {str(e)}"}
+
+
+def register_recurring_tools(mcp: "FastMCP"):
+    """Register recurring expense MCP tools"""
+    tool_registry.add_to(mcp, add_recurring_expense, list_recurring_expenses, remove_recurring_expense)
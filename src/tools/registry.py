@@ -0,0 +1,70 @@
+"""
+Shared registry of expense tools.
+
+Each tool is a plain async function registered once with
+``@tool_registry.tool()``. The MCP server hands every entry to FastMCP,
+and the HTTP API dispatches ``/call_tool`` and ``/call_tools`` through
+``call()``, so both transports run the same code and argument
+validation.
+"""
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Optional
+
+from pydantic import ValidationError, validate_call
+
+if TYPE_CHECKING:
+    # Only for annotations; FastMCP is slow to import and the HTTP API doesn't need it
+    from fastmcp import FastMCP
+
+
+class RegisteredTool(NamedTuple):
+    name: str
+    fn: Callable
+    # Coerces and validates keyword arguments the way MCP does
+    validated: Callable
+    writes: bool
+
+
+class ToolRegistry:
+    """Name -> tool function, with a flag for tools that modify data"""
+
+    def __init__(self):
+        self._tools: Dict[str, RegisteredTool] = {}
+
+    def tool(self, writes: bool = False) -> Callable[[Callable], Callable]:
+        """Decorator registering an async tool function; returns it unchanged"""
+        def decorator(fn: Callable) -> Callable:
+            if fn.__name__ in self._tools:
+                raise ValueError(f"Tool '{fn.__name__}' already registered")
+            self._tools[fn.__name__] = RegisteredTool(fn.__name__, fn, validate_call(fn), writes)
+            return fn
+        return decorator
+
+    def get(self, name: str) -> Optional[RegisteredTool]:
+        return self._tools.get(name)
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def add_to(self, mcp: "FastMCP", *functions: Callable):
+        """Register the given tool functions with a FastMCP server"""
+        for fn in functions:
+            mcp.tool()(self._tools[fn.__name__].fn)
+
+    async def call(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Run a tool by name.
+
+        Raises KeyError for unknown tools. Invalid arguments are reported
+        as an error result, like any other tool failure.
+        """
+        tool = self._tools[name]
+        try:
+            return await tool.validated(**arguments)
+        except ValidationError as e:
+            problems = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+            return {"status": "error", "message": f"Invalid arguments: {problems}"}
+
+
+# Global tool registry instance
+tool_registry = ToolRegistry()
@@ -0,0 +1,279 @@
+"""
+Heavy reports as background jobs: ``submit_report`` returns a job id and
+``get_report`` polls (or waits for) the result.
+
+A report runs in a worker process (see ``src.utils.jobs``) on its own
+read-only connection, inside one read transaction, so it sees a
+consistent snapshot of the organization's database and the change log
+sequence it reflects. The reports are the same as the inline tools of
+the same name; their arguments are validated before the job is queued.
+"""
+import sqlite3
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Literal, Optional, Tuple
+
+from pydantic import ValidationError, validate_call
+
+from src.config.settings import settings
+from src.database.codec import date_to_day
+from src.database.partitions import attach_archive
+from src.database.rollups import build_comparison_query, build_rollup_summary_query
+from src.database.sqlite_client import CHANGE_SEQ_SQL, db
+from src.tools.analytics_tools import MAX_TOP_NOTES, check_percentiles, check_rolling_window
+from src.tools.expense_tools import (
+    comparison_ranges, comparison_result, materialize_recurring, summary_result
+)
+from src.tools.registry import tool_registry
+from src.utils.jobs import JobLimitError, jobs
+from src.utils.tenancy import current_org
+
+if TYPE_CHECKING:
+    from fastmcp import FastMCP
+
+
+def _fetch_all(conn: sqlite3.Connection, query: str, params: tuple) -> List[Dict[str, Any]]:
+    cursor = conn.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def _summary(conn: sqlite3.Connection, start_date, end_date, category, by_subcategory) -> Dict[str, Any]:
+    query, params = build_rollup_summary_query(start_date, end_date, category, by_subcategory)
+    return summary_result(_fetch_all(conn, query, params), start_date, end_date)
+
+
+def _comparison(conn: sqlite3.Connection, ranges, category, by_subcategory) -> Dict[str, Any]:
+    query, params = build_comparison_query([(s, e) for _, s, e in ranges], category, by_subcategory)
+    return comparison_result(ranges, _fetch_all(conn, query, params))
+
+
+def _run_sql_report(path: str, report: Callable, args: tuple) -> Tuple[int, Dict[str, Any]]:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        attach_archive(conn, path)
+        conn.execute("BEGIN")
+        seq = conn.execute(CHANGE_SEQ_SQL).fetchone()[0]
+        return seq, report(conn, *args)
+    finally:
+        conn.close()
+
+
+def _run_snapshot_report(path: str, name: str, args: tuple) -> Tuple[int, Dict[str, Any]]:
+    # NumPy is only imported by the worker processes that need it
+    from src.database.snapshot import read_snapshot
+
+    snapshot, _ = read_snapshot(path, None)
+    if name == "expense_trends":
+        start_day, end_day, granularity, category, rolling_window = args
+        periods = snapshot.trends(start_day, end_day, granularity, category, rolling_window)
+        result = {"granularity": granularity, "periods": periods,
+                  "total": round(sum(p["total"] for p in periods), 2)}
+    elif name == "expense_percentiles":
+        start_day, end_day, category, percentiles = args
+        overall, by_category = snapshot.percentiles(start_day, end_day, percentiles, category)
+        result = {"overall": overall, "by_category": by_category}
+    else:
+        start_day, end_day, category, limit, by = args
+        result = {"notes": snapshot.top_notes(start_day, end_day, limit, by, category), "by": by}
+    return snapshot.watermark, result
+
+
+def run_report(path: str, name: str, args: tuple, period: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+    """Compute a report against the database at ``path`` (runs in a worker process).
+
+    Returns the change log sequence the result reflects and the result.
+    """
+    if name == "summarize_expenses":
+        seq, result = _run_sql_report(path, _summary, args)
+    elif name == "compare_periods":
+        seq, result = _run_sql_report(path, _comparison, args)
+    else:
+        seq, result = _run_snapshot_report(path, name, args)
+    if period is not None:
+        result["period"] = period
+    return seq, result
+
+
+# Validate each report's arguments in the server process and return the
+# (picklable) arguments for run_report and the period label
+
+def _summary_args(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+) -> Tuple[tuple, Optional[str]]:
+    date_to_day(start_date)
+    date_to_day(end_date)
+    return (start_date, end_date, category, by_subcategory), f"{start_date} to {end_date}"
+
+
+def _comparison_args(
+    period: Literal["week", "month", "quarter", "year"] = "month",
+    anchor_date: Optional[str] = None,
+    periods: int = 2,
+    align: Literal["previous", "year_over_year"] = "previous",
+    to_date: bool = False,
+    category: Optional[str] = None,
+    by_subcategory: bool = False
+) -> Tuple[tuple, Optional[str]]:
+    _, ranges = comparison_ranges(period, anchor_date, periods, align, to_date)
+    return (ranges, category, by_subcategory), None
+
+
+def _trends_args(
+    start_date: str,
+    end_date: str,
+    granularity: Literal["week", "month"] = "month",
+    category: Optional[str] = None,
+    rolling_window: int = 0
+) -> Tuple[tuple, Optional[str]]:
+    check_rolling_window(rolling_window)
+    args = (date_to_day(start_date), date_to_day(end_date), granularity, category, rolling_window)
+    return args, f"{start_date} to {end_date}"
+
+
+def _percentiles_args(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    percentiles: Optional[List[float]] = None
+) -> Tuple[tuple, Optional[str]]:
+    args = (date_to_day(start_date), date_to_day(end_date), category, check_percentiles(percentiles))
+    return args, f"{start_date} to {end_date}"
+
+
+def _top_notes_args(
+    start_date: str,
+    end_date: str,
+    category: Optional[str] = None,
+    limit: int = 10,
+    by: Literal["total", "count"] = "total"
+) -> Tuple[tuple, Optional[str]]:
+    args = (date_to_day(start_date), date_to_day(end_date), category, max(1, min(limit, MAX_TOP_NOTES)), by)
+    return args, f"{start_date} to {end_date}"
+
+
+_REPORT_ARGS = {
+    "summarize_expenses": validate_call(_summary_args),
+    "compare_periods": validate_call(_comparison_args),
+    "expense_trends": validate_call(_trends_args),
+    "expense_percentiles": validate_call(_percentiles_args),
+    "top_notes": validate_call(_top_notes_args),
+}
+
+
+def _materialize_through(report: str, args: tuple) -> Optional[str]:
+    """End date to materialize recurring expenses through before ``report`` runs.
+
+    Matches the inline tools: SQL reports read their date range, snapshot
+    reports (None) read a snapshot of everything up to today.
+    """
+    if report == "summarize_expenses":
+        return args[1]
+    if report == "compare_periods":
+        return max(e for _, _, e in args[0]).isoformat()
+    return None
+
+
+def _hashable(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def _job_result(job, report: str) -> Dict[str, Any]:
+    info = {"status": "success", "report": report, **job.describe()}
+    if job.state == "done":
+        info["result"] = job.result
+    return info
+
+
+@tool_registry.tool()
+async def submit_report(
+    report: Literal["summarize_expenses", "compare_periods", "expense_trends", "expense_percentiles", "top_notes"],
+    arguments: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Start a report in the background and return a job id for get_report.
+
+    Use this instead of calling the report tool directly for long date
+    ranges: the work runs in a separate process, so it doesn't slow down
+    other requests or time out. Submitting the same report again while it
+    runs, or before the data changes, returns the existing job.
+
+    Args:
+        report: Name of the report tool to run
+        arguments: That tool's arguments, e.g. {"start_date": "2020-01-01", "end_date": "2025-12-31"}
+
+    Returns:
+        Dictionary with the job id and its state
+    """
+    try:
+        report_args, period = _REPORT_ARGS[report](**(arguments or {}))
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+        )
+        return {"status": "error", "message": f"Invalid arguments: {problems}"}
+    except (TypeError, ValueError) as e:
+        return {"status": "error", "message": str(e)}
+
+    try:
+        # The worker reads the file directly, so due occurrences must exist first
+        await materialize_recurring(_materialize_through(report, report_args))
+        change_seq = await db.change_seq()
+        job = jobs.submit(
+            (report, _hashable(report_args)), change_seq,
+            run_report, db.path_for(current_org()), report, report_args, period
+        )
+    except JobLimitError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error submitting report: {str(e)}"}
+    return _job_result(job, report)
+
+
+@tool_registry.tool()
+async def get_report(job_id: str, wait_seconds: float = 0) -> Dict[str, Any]:
+    """Get the state of a report job, and its result once it is done.
+
+    Args:
+        job_id: Job id returned by submit_report
+        wait_seconds: Wait up to this long for the job to finish before
+            answering (default 0, max 30 by default)
+
+    Returns:
+        Dictionary with the job state ("queued", "running", "done",
+        "failed" or "cancelled"), the result when done, and whether the
+        data has changed since the report was computed
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Report job {job_id} not found or expired"}
+    await jobs.wait(job, min(max(wait_seconds, 0), settings.job_max_wait_seconds))
+    info = _job_result(job, job.key[0])
+    if job.state == "done":
+        info["stale"] = job.change_seq != await db.change_seq()
+    return info
+
+
+@tool_registry.tool()
+async def cancel_report(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running report job.
+
+    Args:
+        job_id: Job id returned by submit_report
+
+    Returns:
+        Dictionary with the job's final state
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Report job {job_id} not found or expired"}
+    if not jobs.cancel(job):
+        return {"status": "error", "message": f"Report job {job_id} already {job.state}"}
+    return _job_result(job, job.key[0])
+
+
+def register_report_tools(mcp: "FastMCP"):
+    """Register background report MCP tools"""
+    tool_registry.add_to(mcp, submit_report, get_report, cancel_report)
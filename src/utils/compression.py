@@ -0,0 +1,186 @@
+"""
+ASGI middleware compressing HTTP responses with brotli or gzip.
+
+Brotli is used when the ``brotli`` package is installed and the client
+accepts it; gzip otherwise. Complete responses smaller than the minimum
+size are sent as they are. Longer streaming responses (NDJSON) are
+compressed chunk by chunk and flushed after every chunk, so lines still
+arrive as they are produced.
+
+A compressed body is a different representation, so a strong ETag gets
+the encoding appended (``"abc"`` becomes ``"abc-br"``); ``etag_matches``
+accepts any of the variants when checking If-None-Match.
+"""
+import gzip
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred encoding the client accepts, or None"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of If-None-Match against ``etag`` and its encoded variants"""
+    if not if_none_match:
+        return False
+    opaque = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        candidate = candidate.strip('"')
+        for encoding in ENCODINGS:
+            if candidate.endswith(f"-{encoding}"):
+                candidate = candidate[:-len(encoding) - 1]
+                break
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    if content_type.startswith("text/event-stream"):
+        # Events are small and must not wait for minimum_size to accumulate
+        return False
+    return content_type.startswith("text/") or "json" in content_type or "javascript" in content_type
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits 31: zlib stream with a gzip header and trailer
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str, gzip_level: int, brotli_quality: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress text and JSON responses for clients that accept it"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+        # Body held back until it reaches minimum_size or ends: responses that
+        # pass through BaseHTTPMiddleware arrive in chunks even when small
+        pending = b""
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough, pending
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=start.get("headers", []))
+                passthrough = (
+                    start["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not _compressible(headers.get("content-type", ""))
+                )
+                if passthrough:
+                    await send(start)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                pending += body
+                if more_body and len(pending) < self.minimum_size:
+                    return
+                body, pending = pending, b""
+                start["headers"] = list(start.get("headers", []))
+                headers = MutableHeaders(raw=start["headers"])
+
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                headers.add_vary_header("Accept-Encoding")
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/") and etag.endswith('"'):
+                    headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+
+                if not more_body:
+                    # Whole response at hand: compress it in one go
+                    body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                del headers["Content-Length"]
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                await send(start)
+
+            data = compressor.chunk(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,209 @@
+"""
+Background jobs on a process pool, for reports too heavy to run inline.
+
+A job runs a picklable function in a worker process, so a long
+aggregation neither holds an aiosqlite thread nor the event loop; other
+requests keep flowing while it runs. The pool size caps how many jobs
+run at once, and each organization may have at most ``max_pending`` jobs
+queued or running.
+
+Finished jobs are kept for ``ttl_seconds``. Submitting the same job
+again (same organization and key) while an earlier one is still pending,
+or finished against the same change log sequence, returns the earlier
+job instead of computing it twice.
+
+A queued job is cancelled outright. A running one cannot be interrupted
+in its worker process; it is marked cancelled and its result discarded.
+"""
+import asyncio
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.config.settings import settings
+from src.utils.metrics import metrics
+from src.utils.tenancy import current_org
+
+
+class JobLimitError(Exception):
+    """The organization already has the maximum number of pending jobs"""
+
+
+class Job:
+    """One submitted job and, once finished, its outcome"""
+
+    __slots__ = ("id", "org", "key", "change_seq", "submitted_at", "finished_at",
+                 "state", "result", "error", "future", "done")
+
+    def __init__(self, org: str, key: Hashable, change_seq: int):
+        self.id = uuid.uuid4().hex
+        self.org = org
+        self.key = key
+        self.change_seq = change_seq
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+        # queued, running, done, failed or cancelled
+        self.state = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+        self.done = asyncio.Event()
+
+    @property
+    def pending(self) -> bool:
+        return self.state in ("queued", "running")
+
+    def describe(self) -> Dict[str, Any]:
+        state = self.state
+        if state == "queued" and self.future is not None and self.future.running():
+            state = "running"
+        info = {
+            "job_id": self.id,
+            "state": state,
+            "submitted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.submitted_at)),
+            "change_seq": self.change_seq,
+        }
+        if self.finished_at is not None:
+            info["elapsed_seconds"] = round(self.finished_at - self.submitted_at, 3)
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+class JobRunner:
+    """Runs jobs on a lazily started process pool and keeps their results"""
+
+    def __init__(self, workers: int, max_pending: int, ttl_seconds: float):
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.ttl_seconds = ttl_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[Hashable, Job] = {}
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.reused = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: the server process has threads (aiosqlite,
+            # the export workers) that a forked child would inherit mid-lock
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        for job in [j for j in self._jobs.values() if j.finished_at is not None and j.finished_at < cutoff]:
+            del self._jobs[job.id]
+            if self._by_key.get((job.org, job.key)) is job:
+                del self._by_key[(job.org, job.key)]
+
+    def submit(self, key: Hashable, change_seq: int, fn: Callable, *args: Any) -> Job:
+        """Run ``fn(*args)`` in a worker process for the current organization.
+
+        ``key`` identifies the job's inputs and ``change_seq`` the data it
+        reads; a matching pending or finished job is returned instead.
+        ``fn`` returns ``(change_seq, result)``. Raises JobLimitError when
+        the organization has too many pending jobs.
+        """
+        self._expire()
+        org = current_org()
+        existing = self._by_key.get((org, key))
+        if existing is not None and (
+            existing.pending or (existing.state == "done" and existing.change_seq == change_seq)
+        ):
+            self.reused += 1
+            return existing
+
+        pending = sum(1 for job in self._jobs.values() if job.org == org and job.pending)
+        if pending >= self.max_pending:
+            raise JobLimitError(f"Too many reports in progress ({pending}); wait for one to finish or cancel it")
+
+        job = Job(org, key, change_seq)
+        try:
+            job.future = self._pool().submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool
+            self._executor = None
+            job.future = self._pool().submit(fn, *args)
+        self._jobs[job.id] = job
+        self._by_key[(org, key)] = job
+        asyncio.wrap_future(job.future).add_done_callback(lambda _: self._finish(job))
+        return job
+
+    def _finish(self, job: Job):
+        future = job.future
+        job.finished_at = time.time()
+        if job.state == "cancelled" or future.cancelled():
+            job.state = "cancelled"
+        elif future.exception() is not None:
+            job.state = "failed"
+            job.error = str(future.exception()) or type(future.exception()).__name__
+            self.failed += 1
+        else:
+            job.change_seq, job.result = future.result()
+            job.state = "done"
+            self.completed += 1
+        job.done.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The current organization's job, or None if unknown or expired"""
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None or job.org != current_org():
+            return None
+        return job
+
+    async def wait(self, job: Job, timeout: float):
+        """Wait up to ``timeout`` seconds for a job to finish"""
+        if job.pending and timeout > 0:
+            try:
+                await asyncio.wait_for(job.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def cancel(self, job: Job) -> bool:
+        """Cancel a pending job; returns False if it had already finished"""
+        if not job.pending:
+            return False
+        job.state = "cancelled"
+        job.future.cancel()
+        self.cancelled += 1
+        if self._by_key.get((job.org, job.key)) is job:
+            del self._by_key[(job.org, job.key)]
+        return True
+
+    async def close(self):
+        """Cancel queued jobs and stop the pool without waiting for running ones"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": sum(1 for job in self._jobs.values() if job.pending),
+            "kept": len(self._jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "reused": self.reused,
+        }
+
+
+# Global job runner for submit_report
+jobs = JobRunner(
+    workers=settings.job_workers,
+    max_pending=settings.job_max_pending,
+    ttl_seconds=settings.job_result_ttl_seconds,
+)
+
+metrics.gauge(
+    "expense_jobs", "Background report jobs", ("stat",),
+    lambda: {(key,): value for key, value in jobs.stats().items()}
+)
@@ -0,0 +1,218 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters and histograms are plain dicts keyed by label values. Recording
+one observation is a dict lookup and a bisect over the bucket bounds, with
+no locks: every caller runs on the event loop thread. ``render()`` produces
+the Prometheus text format served on ``/metrics`` and the
+``expense:///metrics`` resource.
+"""
+import re
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config.settings import settings
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# SQL strings memoized for statement_label
+MAX_STATEMENT_LABELS = 512
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonic counter family"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}"
+            for labels, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """Histogram family with fixed upper bounds"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [bucket counts..., +Inf count, sum, count]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return series[-1] if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), series):
+                cumulative += bucket_count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_number(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Gauge family whose samples are read from a callback at render time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_number(float(value))}"
+            for labels, value in sorted(self.collect().items())
+        ]
+
+
+class MetricsRegistry:
+    """Holds every metric family and renders them"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._families: Dict[str, Any] = {}
+
+    def _register(self, family):
+        if family.name in self._families:
+            raise ValueError(f"Metric {family.name} already registered")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str],
+              collect: Callable[[], Dict[Tuple[str, ...], float]]) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames, collect))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.extend(family.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry(enabled=settings.metrics_enabled)
+
+TOOL_DURATION = metrics.histogram(
+    "expense_tool_duration_seconds", "Tool call latency", ("transport", "tool")
+)
+TOOL_ERRORS = metrics.counter(
+    "expense_tool_errors_total", "Tool calls that raised or returned an error status", ("transport", "tool")
+)
+TOOL_RESPONSE_BYTES = metrics.histogram(
+    "expense_tool_response_bytes", "Serialized tool result size", ("transport", "tool"), BYTES_BUCKETS
+)
+DB_QUERY_DURATION = metrics.histogram(
+    "expense_db_query_duration_seconds", "SQLite statement latency, including pool and batch waits",
+    ("operation", "statement")
+)
+DB_QUERY_ERRORS = metrics.counter(
+    "expense_db_query_errors_total", "SQLite statements that failed", ("operation", "statement")
+)
+DB_ROWS_RETURNED = metrics.counter(
+    "expense_db_rows_returned_total", "Rows returned by SQLite reads", ("statement",)
+)
+
+
+_STATEMENT_VERB = re.compile(r"^\s*(\w+)")
+_STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+_statement_labels: Dict[str, str] = {}
+
+
+def statement_label(sql: str) -> str:
+    """Low-cardinality label for a statement, e.g. ``select expenses``"""
+    label = _statement_labels.get(sql)
+    if label is None:
+        verb = _STATEMENT_VERB.match(sql)
+        table = _STATEMENT_TABLE.search(sql)
+        label = " ".join(part.group(1).lower() for part in (verb, table) if part) or "other"
+        if len(_statement_labels) < MAX_STATEMENT_LABELS:
+            _statement_labels[sql] = label
+    return label
+
+
+def record_query(operation: str, sql: str, started: float, rows: Optional[int] = None, failed: bool = False):
+    """Record one SQLite call that began at ``started`` (perf_counter)"""
+    label = statement_label(sql)
+    DB_QUERY_DURATION.observe(time.perf_counter() - started, operation, label)
+    if failed:
+        DB_QUERY_ERRORS.inc(operation, label)
+    elif rows is not None:
+        DB_ROWS_RETURNED.inc(label, amount=rows)
+
+
+def record_tool(transport: str, tool: str, started: float, size: Optional[int] = None, failed: bool = False):
+    """Record one tool call that began at ``started`` (perf_counter)"""
+    TOOL_DURATION.observe(time.perf_counter() - started, transport, tool)
+    if failed:
+        TOOL_ERRORS.inc(transport, tool)
+    if size is not None:
+        TOOL_RESPONSE_BYTES.observe(size, transport, tool)
+
@@ -0,0 +1,49 @@
+"""
+FastMCP middleware: tool metrics and the organization scope.
+
+Kept apart from ``src.utils.metrics`` so that importing the metrics (as
+the database client does) does not import FastMCP.
+"""
+import time
+
+from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.middleware import Middleware
+
+from src.utils.metrics import metrics, record_tool
+from src.utils.tenancy import ADMIN_HEADER, ORG_HEADER, admin_scope, org_scope
+
+
+class OrganizationMiddleware(Middleware):
+    """Runs each request for the organization named in the ``X-Org-Id`` header,
+    as admin when ``X-Admin-Token`` carries the admin token.
+
+    Over stdio there are no headers, so every request belongs to the
+    default organization and none is admin.
+    """
+
+    async def on_request(self, context, call_next):
+        headers = get_http_headers()
+        with org_scope(headers.get(ORG_HEADER)), admin_scope(headers.get(ADMIN_HEADER)):
+            return await call_next(context)
+
+
+class ToolMetricsMiddleware(Middleware):
+    """Records latency, errors and result size for every MCP tool call"""
+
+    async def on_call_tool(self, context, call_next):
+        if not metrics.enabled:
+            return await call_next(context)
+
+        tool = context.message.name
+        started = time.perf_counter()
+        try:
+            result = await call_next(context)
+        except Exception:
+            record_tool("mcp", tool, started, failed=True)
+            raise
+
+        structured = result.structured_content
+        failed = isinstance(structured, dict) and structured.get("status") == "error"
+        size = sum(len(block.text) for block in result.content if getattr(block, "text", None) is not None)
+        record_tool("mcp", tool, started, size, failed)
+        return result
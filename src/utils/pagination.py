@@ -0,0 +1,32 @@
+import base64
+import json
+from typing import Any, List, Optional
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by ``encode_cursor``.
+
+    Raises ValueError if the cursor is malformed or does not carry
+    ``size`` key values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def clamp_limit(limit: Optional[int], default: int, maximum: int) -> int:
+    """Apply the default page size and cap it at ``maximum``"""
+    if limit is None:
+        return default
+    return max(1, min(int(limit), maximum))
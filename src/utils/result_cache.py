@@ -0,0 +1,290 @@
+"""
+In-process LRU/TTL cache for read-tool results.
+
+Entries record the generation counters of the (period, category) buckets
+their date range covers. Writes bump the counters for the buckets they
+touch, so an entry is invalidated exactly when a write lands in an
+overlapping month and category. Generations are read before the query
+runs and bumped after the write commits. A read that races a write is
+therefore stored under the old generation and is never served.
+
+Keys and generations are scoped to the current organization, so tenants
+never see each other's results and a write only invalidates its own
+organization's entries.
+
+Other processes (main.py, another API worker, a job runner) write the
+same databases without touching these counters. Every lookup therefore
+first reads the organization's change log position (``db.change_seq()``,
+one index lookup) and catches up on entries it has not seen: an insert
+invalidates the buckets of the row it added, while an update or delete,
+whose previous month and category are not logged, invalidates the whole
+organization. Writes made here are caught up on too, which only costs an
+occasional extra miss.
+"""
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from src.config.settings import settings
+from src.utils.metrics import metrics
+from src.utils.serialization import dumps
+from src.utils.tenancy import current_org
+
+
+# Ranges spanning more months than this depend on yearly buckets instead
+MAX_MONTH_BUCKETS = 36
+MAX_YEAR_BUCKETS = 50
+ALL_PERIODS = "*"
+# Catching up on more change log entries than this invalidates the whole organization
+MAX_SYNC_CHANGES = 256
+
+SYNC_CHANGES_SQL = """
+    SELECT c.seq, c.op, e.day, e.category
+    FROM expense_changes AS c LEFT JOIN expenses AS e ON e.pk = c.pk AND e.id = c.expense_id
+    WHERE c.seq > ?
+    ORDER BY c.seq
+    LIMIT ?
+"""
+
+
+def _normalize(value: Any) -> Any:
+    """Hashable form of tool arguments.
+
+    Strings are kept exactly as given: the query runs with the raw value,
+    so " food" and "food" must not share an entry.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items() if v is not None))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def _periods(start_date: str, end_date: str) -> List[str]:
+    """Bucket names covering an inclusive date range"""
+    try:
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+    except (TypeError, ValueError):
+        return [ALL_PERIODS]
+    if start > end:
+        return []
+
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    if months <= MAX_MONTH_BUCKETS:
+        periods = []
+        year, month = start.year, start.month
+        for _ in range(months):
+            periods.append(f"{year:04d}-{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return periods
+
+    if end.year - start.year + 1 <= MAX_YEAR_BUCKETS:
+        return [f"{year:04d}" for year in range(start.year, end.year + 1)]
+    return [ALL_PERIODS]
+
+
+# Invalidations held back by ``ResultCache.deferred_invalidation``
+_deferred: ContextVar[Optional[List[Tuple[str, Optional[str], Optional[str]]]]] = ContextVar(
+    "result_cache_deferred", default=None
+)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at", "deps")
+
+    def __init__(self, value: Any, size: int, expires_at: float, deps: Tuple[Tuple[Hashable, int], ...]):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.deps = deps
+
+
+class ResultCache:
+    """Bounded LRU cache with TTL and generation-based invalidation"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        # Change log position each organization's generations reflect
+        self._synced_seq: Dict[str, int] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _dependencies(self, start_date: str, end_date: str, category: Optional[str]) -> List[Hashable]:
+        category = category or None
+        org = current_org()
+        return [(org,)] + [(org, period, category) for period in _periods(start_date, end_date)]
+
+    def _snapshot(self, deps: Iterable[Hashable]) -> Tuple[Tuple[Hashable, int], ...]:
+        return tuple((dep, self._generations.get(dep, 0)) for dep in deps)
+
+    def _is_current(self, entry: _Entry) -> bool:
+        return all(self._generations.get(dep, 0) == gen for dep, gen in entry.deps)
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry.expires_at < time.monotonic() or not self._is_current(entry):
+            self._remove(key)
+            self.invalidations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry.value
+
+    def put(self, key: Hashable, value: Any, deps: Tuple[Tuple[Hashable, int], ...]):
+        size = len(dumps(value))
+        if size > self.max_bytes // 4:
+            # Large results would push out many small ones; don't cache them
+            return
+        self._remove(key)
+        self._entries[key] = _Entry(value, size, time.monotonic() + self.ttl_seconds, deps)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        tool: str,
+        args: Dict[str, Any],
+        start_date: str,
+        end_date: str,
+        category: Optional[str],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Return a cached result for ``tool(**args)`` or compute and cache it"""
+        if not self.enabled or _deferred.get() is not None:
+            # Inside a deferred block the task may see its own uncommitted writes
+            return await compute()
+
+        org = current_org()
+        await self._sync(org)
+        key = (org, tool, _normalize(args))
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        # Snapshot generations before querying so a concurrent write invalidates us
+        deps = self._snapshot(self._dependencies(start_date, end_date, category))
+        value = await compute()
+        self.put(key, value, deps)
+        return value
+
+    async def _sync(self, org: str):
+        """Apply writes logged since the last lookup, including other processes' writes"""
+        # Deferred: the database package is built on top of these utilities
+        from src.database.codec import day_to_date
+        from src.database.sqlite_client import db
+
+        seq = await db.change_seq()
+        synced = self._synced_seq.get(org)
+        if synced == seq:
+            return
+        if synced is None or seq < synced:
+            # First lookup, or the log was pruned or replaced: trust nothing cached
+            self._invalidate_org(org)
+        else:
+            changes = await db.fetch_all(SYNC_CHANGES_SQL, (synced, MAX_SYNC_CHANGES + 1))
+            if len(changes) > MAX_SYNC_CHANGES or any(c["op"] != "insert" or c["day"] is None for c in changes):
+                self._invalidate_org(org)
+            else:
+                for change in changes:
+                    self.invalidate(day_to_date(change["day"]), change["category"], org)
+        # Only after invalidating, so a concurrent lookup never skips these changes
+        self._synced_seq[org] = seq
+
+    def _invalidate_org(self, org: str):
+        key = (org,)
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    @contextmanager
+    def deferred_invalidation(self):
+        """Hold back invalidations from the current task until the block exits.
+
+        Wrap a ``db.transaction()`` block in this so generations are bumped
+        after the commit, not before it. Invalidations are applied even if
+        the block raises, which is harmless after a rollback.
+        """
+        if _deferred.get() is not None:
+            yield
+            return
+        pending: List[Tuple[str, Optional[str], Optional[str]]] = []
+        token = _deferred.set(pending)
+        try:
+            yield
+        finally:
+            _deferred.reset(token)
+            for org, expense_date, category in pending:
+                self.invalidate(expense_date, category, org)
+
+    def invalidate(self, expense_date: Optional[str], category: Optional[str], org: Optional[str] = None):
+        """Record a committed write to ``expense_date`` in ``category``"""
+        org = org or current_org()
+        pending = _deferred.get()
+        if pending is not None:
+            pending.append((org, expense_date, category))
+            return
+
+        try:
+            day = date.fromisoformat(expense_date)
+            periods = [f"{day.year:04d}-{day.month:02d}", f"{day.year:04d}"]
+        except (TypeError, ValueError):
+            periods = []
+        periods.append(ALL_PERIODS)
+
+        for period in periods:
+            for cat in (None, category or None):
+                key = (org, period, cat)
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+# Global result cache instance
+result_cache = ResultCache(
+    max_bytes=settings.result_cache_max_bytes,
+    ttl_seconds=settings.result_cache_ttl_seconds,
+    enabled=settings.result_cache_enabled,
+)
+
+metrics.gauge(
+    "expense_result_cache", "Read-tool result cache counters", ("stat",),
+    lambda: {(key,): value for key, value in result_cache.stats().items()
+             if key in ("hits", "misses", "evictions", "invalidations", "entries", "bytes")}
+)
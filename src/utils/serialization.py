@@ -0,0 +1,23 @@
+"""
+JSON encoding for HTTP responses and result-cache sizing.
+
+Uses orjson when it is installed (``pip install orjson``) and the
+standard library otherwise. Both produce compact UTF-8 JSON; values the
+encoder does not know are written with ``str()``.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+JSON_ENCODER = "orjson" if orjson is not None else "json"
+
+
+def dumps(value: Any) -> bytes:
+    """Encode ``value`` as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,69 @@
+"""
+Organization context for the current request.
+
+The organization id travels in a context variable, set by the HTTP and
+MCP middleware from the ``X-Org-Id`` header, and is read wherever data
+is routed or cached per tenant. Requests without one belong to
+``DEFAULT_ORG``.
+
+Operations that span or maintain organizations' databases are for
+administrators only: the same middleware marks a request as admin when
+its ``X-Admin-Token`` header matches ``settings.admin_token``. With no
+token configured, no request is admin.
+"""
+import hmac
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from src.config.settings import settings
+
+ORG_HEADER = "x-org-id"
+ADMIN_HEADER = "x-admin-token"
+DEFAULT_ORG = "default"
+
+# Used as a file name, so keep it to a safe character set
+_ORG_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_current_org: ContextVar[str] = ContextVar("current_org", default=DEFAULT_ORG)
+_is_admin: ContextVar[bool] = ContextVar("is_admin", default=False)
+
+
+def validate_org_id(org_id: Optional[str]) -> str:
+    """Return the organization id to use, or raise ValueError if it is malformed"""
+    if org_id is None or org_id == "":
+        return DEFAULT_ORG
+    if not _ORG_ID.match(org_id):
+        raise ValueError("Organization id must be 1-64 letters, digits, '-' or '_'")
+    return org_id
+
+
+def current_org() -> str:
+    return _current_org.get()
+
+
+@contextmanager
+def org_scope(org_id: Optional[str]):
+    """Run the enclosed block on behalf of ``org_id``"""
+    token = _current_org.set(validate_org_id(org_id))
+    try:
+        yield
+    finally:
+        _current_org.reset(token)
+
+
+def is_admin() -> bool:
+    return _is_admin.get()
+
+
+@contextmanager
+def admin_scope(token: Optional[str]):
+    """Run the enclosed block as admin if ``token`` is the configured admin token"""
+    expected = settings.admin_token
+    admin = bool(expected) and token is not None and hmac.compare_digest(token.encode(), expected.encode())
+    reset = _is_admin.set(admin)
+    try:
+        yield
+    finally:
+        _is_admin.reset(reset)
@@ -0,0 +1,45 @@
+"""
+Shared fixtures.
+
+Settings are read when ``src`` is first imported, so the database path
+and admin token are pointed at a scratch directory here, before any test
+module imports the package. Every async call in the session runs on one
+event loop, the way the servers run, so the global clients and their
+locks are never shared across loops.
+"""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+WORKDIR = tempfile.mkdtemp(prefix="expense-tests-")
+
+os.environ["DATABASE_PATH"] = os.path.join(WORKDIR, "expenses.db")
+os.environ["ADMIN_TOKEN"] = "test-admin-token"
+
+
+@pytest.fixture(scope="session")
+def run():
+    """Run a coroutine to completion on the session's event loop"""
+    from src.database.sqlite_client import db
+
+    loop = asyncio.new_event_loop()
+    try:
+        yield loop.run_until_complete
+    finally:
+        loop.run_until_complete(db.close())
+        loop.close()
+
+
+@pytest.fixture(scope="session")
+def api(run):
+    """HTTP client for the API app, without a network socket or the lifespan's background jobs"""
+    import httpx
+    from src.http_server import app
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    try:
+        yield client
+    finally:
+        run(client.aclose())
@@ -0,0 +1,85 @@
+"""
+Keyset pagination must return every expense exactly once, in order.
+
+Each test runs as an organization of its own. Many expenses share a day
+and a created_at second, so page boundaries fall inside ties that only
+the pk breaks, and older years are archived, so pages cross from the
+main table into the partitions.
+"""
+import re
+from datetime import date
+
+import pytest
+
+from src.database.codec import date_to_day
+from src.database.sqlite_client import db
+from src.tools.expense_tools import INSERT_SQL, add_expense, list_expenses, list_expenses_page
+from src.utils.tenancy import org_scope
+
+DAYS = ["2021-02-01", "2021-11-30", "2024-03-05", "2024-03-05", "2024-03-06", "2025-01-01"]
+PER_DAY = 7
+START, END = "2021-01-01", "2025-12-31"
+
+
+@pytest.fixture
+def org(run, request):
+    org = re.sub(r"[^A-Za-z0-9_-]", "_", f"pages-{request.node.name}")[:64]
+    with org_scope(org):
+        run(db.executemany(INSERT_SQL, [
+            (f"{index:03d}{n:029d}", date_to_day(day), 100 + n, "food" if n % 2 else "transport", "", "")
+            for index, day in enumerate(DAYS) for n in range(PER_DAY)
+        ]))
+        result = run(db.compact_partitions(hot_years=2, today=date(2025, 6, 1)))
+        assert [entry["year"] for entry in result["archived"]] == [2021]
+        yield org
+
+
+def all_pages(run, limit: int, category=None, start_date=START, end_date=END):
+    ids, cursor = [], None
+    while True:
+        page = run(list_expenses_page(start_date, end_date, category, limit, cursor))
+        assert page["count"] <= limit
+        ids += [expense["id"] for expense in page["expenses"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def ordered_ids(run, category=None):
+    """Expected order: newest day first, then newest created_at, then highest pk"""
+    rows = run(db.fetch_all(
+        "SELECT id, day, created_at, pk FROM expenses WHERE (? IS NULL OR category = ?) "
+        "UNION ALL SELECT id, day, created_at, pk FROM archive.expenses_2021_1 WHERE (? IS NULL OR category = ?)",
+        (category, category) * 2
+    ))
+    rows.sort(key=lambda row: (row["day"], row["created_at"], row["pk"]), reverse=True)
+    return [row["id"] for row in rows]
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 100])
+def test_pages_cover_every_expense_once_in_order(run, org, limit):
+    assert all_pages(run, limit) == ordered_ids(run)
+    assert len(ordered_ids(run)) == len(DAYS) * PER_DAY
+
+
+@pytest.mark.parametrize("limit", [3, 5])
+def test_category_pages(run, org, limit):
+    assert all_pages(run, limit, "food") == ordered_ids(run, "food")
+
+
+def test_new_expenses_do_not_shift_later_pages(run, org):
+    first = run(list_expenses_page(START, END, None, 5, None))
+    # Newer than everything already listed: sorts before the cursor
+    assert run(add_expense("2025-06-01", 1, "food"))["status"] == "success"
+    rest, cursor = [], first["next_cursor"]
+    while cursor:
+        page = run(list_expenses_page(START, END, None, 5, cursor))
+        rest += [expense["id"] for expense in page["expenses"]]
+        cursor = page["next_cursor"]
+    listed = [expense["id"] for expense in first["expenses"]] + rest
+    assert len(listed) == len(set(listed)) == len(DAYS) * PER_DAY
+
+
+def test_bad_cursor_is_rejected(run, org):
+    result = run(list_expenses(START, END, cursor="not-a-cursor"))
+    assert result["status"] == "error" and "cursor" in result["message"].lower()
@@ -0,0 +1,174 @@
+"""
+Query-plan regression check for every query the tools and the HTTP API issue.
+
+Seeds a small database, drives every route and tool against it while
+SQLite traces each statement it runs, then checks the plan of every
+traced statement: a full scan of a table that grows with the data, or a
+sort through a temporary B-tree where an index should serve the ORDER
+BY, fails the test. Tracing the real calls instead of listing queries by
+hand means a new query is checked as soon as a route issues it.
+
+Compaction copies whole years by design, so it runs before tracing
+starts; the reads it makes possible (archive arms) are still checked.
+"""
+import os
+import re
+import sqlite3
+from typing import List, Set
+
+import pytest
+
+ROWS = 20000
+START, END = "2022-01-15", "2023-06-20"
+
+# Tables that grow with the expenses; archive partitions are expenses_<year>_<n>
+LARGE_TABLE = re.compile(
+    r"expenses|expense_daily_totals|expense_monthly_totals|expense_changes|recurring_occurrences|expenses_\d{4}_\d+"
+)
+# Rollups are excluded: summaries and comparisons sort a handful of aggregated
+# rollup rows, and catalog tables hold a row per year, budget or rule
+ROW_TABLE = re.compile(r"expenses|expense_changes|recurring_occurrences|expenses_\d{4}_\d+")
+PLAN_TABLE = re.compile(r"^(SCAN|SEARCH) (?:archive\.)?(\w+)")
+ALIAS = re.compile(r"\b(?:FROM|JOIN)\s+(?:archive\.)?(\w+)\s+(?:AS\s+)?(\w+)", re.IGNORECASE)
+TEMP_SORT = re.compile(r"USE TEMP B-TREE FOR (?:ORDER BY|RIGHT PART OF ORDER BY)")
+# Full-text matches are ordered by relevance, which no index can supply
+RANKED = re.compile(r"\bMATCH\b")
+STATEMENT = re.compile(r"^\s*(?:SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+async def _workload(api) -> None:
+    """Call every route and tool the way a client would"""
+    async def call(name, **arguments):
+        response = await api.post("/call_tool", json={"name": name, "arguments": arguments})
+        outcome = response.json()
+        assert outcome["success"] and outcome["result"].get("status") != "error", outcome
+        return outcome["result"]
+
+    async def get(url, **params):
+        response = await api.get(url, params=params)
+        assert response.status_code == 200, response.text
+        return response
+
+    await get("/partitions")
+
+    await call("set_budget", category="food", monthly_limit=500)
+    await call("add_recurring_expense", start_date="2024-01-01", amount=12, category="subscriptions")
+    added = await call("add_expense", date="2024-05-10", amount=42.5, category="food", note="team lunch")
+    await call("check_budget", month="2024-05")
+    await call("update_expense", expense_id=added["expense_id"], amount=40, category="transport",
+               subcategory="fuel")
+
+    page = (await get("/expenses", start_date=START, end_date=END, limit=50)).json()
+    await get("/expenses", start_date=START, end_date=END, limit=50, cursor=page["next_cursor"])
+    page = (await get("/expenses", start_date=START, end_date=END, category="food", limit=50)).json()
+    await get("/expenses", start_date=START, end_date=END, category="food", limit=50, cursor=page["next_cursor"])
+    await get("/expenses", start_date=START, end_date=END, format="columns")
+    # Reaches into the archived years
+    await get("/expenses", start_date="2016-01-01", end_date="2024-12-31", limit=50)
+    archived = await call("list_expenses", start_date="2016-01-01", end_date="2016-12-31", limit=2)
+    await call("update_expense", expense_id=archived["expenses"][0]["id"], note="restored")
+    await call("delete_expense", expense_id=archived["expenses"][1]["id"])
+
+    await get("/expenses/summary", start_date=START, end_date=END)
+    await get("/expenses/summary", start_date=START, end_date=END, category="food", by_subcategory=True)
+    await get("/expenses/compare", period="month", anchor_date="2023-06-15", periods=3)
+    await get("/expenses/compare", period="quarter", anchor_date="2023-06-15", align="year_over_year",
+              category="food", by_subcategory=True)
+
+    results = await call("search_expenses", query="lunch", limit=5)
+    await call("search_expenses", query="coffee", start_date=START, end_date=END, category="food", limit=5)
+    if results.get("next_cursor"):
+        await call("search_expenses", query="lunch", limit=5, cursor=results["next_cursor"])
+
+    await get("/expenses/stream", start_date=START, end_date=END, category="food")
+    await get("/expenses/export", start_date=START, end_date=END, format="csv")
+    await get("/changes", after=0, limit=10)
+    changes = (await get("/changes", after=0)).json()
+    await get("/changes", after=changes["last_seq"])
+
+    response = await api.post("/import", content=b"date,amount,category\n2024-06-01,9.5,food\n")
+    assert response.status_code == 200, response.text
+    response = await api.post("/call_tools", json={"atomic": True, "calls": [
+        {"name": "add_expense", "arguments": {"date": "2024-06-02", "amount": 3, "category": "food"}},
+        {"name": "summarize_expenses", "arguments": {"start_date": "2024-06-01", "end_date": "2024-06-30"}},
+    ]})
+    assert response.status_code == 200, response.text
+    await call("remove_budget", category="food")
+
+
+@pytest.fixture(scope="module")
+def traced(run, api) -> List[str]:
+    """Every distinct statement SQLite ran while the workload was called"""
+    from benchmarks.datagen import build_database
+    from src.config.settings import settings
+    from src.database.sqlite_client import db
+    from src.utils.result_cache import result_cache
+
+    build_database(settings.database_path, ROWS)
+    admin = {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+    response = run(api.post("/partitions/compact", params={"hot_years": 3}, headers=admin))
+    assert response.status_code == 200 and response.json()["archived"], response.text
+    # Reconnect so the pool's connections are opened, and traced, below
+    run(db.close())
+    result_cache.clear()
+
+    statements: Set[str] = set()
+    connect = sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.add)
+        return conn
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(sqlite3, "connect", traced_connect)
+        run(_workload(api))
+        run(db.close())
+    return sorted(s for s in statements if STATEMENT.match(s))
+
+
+def _plan(conn: sqlite3.Connection, sql: str) -> List[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def _problems(sql: str, details: List[str]) -> List[str]:
+    """Plan lines that scan a large table, or sort rows read from one"""
+    # Plans name a table by its alias, e.g. "SCAN c" for "expense_changes AS c"
+    aliases = {alias: table for table, alias in ALIAS.findall(sql)}
+    scans, row_reads = [], False
+    for detail in details:
+        match = PLAN_TABLE.search(detail)
+        if match is None:
+            continue
+        table = aliases.get(match.group(2), match.group(2))
+        if match.group(1) == "SCAN" and LARGE_TABLE.fullmatch(table):
+            scans.append(detail)
+        row_reads = row_reads or bool(ROW_TABLE.fullmatch(table))
+    if row_reads and not RANKED.search(sql):
+        scans += [d for d in details if TEMP_SORT.search(d)]
+    return scans
+
+
+def test_workload_covers_every_query_family(traced):
+    text = "\n".join(traced)
+    for table in ("expenses_fts", "expense_monthly_totals", "expense_daily_totals", "expense_budgets",
+                  "recurring_rules", "recurring_occurrences", "expense_changes", "expense_partitions"):
+        assert table in text, f"no traced statement reads {table}"
+    assert re.search(r"archive\.expenses_2016_\d+", text), "no traced statement reads an archive partition"
+
+
+def test_no_full_scans_or_temp_sorts(traced):
+    from src.config.settings import settings
+    from src.database.partitions import attach_archive
+
+    conn = sqlite3.connect(settings.database_path)
+    try:
+        attach_archive(conn, settings.database_path)
+        failures = []
+        for sql in traced:
+            details = _plan(conn, sql)
+            if _problems(sql, details):
+                failures.append(f"{' '.join(sql.split())}\n    " + "\n    ".join(details))
+    finally:
+        conn.close()
+    assert not failures, f"{len(failures)} query plan(s) regressed:\n" + "\n".join(failures)
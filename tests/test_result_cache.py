@@ -0,0 +1,107 @@
+"""
+Cached read results must never outlive the data they were computed from.
+
+Each test runs as an organization of its own, so it starts with an empty
+database and cache entries no other test can touch.
+"""
+import re
+import sqlite3
+
+import pytest
+
+from src.database.codec import date_to_day
+from src.database.sqlite_client import db
+from src.tools.expense_tools import add_expense, delete_expense, summarize_expenses_data, update_expense
+from src.utils.result_cache import result_cache
+from src.utils.tenancy import org_scope
+
+MARCH = ("2024-03-01", "2024-03-31")
+
+
+@pytest.fixture
+def org(request):
+    org = re.sub(r"[^A-Za-z0-9_-]", "_", f"cache-{request.node.name}")[:64]
+    with org_scope(org):
+        yield org
+
+
+def total(run, start_date=MARCH[0], end_date=MARCH[1]) -> float:
+    return run(summarize_expenses_data(start_date, end_date))["total"]
+
+
+def add(run, day: str, amount: float, category: str = "food") -> str:
+    result = run(add_expense(day, amount, category))
+    assert result["status"] == "success", result
+    return result["expense_id"]
+
+
+def test_repeated_read_is_a_hit(run, org):
+    add(run, "2024-03-05", 10)
+    hits = result_cache.hits
+    assert total(run) == 10.0
+    assert total(run) == 10.0
+    assert result_cache.hits == hits + 1
+
+
+def test_write_in_range_invalidates(run, org):
+    add(run, "2024-03-05", 10)
+    assert total(run) == 10.0
+    add(run, "2024-03-20", 2.5, "transport")
+    assert total(run) == 12.5
+
+
+def test_write_outside_range_keeps_entry(run, org):
+    add(run, "2024-03-05", 10)
+    assert total(run) == 10.0
+    add(run, "2024-07-01", 99)
+    hits = result_cache.hits
+    assert total(run) == 10.0
+    assert result_cache.hits == hits + 1
+
+
+def test_update_and_delete_invalidate_old_and_new_range(run, org):
+    expense_id = add(run, "2024-03-05", 10)
+    assert total(run) == 10.0
+    assert total(run, "2024-04-01", "2024-04-30") == 0.0
+
+    assert run(update_expense(expense_id, date="2024-04-02", amount=7))["status"] == "success"
+    assert total(run) == 0.0
+    assert total(run, "2024-04-01", "2024-04-30") == 7.0
+
+    assert run(delete_expense(expense_id))["status"] == "success"
+    assert total(run, "2024-04-01", "2024-04-30") == 0.0
+
+
+def test_writes_from_another_process_invalidate(run, org):
+    add(run, "2024-03-05", 10)
+    assert total(run) == 10.0
+
+    # Another process (main.py, a second API worker) writing the same file
+    conn = sqlite3.connect(db.path_for(org))
+    try:
+        conn.execute(
+            "INSERT INTO expenses (id, day, amount_cents, category) VALUES (?, ?, ?, ?)",
+            ("f" * 32, date_to_day("2024-03-10"), 500, "food")
+        )
+        conn.commit()
+        assert total(run) == 15.0
+
+        conn.execute("UPDATE expenses SET amount_cents = 100 WHERE id = ?", ("f" * 32,))
+        conn.commit()
+        assert total(run) == 11.0
+
+        conn.execute("DELETE FROM expenses WHERE id = ?", ("f" * 32,))
+        conn.commit()
+        assert total(run) == 10.0
+    finally:
+        conn.close()
+
+
+def test_organizations_do_not_share_entries(run, org):
+    add(run, "2024-03-05", 10)
+    assert total(run) == 10.0
+    with org_scope(f"{org}-other"):
+        assert total(run) == 0.0
+        add(run, "2024-03-05", 3)
+        assert total(run) == 3.0
+    assert total(run) == 10.0
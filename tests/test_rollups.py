@@ -0,0 +1,92 @@
+"""
+The rollup tables kept by triggers must always match the raw expenses.
+
+Each test writes through a client of its own database and then compares
+every rollup row with the expenses it summarizes, archived ones included.
+"""
+from datetime import date
+
+import pytest
+
+from src.database.codec import date_to_day
+from src.database.rollups import build_raw_summary_query, build_rollup_summary_query, check_rollup_consistency
+from src.database.sqlite_client import SQLiteClient
+from src.tools.expense_tools import DELETE_SQL, INSERT_SQL
+
+ROWS = [
+    ("a" * 32, "2021-03-04", 1250, "food", "groceries"),
+    ("b" * 32, "2021-03-31", 800, "food", ""),
+    ("c" * 32, "2021-04-01", 4000, "transport", "fuel"),
+    ("d" * 32, "2024-02-29", 999, "food", "groceries"),
+    ("e" * 32, "2024-03-01", 15000, "housing", "rent"),
+]
+
+
+@pytest.fixture
+def client(run, tmp_path):
+    client = SQLiteClient(str(tmp_path / "rollups.db"))
+    run(client.ensure_schema())
+    run(client.executemany(INSERT_SQL, [
+        (expense_id, date_to_day(day), cents, category, subcategory, "")
+        for expense_id, day, cents, category, subcategory in ROWS
+    ]))
+    try:
+        yield client
+    finally:
+        run(client.close())
+
+
+def test_inserts_are_counted(run, client):
+    assert run(check_rollup_consistency(client)) == []
+    rows = run(client.fetch_all(*build_rollup_summary_query("2021-03-01", "2021-03-31")))
+    assert rows == [{"category": "food", "total_amount": 20.5, "count": 2}]
+
+
+def test_updates_move_totals_between_buckets(run, client):
+    # Across a month boundary, into another category and subcategory
+    run(client.execute(
+        "UPDATE expenses SET day = ?, category = ?, subcategory = ?, amount_cents = ? WHERE id = ?",
+        (date_to_day("2021-04-15"), "transport", "parking", 700, "a" * 32)
+    ))
+    run(client.execute("UPDATE expenses SET note = 'x' WHERE id = ?", ("b" * 32,)))
+    assert run(check_rollup_consistency(client)) == []
+    rows = run(client.fetch_all(*build_rollup_summary_query("2021-03-01", "2021-03-31")))
+    assert rows == [{"category": "food", "total_amount": 8.0, "count": 1}]
+
+
+def test_deletes_and_rolled_back_writes(run, client):
+    run(client.execute(DELETE_SQL, ("c" * 32,)))
+
+    async def failed_transaction():
+        async with client.transaction():
+            await client.execute(DELETE_SQL, ("d" * 32,))
+            raise RuntimeError("abort")
+
+    with pytest.raises(RuntimeError):
+        run(failed_transaction())
+    assert run(check_rollup_consistency(client)) == []
+    assert run(client.fetch_one("SELECT COUNT(*) AS n FROM expenses"))["n"] == 4
+
+
+def test_archived_rows_stay_counted_and_restore_cleanly(run, client):
+    result = run(client.compact_partitions(hot_years=2, today=date(2025, 6, 1)))
+    assert [entry["year"] for entry in result["archived"]] == [2021]
+    assert run(check_rollup_consistency(client)) == []
+
+    from src.database.partitions import restore_expense
+
+    partition = run(client.partitions())[0]
+    assert run(restore_expense(client, partition.name, "a" * 32))
+    assert run(check_rollup_consistency(client)) == []
+
+
+@pytest.mark.parametrize("start, end, category, by_subcategory", [
+    ("2021-03-04", "2021-04-01", None, False),
+    ("2020-01-01", "2024-12-31", None, True),
+    ("2021-03-15", "2024-02-29", "food", True),
+])
+def test_rollup_summary_matches_raw_summary(run, client, start, end, category, by_subcategory):
+    rollup = run(client.fetch_all(*build_rollup_summary_query(start, end, category, by_subcategory)))
+    raw = run(client.fetch_all(*build_raw_summary_query(date_to_day(start), date_to_day(end), category, by_subcategory)))
+    key = lambda row: (row["category"], row.get("subcategory", ""))
+    assert sorted(rollup, key=key) == sorted(raw, key=key)
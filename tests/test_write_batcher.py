@@ -0,0 +1,108 @@
+"""
+Group-committed writes must still behave like separate writes to each caller.
+"""
+import asyncio
+
+import pytest
+
+from src.database.codec import date_to_day
+from src.database.sqlite_client import SQLiteClient
+from src.database.write_batcher import WriteBatcher
+from src.tools.expense_tools import INSERT_SQL
+
+DAY = date_to_day("2024-05-01")
+
+
+@pytest.fixture
+def client(run, tmp_path):
+    client = SQLiteClient(str(tmp_path / "batcher.db"), write_batching=True)
+    run(client.ensure_schema())
+    try:
+        yield client
+    finally:
+        run(client.close())
+
+
+def insert(client, index: int):
+    return client.execute(INSERT_SQL, (f"{index:032x}", DAY, 100 + index, "food", "", ""))
+
+
+def test_each_caller_gets_its_own_result(run, client):
+    async def many():
+        return await asyncio.gather(*(insert(client, i) for i in range(50)))
+
+    results = run(many())
+    rows = run(client.fetch_all("SELECT pk, id FROM expenses"))
+    pk_of = {row["id"]: row["pk"] for row in rows}
+    assert len(rows) == 50
+    assert [result.last_insert_rowid for result in results] == [pk_of[f"{i:032x}"] for i in range(50)]
+    assert all(result.rows_affected == 1 for result in results)
+
+
+def test_a_failed_statement_fails_only_its_caller(run, client):
+    run(insert(client, 1))
+
+    async def mixed():
+        # Index 1 already exists: UNIQUE constraint on the public id
+        return await asyncio.gather(*(insert(client, i) for i in (2, 1, 3)), return_exceptions=True)
+
+    results = run(mixed())
+    assert isinstance(results[1], Exception) and "UNIQUE" in str(results[1])
+    assert not isinstance(results[0], Exception) and not isinstance(results[2], Exception)
+    assert run(client.fetch_one("SELECT COUNT(*) AS n FROM expenses"))["n"] == 3
+
+
+class _FailingConnection:
+    """Writer whose commit, and the rollback after it, both fail"""
+
+    in_transaction = False
+
+    async def execute(self, query, params=()):
+        if query.startswith("BEGIN"):
+            self.in_transaction = True
+        return type("Cursor", (), {"lastrowid": 1, "rowcount": 1})()
+
+    async def commit(self):
+        raise RuntimeError("disk I/O error")
+
+    async def rollback(self):
+        raise RuntimeError("rollback failed")
+
+
+class _FakeClient:
+    def __init__(self):
+        self._write_lock = asyncio.Lock()
+        self._writer = _FailingConnection()
+
+
+def test_failed_commit_and_rollback_resolve_every_caller(run):
+    fake = _FakeClient()
+    batcher = WriteBatcher(fake)
+
+    async def scenario():
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit("INSERT") for _ in range(3)), return_exceptions=True), 5
+        )
+        assert [str(result) for result in results] == ["disk I/O error"] * 3
+
+        # The run loop survived the failed flush and serves later writes
+        fake._writer = _FailingConnection()
+        fake._writer.commit = lambda: asyncio.sleep(0)
+        result = await asyncio.wait_for(batcher.submit("INSERT"), 5)
+        assert result.rows_affected == 1
+        await batcher.close()
+
+    run(scenario())
+
+
+def test_close_flushes_pending_writes(run, client):
+    async def scenario():
+        await client.connect()
+        pending = [asyncio.ensure_future(insert(client, i)) for i in range(5)]
+        # Let every write reach the batcher's queue
+        await asyncio.sleep(0)
+        await client.close()
+        return await asyncio.gather(*pending)
+
+    assert len(run(scenario())) == 5
+    assert run(client.fetch_one("SELECT COUNT(*) AS n FROM expenses"))["n"] == 5